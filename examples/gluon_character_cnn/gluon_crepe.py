@@ -57,8 +57,9 @@ class CharacterCNNService(GluonBaseService):
         super(CharacterCNNService, self).__init__()
         # The 69 characters as specified in the paper
         self.ALPHABET = list("abcdefghijklmnopqrstuvwxyz0123456789-,;.!?:'\"/\\|_@#$%^&*~`+ =<>()[]{}")
-        # Map Alphabets to index
-        self.ALPHABET_INDEX = {letter: index for index, letter in enumerate(self.ALPHABET)}
+        # Map character code points to alphabet index, -1 for characters outside of the alphabet
+        self.ALPHABET_LOOKUP = np.full(256, -1, dtype=np.int64)
+        self.ALPHABET_LOOKUP[[ord(letter) for letter in self.ALPHABET]] = np.arange(len(self.ALPHABET))
         # max-length in characters for one document
         self.FEATURE_LEN = 1014
 
@@ -69,25 +70,42 @@ class CharacterCNNService(GluonBaseService):
         # Hybridize imperative model for best performance
         self.net.hybridize()
 
+    def encode(self, texts):
+        """
+        Quantize a batch of texts into a (batch, 69, 1014) one-hot tensor.
+        Characters are mapped through the code point lookup table and the ones
+        are scattered for the whole batch at once.
+        """
+        codes = [np.frombuffer(text[:self.FEATURE_LEN].encode('utf-32-le'), dtype=np.uint32) for text in texts]
+        lengths = np.array([len(c) for c in codes], dtype=np.int64)
+        codes = np.concatenate(codes) if codes else np.zeros(0, dtype=np.uint32)
+
+        # Row and character position of every code point in the batch
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        positions = np.arange(len(codes)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        # Code points above 255 are never in the alphabet, 255 maps to -1
+        indices = self.ALPHABET_LOOKUP[np.minimum(codes, 255)]
+        valid = indices >= 0
+
+        encoded = np.zeros([len(texts), len(self.ALPHABET), self.FEATURE_LEN], dtype='float32')
+        encoded[rows[valid], indices[valid], positions[valid]] = 1
+        return encoded
+
     def preprocess(self, data):
         """
         Pre-process text to a encode it to a form, that gives spatial information to the CNN
         """
-        # build the text from the request
-        if data[0].get('data') is not None:
-            data = ast.literal_eval(data[0].get('data').decode('utf-8'))
-        text = '{}|{}'.format(data[0].get('review_title'), data[0].get('review'))
-
-        encoded = np.zeros([len(self.ALPHABET), self.FEATURE_LEN], dtype='float32')
-        review = text.lower()[:self.FEATURE_LEN-1:-1]
-        i = 0
-        for letter in text:
-            if i >= self.FEATURE_LEN:
-                break;
-            if letter in self.ALPHABET_INDEX:
-                encoded[self.ALPHABET_INDEX[letter]][i] = 1
-            i += 1
-        return nd.array([encoded], ctx=self.ctx)
+        # build the text from every request of the batch
+        texts = []
+        for request in data:
+            review = request.get('data')
+            if review is None:
+                review = request.get('body')
+            if isinstance(review, (bytes, bytearray)):
+                review = ast.literal_eval(review.decode('utf-8'))
+            texts.append('{}|{}'.format(review[0].get('review_title'), review[0].get('review')))
+
+        return nd.array(self.encode(texts), ctx=self.ctx)
 
     def inference(self, data):
         # Call forward/hybrid_forward
@@ -95,9 +113,9 @@ class CharacterCNNService(GluonBaseService):
         return output.softmax()
 
     def postprocess(self, data):
-        # Post process and output the most likely category
-        predicted = self.labels[np.argmax(data[0].asnumpy())]
-        return [{'category': predicted}]
+        # Post process and output the most likely category of every review
+        predicted = np.argmax(data.asnumpy(), axis=1)
+        return [{'category': self.labels[idx]} for idx in predicted]
 
 
 svc = CharacterCNNService()
@@ -2,6 +2,7 @@ import json
 import os
 
 import mxnet as mx
+import numpy as np
 
 from mxnet_utils import nlp
 from model_handler import ModelHandler
@@ -9,8 +10,9 @@ from model_handler import ModelHandler
 
 class MXNetLSTMService(ModelHandler):
     """
-    MXNetLSTMService service class. This service consumes a sentence
-    from length 0 to 60 and generates a sentence with the same size.
+    MXNetLSTMService service class. This service consumes sentences
+    from length 0 to 60 and generates sentences with the same size.
+    Sentences of a batch are grouped by bucket, one forward pass is run per bucket.
     """
 
     def __init__(self):
@@ -29,7 +31,8 @@ class MXNetLSTMService(ModelHandler):
         self.invalid_label = 0
         self.layout = "NT"
         self.vocab = {}
-        self.idx2word = {}
+        self.frozen_vocab = None
+        self.idx2word = None
 
     def initialize(self, context):
         super(MXNetLSTMService, self).initialize(context)
@@ -37,9 +40,6 @@ class MXNetLSTMService(ModelHandler):
         properties = context.system_properties
         model_dir = properties.get("model_dir")
         gpu_id = properties.get("gpu_id")
-        batch_size = properties.get("batch_size")
-        if batch_size > 1:
-            raise ValueError("Batch is not supported.")
 
         # reading signature.json file
         signature_file_path = os.path.join(model_dir, "signature.json")
@@ -52,8 +52,11 @@ class MXNetLSTMService(ModelHandler):
         self.data_names = []
         self.data_shapes = []
         for input_data in self.signature["inputs"]:
+            data_shape = input_data["data_shape"]
+            # Bind for the largest batch frontend may send, smaller batches are reshaped on forward
+            data_shape[0] = self._batch_size
             self.data_names.append(input_data["data_name"])
-            self.data_shapes.append((input_data['data_name'], tuple(input_data['data_shape'])))
+            self.data_shapes.append((input_data['data_name'], tuple(data_shape)))
 
         # reading vocab_dict.txt file
         vocab_dict_file = os.path.join(model_dir, "vocab_dict.txt")
@@ -64,6 +67,11 @@ class MXNetLSTMService(ModelHandler):
                 if len(word_index) < 2 or word_index[0] == '':
                     continue
                 self.vocab[word_index[0]] = int(word_index[1].rstrip())
+        self.frozen_vocab = nlp.freeze_vocab(self.vocab)
+
+        # Index to word lookup table, used to decode a whole batch of predictions at once
+        self.idx2word = np.empty(max(self.vocab.values()) + 1, dtype=object)
+        self.idx2word[:] = ""
         for key, val in self.vocab.items():
             self.idx2word[val] = key
 
@@ -106,41 +114,49 @@ class MXNetLSTMService(ModelHandler):
 
     def preprocess(self, data):
         """
-        This service doesn't support batch, always get data from first item.
+        Encode the input sentence of every request in the batch.
 
-        :param data:
-        :return:
+        :param data: list of raw requests
+        :return: list of encoded sentences
         """
-        input_data = data[0].get("data")
-        if input_data is None:
-            input_data = data[0].get("body")
+        sentences = []
+        for request in data:
+            input_data = request.get("data")
+            if input_data is None:
+                input_data = request.get("body")
 
-        # Convert a string of sentence to a list of string
-        sent = input_data[0]["input_sentence"].lower().split(" ")
-        assert len(sent) <= self.buckets[-1], "Sentence length must be no greater than %d." % (self.buckets[-1])
-        # Encode sentence to a list of int
-        res, _ = nlp.encode_sentences(
-            [sent], vocab=self.vocab, start_label=self.start_label,
-            invalid_label=self.invalid_label)
+            # Convert a string of sentence to a list of string
+            sent = input_data[0]["input_sentence"].lower().split(" ")
+            assert len(sent) <= self.buckets[-1], "Sentence length must be no greater than %d." % (self.buckets[-1])
+            sentences.append(sent)
 
-        return res
+        # Encode sentences to lists of int
+        return nlp.encode_sentences_batch(sentences, self.frozen_vocab, invalid_label=self.invalid_label)
 
     def inference(self, data):
-        data_batch = nlp.pad_sentence(
-            data[0], self.buckets, invalid_label=self.invalid_label,
+        """
+        Run one forward pass per bucket.
+
+        :param data: list of encoded sentences
+        :return: list of predicted word indices, one array per sentence in request order, as long as its bucket
+        """
+        batches = nlp.pad_sentences(
+            data, self.buckets, invalid_label=self.invalid_label,
             data_name=self.data_names[0], layout=self.layout)
-        self.mx_model.forward(data_batch)
-        return self.mx_model.get_outputs()
+
+        ret = [None] * len(data)
+        for data_batch in batches:
+            self.mx_model.forward(data_batch)
+            # Output is (batch * bucket_key, vocab_size), take the argmax for all sentences of the bucket at once
+            word_idx = mx.nd.argmax(self.mx_model.get_outputs()[0], axis=1).asnumpy().astype(np.int64)
+            word_idx = word_idx.reshape((len(data_batch.index), data_batch.bucket_key))
+            for row, idx in zip(word_idx, data_batch.index):
+                ret[idx] = row
+        return ret
 
     def postprocess(self, data):
         # Generate predicted sentences
-        word_idx = mx.nd.argmax(data[0], axis=1).asnumpy()
-        res = ""
-        for idx in word_idx:
-            res += self.idx2word[idx] + " "
-
-        ret = {"prediction": res}
-        return [ret]
+        return [{"prediction": " ".join(self.idx2word[word_idx]) + " "} for word_idx in data]
 
 
 # Following code is not necessary if your service class contains `handle(self, data, context)` function
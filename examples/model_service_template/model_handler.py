@@ -72,15 +72,22 @@ class ModelHandler(object):
         :param context: model server context
         :return: list of outputs to be send back to client
         """
-
+        # A batch may hold fewer requests than the batch size, and an error only fails its own batch
+        request_count = len(data)
+        self.error = None
         try:
-            data = self.preprocess(data)
-            data = self.inference(data)
-            data = self.postprocess(data)
-
+            with context.stage("Preprocess"):
+                data = self.preprocess(data)
+            with context.stage("Inference"):
+                data = self.inference(data)
+            with context.stage("Postprocess"):
+                data = self.postprocess(data)
+
+            if self.error is not None:
+                return [self.error] * request_count
             return data
         except Exception as e:
             logging.error(e, exc_info=True)
             request_processor = context.request_processor
             request_processor.report_status(500, "Unknown inference error")
-            return [str(e)] * self._batch_size
+            return [str(e)] * request_count
@@ -19,6 +19,9 @@ from mxnet.io import DataBatch
 
 from model_handler import ModelHandler
 
+# Inference graph optimized by model-archiver --optimize
+OPTIMIZED_DIR = os.path.join("MAR-INF", "optimized")
+
 
 class MXNetModelService(ModelHandler):
     """
@@ -48,8 +51,6 @@ class MXNetModelService(ModelHandler):
         """
         super(MXNetModelService, self).initialize(context)
 
-        assert self._batch_size == 1, "Batch is not supported."
-
         properties = context.system_properties
         model_dir = properties.get("model_dir")
         gpu_id = properties.get("gpu_id")
@@ -67,13 +68,20 @@ class MXNetModelService(ModelHandler):
             synset = archive_synset
             self.labels = [line.strip() for line in open(synset).readlines()]
 
+        # Input shapes of the optimized graph, or of the signature
+        inputs = self.signature["inputs"]
+        shapes_file_path = os.path.join(model_dir, OPTIMIZED_DIR, "shapes.json")
+        if os.path.isfile(shapes_file_path):
+            with open(shapes_file_path) as f:
+                inputs = json.load(f)["inputs"]
+
         data_names = []
         data_shapes = []
-        for input_data in self.signature["inputs"]:
+        for input_data in inputs:
             data_name = input_data["data_name"]
             data_shape = input_data["data_shape"]
 
-            # Set batch size
+            # Bind for the largest batch, module reshapes itself for smaller batches on forward
             data_shape[0] = self._batch_size
 
             # Replace 0 entry in data shape with 1 for binding executor.
@@ -84,17 +92,61 @@ class MXNetModelService(ModelHandler):
             data_names.append(data_name)
             data_shapes.append((data_name, tuple(data_shape)))
 
-        checkpoint_prefix = "{}/{}".format(model_dir, model_files_prefix)
-
         # Load MXNet module
         self.mxnet_ctx = mx.cpu() if gpu_id is None else mx.gpu(gpu_id)
-        sym, arg_params, aux_params = mx.model.load_checkpoint(checkpoint_prefix, self.epoch)
+        sym, arg_params, aux_params = self.load_checkpoint(model_dir, model_files_prefix)
 
         # noinspection PyTypeChecker
         self.mx_model = mx.mod.Module(symbol=sym, context=self.mxnet_ctx,
                                       data_names=data_names, label_names=None)
         self.mx_model.bind(for_training=False, data_shapes=data_shapes)
         self.mx_model.set_params(arg_params, aux_params, allow_missing=True, allow_extra=True)
+        self.warm_up(model_dir)
+
+    def load_checkpoint(self, model_dir, model_files_prefix):
+        """
+        Load the symbol and parameters of the model. The optimized graph is preferred when the archive has one: its
+        parameters file only holds the parameters that changed, which override the parameters of the model.
+
+        :param model_dir: directory of the model files
+        :param model_files_prefix: prefix of the symbol and parameters files
+        :return: symbol, argument parameters and auxiliary parameters
+        """
+        sym, arg_params, aux_params = mx.model.load_checkpoint("{}/{}".format(model_dir, model_files_prefix),
+                                                               self.epoch)
+        optimized_prefix = os.path.join(model_dir, OPTIMIZED_DIR, model_files_prefix)
+        if os.path.isfile("{}-symbol.json".format(optimized_prefix)):
+            sym, optimized_arg_params, optimized_aux_params = mx.model.load_checkpoint(optimized_prefix, self.epoch)
+            arg_params.update(optimized_arg_params)
+            aux_params.update(optimized_aux_params)
+        return sym, arg_params, aux_params
+
+    def warm_up(self, model_dir):
+        """
+        Run the warm-up samples of the archive through the model, so memory allocation and operator setup do not
+        slow down the first requests. The number of samples is limited by the warmupSamples performance hint of the
+        manifest.
+
+        :param model_dir: directory of the model files
+        :return:
+        """
+        warmup_file_path = os.path.join(model_dir, OPTIMIZED_DIR, "warmup.params")
+        if not os.path.isfile(warmup_file_path):
+            return
+
+        samples = mx.nd.load(warmup_file_path)
+        data_names = self.mx_model.data_names
+        count = samples[data_names[0]].shape[0]
+        hint = (self._context.manifest or {}).get("performance", {}).get("warmupSamples")
+        if hint is not None:
+            count = min(count, hint)
+        # Batches of the bound batch size, cycling through the samples
+        for start in range(0, count, self._batch_size):
+            index = mx.nd.array([(start + i) % count for i in range(self._batch_size)])
+            data = [mx.nd.take(samples[name], index).as_in_context(self.mxnet_ctx) for name in data_names]
+            self.mx_model.forward(DataBatch(data), is_train=False)
+            for output in self.mx_model.get_outputs():
+                output.wait_to_read()
 
     def preprocess(self, batch):
         """
@@ -151,7 +203,7 @@ class MXNetModelService(ModelHandler):
 
     def postprocess(self, inference_output):
         if self.error is not None:
-            return [self.error] * self._batch_size
+            return None
 
         return [str(d.asnumpy().tolist()) for d in inference_output]
 
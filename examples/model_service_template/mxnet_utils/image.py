@@ -71,6 +71,50 @@ def read(buf, flag=1, to_rgb=True, out=None):
     return img.imdecode(buf, flag, to_rgb, out)
 
 
+def read_downscaled(buf, width, height, flag=1, to_rgb=True):
+    """
+    Read and decode an image to an NDArray, letting the JPEG decoder
+    downscale it while decoding.
+    Output image NDArray has dim_order of 'HWC'.
+
+    JPEG images are decoded with DCT scaling at the smallest scale
+    (1/2, 1/4 or 1/8) that is still at least `width` x `height`.
+    Other formats fall back to `read`. The result still has to be resized
+    to the exact target shape.
+
+    :param buf: str/bytes or numpy.ndarray
+        Binary image data as string or numpy ndarray.
+    :param width: int
+        Minimum width in pixel of the decoded image
+    :param height: int
+        Minimum height in pixel of the decoded image
+    :param flag:  {0, 1}, default 1
+        1 for three channel color output. 0 for grayscale output.
+    :param to_rgb:  bool, default True
+        True for RGB formatted output (MXNet default).
+        False for BGR formatted output (OpenCV default).
+    :return: NDArray
+        An `NDArray` containing the image.
+    """
+    data = buf.tobytes() if isinstance(buf, np.ndarray) else buf
+    try:
+        image = Image.open(BytesIO(data))
+    except IOError:
+        return read(buf, flag, to_rgb)
+
+    if image.format != 'JPEG':
+        return read(buf, flag, to_rgb)
+
+    mode = 'RGB' if flag == 1 else 'L'
+    image.draft(mode, (width, height))
+    img_arr = np.asarray(image.convert(mode))
+    if flag == 0:
+        img_arr = img_arr[:, :, np.newaxis]
+    elif not to_rgb:
+        img_arr = img_arr[:, :, ::-1]
+    return mx.nd.array(img_arr, dtype=np.uint8)
+
+
 def write(img_arr, flag=1, output_format='jpeg', dim_order='CHW'):
     """
     Write an NDArray to a base64 string.
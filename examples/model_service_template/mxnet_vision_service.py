@@ -13,6 +13,8 @@ MXNetVisionService defines a MXNet base vision service
 """
 import logging
 
+import mxnet as mx
+
 from mxnet_model_service import MXNetModelService
 from mxnet_utils import image, ndarray
 
@@ -27,7 +29,7 @@ class MXNetVisionService(MXNetModelService):
 
     def preprocess(self, request):
         """
-        Decode all input images into ndarray.
+        Decode all input images into a single ndarray batch.
 
         Note: This implementation doesn't properly handle error cases in batch mode,
         If one of the input images is corrupted, all requests in the batch will fail.
@@ -55,7 +57,7 @@ class MXNetVisionService(MXNetModelService):
             [h, w] = input_shape[2:]
 
             try:
-                img_arr = image.read(img)
+                img_arr = image.read_downscaled(img, w, h)
             except Exception as e:
                 logging.warn(e, exc_info=True)
                 self.error = "Corrupted image input"
@@ -64,16 +66,19 @@ class MXNetVisionService(MXNetModelService):
             img_arr = image.resize(img_arr, w, h)
             img_arr = image.transform_shape(img_arr)
             img_list.append(img_arr)
-        return img_list
+
+        # Stack all images of the batch to run them in one forward pass
+        return [mx.nd.concat(*img_list, dim=0)]
 
     def postprocess(self, data):
         if self.error is not None:
-            return [self.error] * self._batch_size
+            return None
 
         assert hasattr(self, 'labels'), \
             "Can't find labels attribute. Did you put synset.txt file into " \
             "model archive or manually load class label file in __init__?"
-        return [ndarray.top_probability(d, self.labels, top=5) for d in data]
+        output = data[0]
+        return [ndarray.top_probability(output[i:i + 1], self.labels, top=5) for i in range(output.shape[0])]
 
 
 _service = MXNetVisionService()
@@ -8,7 +8,10 @@
 # express or implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
+from io import BytesIO
+
 import numpy as np
+from PIL import Image
 
 from mxnet_utils import image
 from mxnet_vision_service import MXNetVisionService
@@ -30,74 +33,94 @@ class SSDService(MXNetVisionService):
         # You can experiment with different threshold to see the best threshold for the use-case.
         self.threshold = 0.2
 
-        # This is used to save the original input image shape.
-        # This is required for preparing the bounding box of the detected object "relative to
-        # original input"
-        self.input_width = None
-        self.input_height = None
+    @staticmethod
+    def original_shape(img):
+        """
+        Read (height, width) of the input image. Only the image header is parsed when
+        PIL can read the format, otherwise the image is decoded.
+        """
+        try:
+            width, height = Image.open(BytesIO(img)).size
+        except IOError:
+            height, width = image.read(img).shape[:2]
+        return height, width
 
     def preprocess(self, batch):
         """
-        Input image buffer from data is read into NDArray. Then, resized to
+        Input image buffers of the batch are read into a single NDArray. Then, resized to
         expected shape. Swaps axes to convert image from BGR format to RGB.
-        Returns the preprocessed NDArray as a list for next step, Inference.
+        Returns the preprocessed NDArray together with the original (height, width) of every
+        input image for next step, Inference.
         """
+        # Transform input images - resize, BGR to RGB.
+        # Reuse MXNetVisionService preprocess to achieve above transformations.
+        model_input = super(SSDService, self).preprocess(batch)
+        if model_input is None:
+            return None
 
-        # Read input
-        img = batch[0].get("data")
-        if img is None:
-            img = batch[0].get("body")
-
-        input_image = image.read(img)
-
-        # Save original input image shape.
+        # Save original input image shapes, per request.
         # This is required for preparing the bounding box of the detected object relative to
         # original input
-        self.input_height = input_image.shape[0]
-        self.input_width = input_image.shape[1]
+        param_name = self.signature['inputs'][0]['data_name']
+        shapes = []
+        for data in batch:
+            img = data.get(param_name)
+            if img is None:
+                img = data.get("body")
+            if img is None:
+                img = data.get("data")
+            shapes.append(self.original_shape(img))
+
+        return model_input, shapes
+
+    def inference(self, model_input):
+        """
+        Run forward pass for the whole batch and pass original image shapes through to postprocess.
+        """
+        if self.error is not None:
+            return None
 
-        # Transform input image - resize, BGR to RGB.
-        # Reuse MXNetVisionService preprocess to achieve above transformations.
-        return super(SSDService, self).preprocess(batch)
+        model_input, shapes = model_input
+        return super(SSDService, self).inference(model_input), shapes
 
     def postprocess(self, data):
         """
-        From the detections, prepares the output in the format of list of
+        From the detections, prepares the output for every request in the batch in the format of list of
         [(object_class, xmin, ymin, xmax, ymax)]
         object_class is name of the object detected. xmin, ymin, xmax, ymax
         provides the bounding box coordinates.
 
         Example: [(person, 555, 175, 581, 242), (dog, 306, 446, 468, 530)]
         """
+        if self.error is not None:
+            return None
+
+        output, shapes = data
+
+        # Read the detections output after forward pass (inference), shape is (batch, detections, 6)
+        detections = output[0].asnumpy()
+        shapes = np.array(shapes, dtype=np.float32)
+        heights = shapes[:, 0:1]
+        widths = shapes[:, 1:2]
+
+        # Keep valid detections above threshold for the whole batch at once
+        class_ids = detections[:, :, 0].astype(np.int64)
+        mask = (class_ids >= 0) & (detections[:, :, 1] > self.threshold)
 
-        # Read the detections output after forward pass (inference)
-        detections = data[0].asnumpy()
-        result = []
-        for i in range(detections.shape[0]):
-            det = detections[i, :, :]
-            res = det[np.where(det[:, 0] >= 0)[0]]
-            result.append(res)
+        # Scale boxes relative to original input image of every request
+        scale = np.stack([widths, heights, widths, heights], axis=-1)
+        boxes = (detections[:, :, 2:6] * scale).astype(np.int64)
 
         # Prepare the output
-        dets = result[0]
         classes = self.labels
-        width = self.input_width    # original input image width
-        height = self.input_height  # original input image height
-        response = []
-        for i in range(dets.shape[0]):
-            cls_id = int(dets[i, 0])
-            if cls_id >= 0:
-                score = dets[i, 1]
-                if score > self.threshold:
-                    xmin = int(dets[i, 2] * width)
-                    ymin = int(dets[i, 3] * height)
-                    xmax = int(dets[i, 4] * width)
-                    ymax = int(dets[i, 5] * height)
-                    class_name = str(cls_id)
-                    if classes and len(classes) > cls_id:
-                        class_name = classes[cls_id]
-                    response.append((class_name, xmin, ymin, xmax, ymax))
-        return [response]
+        kept_ids = class_ids[mask].tolist()
+        kept_boxes = boxes[mask].tolist()
+        names = [classes[cls_id] if classes and len(classes) > cls_id else str(cls_id) for cls_id in kept_ids]
+        dets = [(name,) + tuple(box) for name, box in zip(names, kept_boxes)]
+
+        # Detections are ordered by request, split them back per request
+        offsets = np.cumsum(mask.sum(axis=1)).tolist()
+        return [dets[start:end] for start, end in zip([0] + offsets[:-1], offsets)]
 
 
 _service = SSDService()
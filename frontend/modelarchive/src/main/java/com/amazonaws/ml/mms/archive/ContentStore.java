@@ -0,0 +1,196 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.archive;
+
+import java.io.File;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.nio.file.Files;
+import java.nio.file.NoSuchFileException;
+import java.security.DigestInputStream;
+import java.security.MessageDigest;
+import java.security.NoSuchAlgorithmException;
+import java.util.ArrayList;
+import java.util.Comparator;
+import java.util.List;
+import org.apache.commons.io.FileUtils;
+import org.apache.commons.io.IOUtils;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Content-addressed store of the files extracted from model archives.
+ *
+ * <p>Every file is stored once, read-only and named after its SHA-256 digest, and hard-linked into
+ * the model directories that contain it. When the store grows over its maximum size, the least
+ * recently used files that are not linked into a model directory anymore are deleted.
+ */
+public class ContentStore {
+
+    private static final Logger logger = LoggerFactory.getLogger(ContentStore.class);
+
+    private static final int DIGEST_LENGTH = 64;
+
+    private File root;
+    private long maxSize;
+
+    public ContentStore(File root, long maxSize) {
+        this.root = root;
+        this.maxSize = maxSize;
+    }
+
+    public static MessageDigest newDigest() {
+        try {
+            return MessageDigest.getInstance("SHA-256");
+        } catch (NoSuchAlgorithmException e) {
+            throw new AssertionError(e);
+        }
+    }
+
+    public File getRoot() {
+        return root;
+    }
+
+    public long getMaxSize() {
+        return maxSize;
+    }
+
+    /**
+     * Copies a stream into the store. The stream is not closed.
+     *
+     * @param is the content to store
+     * @return the SHA-256 digest of the content
+     * @throws IOException if the content cannot be read or stored
+     */
+    public String add(InputStream is) throws IOException {
+        FileUtils.forceMkdir(root);
+        File tmp = File.createTempFile("content", ".tmp", root);
+        try {
+            MessageDigest md = newDigest();
+            try (OutputStream os = new FileOutputStream(tmp)) {
+                IOUtils.copy(new DigestInputStream(is, md), os);
+            }
+            String digest = Hex.toHexString(md.digest());
+            File file = getFile(digest);
+            if (file.exists()) {
+                touch(file);
+            } else {
+                FileUtils.forceMkdir(file.getParentFile());
+                if (!tmp.setReadOnly()) {
+                    logger.warn("Failed to make stored file read-only: {}", tmp);
+                }
+                if (!tmp.renameTo(file) && !file.exists()) {
+                    throw new IOException("Failed to add file to content store: " + file);
+                }
+            }
+            return digest;
+        } finally {
+            FileUtils.deleteQuietly(tmp);
+        }
+    }
+
+    /**
+     * Links a stored file into a model directory, or copies it if the file system does not support
+     * hard links.
+     *
+     * @param digest the SHA-256 digest of the file
+     * @param dest the file to create
+     * @return false if the store does not have the file
+     * @throws IOException if the file cannot be created
+     */
+    public boolean link(String digest, File dest) throws IOException {
+        File file = getFile(digest);
+        if (!file.isFile()) {
+            return false;
+        }
+        touch(file);
+
+        FileUtils.forceMkdir(dest.getParentFile());
+        try {
+            Files.createLink(dest.toPath(), file.toPath());
+        } catch (NoSuchFileException e) {
+            // removed by a concurrent gc
+            return false;
+        } catch (UnsupportedOperationException | IOException e) {
+            FileUtils.copyFile(file, dest);
+        }
+        return true;
+    }
+
+    /**
+     * Deletes the least recently used files that are not linked into a model directory until the
+     * store is within its maximum size.
+     */
+    public synchronized void gc() {
+        if (!root.isDirectory()) {
+            return;
+        }
+
+        List<File> files = new ArrayList<>();
+        long size = 0;
+        for (File file : FileUtils.listFiles(root, null, true)) {
+            if (file.getName().length() == DIGEST_LENGTH) {
+                files.add(file);
+                size += file.length();
+            }
+        }
+        if (size <= maxSize) {
+            return;
+        }
+
+        files.sort(Comparator.comparingLong(File::lastModified));
+        for (File file : files) {
+            if (size <= maxSize) {
+                break;
+            }
+            if (getLinkCount(file) > 1) {
+                continue;
+            }
+            long length = file.length();
+            if (file.delete()) {
+                size -= length;
+            }
+        }
+        if (size > maxSize) {
+            logger.info(
+                    "Content store {} uses {} bytes, files in use by models are not deleted.",
+                    root,
+                    size);
+        }
+    }
+
+    private static void touch(File file) {
+        // the modification time orders the files for gc, failing to update it is not fatal
+        if (!file.setLastModified(System.currentTimeMillis())) {
+            logger.warn("Failed to update modification time of stored file: {}", file);
+        }
+    }
+
+    private File getFile(String digest) {
+        if (digest.length() != DIGEST_LENGTH || !digest.matches("[0-9a-f]+")) {
+            throw new IllegalArgumentException("Invalid SHA-256 digest: " + digest);
+        }
+        return new File(new File(root, digest.substring(0, 2)), digest);
+    }
+
+    private static int getLinkCount(File file) {
+        try {
+            return (Integer) Files.getAttribute(file.toPath(), "unix:nlink");
+        } catch (UnsupportedOperationException | IllegalArgumentException | IOException e) {
+            // files are copied instead of linked on such file systems
+            return 1;
+        }
+    }
+}
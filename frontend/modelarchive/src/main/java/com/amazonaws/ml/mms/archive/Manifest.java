@@ -13,7 +13,9 @@
 package com.amazonaws.ml.mms.archive;
 
 import com.google.gson.annotations.SerializedName;
+import java.util.Collections;
 import java.util.LinkedHashMap;
+import java.util.List;
 import java.util.Map;
 
 public class Manifest {
@@ -27,6 +29,7 @@ public class Manifest {
     private Engine engine;
     private Model model;
     private Publisher publisher;
+    private Performance performance;
 
     public Manifest() {
         specificationVersion = "1.0";
@@ -109,6 +112,14 @@ public class Manifest {
         this.publisher = publisher;
     }
 
+    public Performance getPerformance() {
+        return performance;
+    }
+
+    public void setPerformance(Performance performance) {
+        this.performance = performance;
+    }
+
     public static final class Publisher {
 
         private String author;
@@ -157,6 +168,78 @@ public class Manifest {
         }
     }
 
+    public static final class Performance {
+
+        private List<Integer> batchSizes;
+        private Integer maxBatchDelay;
+        private Integer workers;
+        private Integer threadsPerWorker;
+        private Integer warmupSamples;
+        private Integer memoryEstimate;
+
+        public Performance() {}
+
+        public List<Integer> getBatchSizes() {
+            return batchSizes;
+        }
+
+        public void setBatchSizes(List<Integer> batchSizes) {
+            this.batchSizes = batchSizes;
+        }
+
+        /**
+         * Returns the largest preferred batch size, or 0 if the model has no batch size hint.
+         *
+         * @return the batch size
+         */
+        public int getBatchSize() {
+            if (batchSizes == null || batchSizes.isEmpty()) {
+                return 0;
+            }
+            return Collections.max(batchSizes);
+        }
+
+        public Integer getMaxBatchDelay() {
+            return maxBatchDelay;
+        }
+
+        public void setMaxBatchDelay(Integer maxBatchDelay) {
+            this.maxBatchDelay = maxBatchDelay;
+        }
+
+        public Integer getWorkers() {
+            return workers;
+        }
+
+        public void setWorkers(Integer workers) {
+            this.workers = workers;
+        }
+
+        public Integer getThreadsPerWorker() {
+            return threadsPerWorker;
+        }
+
+        public void setThreadsPerWorker(Integer threadsPerWorker) {
+            this.threadsPerWorker = threadsPerWorker;
+        }
+
+        public Integer getWarmupSamples() {
+            return warmupSamples;
+        }
+
+        public void setWarmupSamples(Integer warmupSamples) {
+            this.warmupSamples = warmupSamples;
+        }
+
+        public Integer getMemoryEstimate() {
+            return memoryEstimate;
+        }
+
+        public void setMemoryEstimate(Integer memoryEstimate) {
+            this.memoryEstimate = memoryEstimate;
+        }
+    }
+
     public static final class Model {
 
         private String modelName;
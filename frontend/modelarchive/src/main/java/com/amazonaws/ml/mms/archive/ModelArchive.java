@@ -14,6 +14,7 @@ package com.amazonaws.ml.mms.archive;
 
 import com.google.gson.Gson;
 import com.google.gson.GsonBuilder;
+import com.google.gson.JsonElement;
 import com.google.gson.JsonObject;
 import com.google.gson.JsonParseException;
 import com.google.gson.JsonParser;
@@ -34,6 +35,7 @@ import java.security.DigestInputStream;
 import java.security.MessageDigest;
 import java.security.NoSuchAlgorithmException;
 import java.util.Enumeration;
+import java.util.Map;
 import java.util.regex.Pattern;
 import java.util.zip.ZipEntry;
 import java.util.zip.ZipFile;
@@ -54,6 +56,11 @@ public class ModelArchive {
 
     private static final String MANIFEST_FILE = "MANIFEST.json";
 
+    private static final long DEFAULT_CONTENT_STORE_SIZE = 10L * 1024 * 1024 * 1024;
+
+    private static volatile ContentStore contentStore =
+            new ContentStore(getContentStoreDir(), DEFAULT_CONTENT_STORE_SIZE);
+
     private Manifest manifest;
     private String url;
     private File modelDir;
@@ -70,6 +77,7 @@ public class ModelArchive {
             throws ModelException, IOException {
         if (URL_PATTERN.matcher(url).matches()) {
             File modelDir = download(url);
+            restoreBaseFiles(modelDir);
             return load(url, modelDir, true);
         }
 
@@ -86,14 +94,31 @@ public class ModelArchive {
             throw new ModelNotFoundException("Model not found in model store: " + url);
         }
         if (modelLocation.isFile()) {
-            try (InputStream is = new FileInputStream(modelLocation)) {
-                File unzipDir = unzip(is, null);
-                return load(url, unzipDir, true);
+            File unzipDir = extract(modelLocation);
+            if (unzipDir == null) {
+                try (InputStream is = new FileInputStream(modelLocation)) {
+                    unzipDir = unzip(is, null);
+                }
+                restoreBaseFiles(unzipDir);
             }
+            return load(url, unzipDir, true);
         }
         return load(url, modelLocation, false);
     }
 
+    /**
+     * Configures the content store that model files are extracted into.
+     *
+     * @param maxSize the size in bytes above which unused files are deleted, 0 disables the store
+     */
+    public static void initContentStore(long maxSize) {
+        if (maxSize > 0) {
+            contentStore = new ContentStore(getContentStoreDir(), maxSize);
+        } else {
+            contentStore = null;
+        }
+    }
+
     public static void migrate(File legacyModelFile, File destination)
             throws InvalidModelException, IOException {
         boolean failed = true;
@@ -281,7 +306,8 @@ public class ModelArchive {
         } catch (NoSuchAlgorithmException e) {
             throw new AssertionError(e);
         }
-        ZipUtils.unzip(new DigestInputStream(is, md), tmp);
+        ContentStore store = contentStore;
+        ZipUtils.unzip(new DigestInputStream(is, md), tmp, store);
         if (eTag == null) {
             eTag = Hex.toHexString(md.digest());
         }
@@ -293,10 +319,210 @@ public class ModelArchive {
         }
 
         FileUtils.moveDirectory(tmp, dir);
+        if (store != null) {
+            store.gc();
+        }
 
         return dir;
     }
 
+    /**
+     * Extracts a model archive whose manifest has the SHA-256 digests of its files through the
+     * content store. The model directory is named after the digest of the manifest, so an archive
+     * that was already extracted is not read again, and files found in the store are hard-linked
+     * instead of being extracted.
+     *
+     * @param file the model archive
+     * @return the model directory, or null if the archive has no file digests
+     */
+    private static File extract(File file) throws InvalidModelException, IOException {
+        ContentStore store = contentStore;
+        if (store == null) {
+            return null;
+        }
+
+        try (ZipFile zip = new ZipFile(file)) {
+            ZipEntry manifestEntry = zip.getEntry("MAR-INF/" + MANIFEST_FILE);
+            if (manifestEntry == null) {
+                return null;
+            }
+            byte[] manifest;
+            try (InputStream is = zip.getInputStream(manifestEntry)) {
+                manifest = IOUtils.toByteArray(is);
+            }
+            JsonObject files;
+            try {
+                String text = new String(manifest, StandardCharsets.UTF_8);
+                JsonObject json = (JsonObject) new JsonParser().parse(text);
+                files = json.getAsJsonObject("files");
+            } catch (JsonParseException | ClassCastException e) {
+                throw new InvalidModelException("Failed to parse manifest file.", e);
+            }
+            if (files == null) {
+                return null;
+            }
+
+            String digest = Hex.toHexString(ContentStore.newDigest().digest(manifest));
+            File modelDir = new File(FileUtils.getTempDirectory(), "models");
+            File dir = new File(modelDir, digest);
+            if (dir.exists()) {
+                logger.info("model folder already exists: {}", digest);
+                return dir;
+            }
+
+            File tmp = File.createTempFile("model", ".extract");
+            FileUtils.forceDelete(tmp);
+            FileUtils.forceMkdir(tmp);
+            try {
+                Enumeration<? extends ZipEntry> en = zip.entries();
+                while (en.hasMoreElements()) {
+                    ZipEntry entry = en.nextElement();
+                    String name = entry.getName();
+                    if (name.contains("..")) {
+                        throw new InvalidModelException("Relative path is not allowed: " + name);
+                    }
+                    File dest = new File(tmp, name);
+                    if (entry.isDirectory()) {
+                        FileUtils.forceMkdir(dest);
+                        continue;
+                    }
+
+                    String expected = getFileDigest(files, name);
+                    if (expected != null && store.link(expected, dest)) {
+                        continue;
+                    }
+                    String actual;
+                    try (InputStream is = zip.getInputStream(entry)) {
+                        actual = store.add(is);
+                    }
+                    if (expected != null && !expected.equals(actual)) {
+                        throw new InvalidModelException("Corrupted file in model archive: " + name);
+                    }
+                    if (!store.link(actual, dest)) {
+                        throw new IOException("File removed from content store: " + actual);
+                    }
+                }
+
+                restoreBaseFiles(tmp);
+                if (dir.exists()) {
+                    // extracted concurrently
+                    return dir;
+                }
+                FileUtils.moveDirectory(tmp, dir);
+            } finally {
+                FileUtils.deleteQuietly(tmp);
+            }
+            store.gc();
+            return dir;
+        }
+    }
+
+    /**
+     * Adds the files of a delta model archive that did not change since its base archive. They are
+     * linked from the content store, or copied from the model directory of the base archive.
+     *
+     * @param dir the extracted model directory
+     * @throws InvalidModelException if the base archive was not extracted before
+     */
+    private static void restoreBaseFiles(File dir) throws InvalidModelException, IOException {
+        File manifestFile = new File(dir, "MAR-INF/" + MANIFEST_FILE);
+        if (!manifestFile.exists()) {
+            return;
+        }
+        JsonObject json = readFile(manifestFile, JsonObject.class);
+        JsonElement base = json.get("baseArchive");
+        if (base == null) {
+            return;
+        }
+
+        JsonElement files = json.get("files");
+        String baseDigest = base.isJsonPrimitive() ? base.getAsString() : "";
+        if (files == null || !files.isJsonObject() || !baseDigest.matches("[0-9a-f]{64}")) {
+            throw new InvalidModelException("Invalid delta model archive manifest.");
+        }
+        File baseDir = findBaseDir(baseDigest);
+        ContentStore store = contentStore;
+        for (Map.Entry<String, JsonElement> entry : files.getAsJsonObject().entrySet()) {
+            String name = entry.getKey();
+            if (name.contains("..")) {
+                throw new InvalidModelException("Relative path is not allowed: " + name);
+            }
+            File dest = new File(dir, name);
+            if (dest.exists()) {
+                continue;
+            }
+            String digest = getFileDigest(files.getAsJsonObject(), name);
+            if (store != null && store.link(digest, dest)) {
+                continue;
+            }
+            File baseFile = baseDir == null ? null : new File(baseDir, name);
+            if (baseFile == null || !baseFile.isFile()) {
+                throw new InvalidModelException(
+                        "File "
+                                + name
+                                + " of delta model archive not found, register its base archive "
+                                + baseDigest
+                                + " first.");
+            }
+            FileUtils.copyFile(baseFile, dest);
+        }
+    }
+
+    /**
+     * Finds the model directory of the base archive of a delta archive. Archives extracted through
+     * the content store are named after the digest of their manifest, the others after their eTag
+     * or the digest of the archive, so their manifests are compared with the digest.
+     *
+     * @param baseDigest the SHA-256 digest of the manifest of the base archive
+     * @return the model directory, or null if the base archive was not extracted
+     */
+    private static File findBaseDir(String baseDigest) throws IOException {
+        File modelDir = new File(FileUtils.getTempDirectory(), "models");
+        File baseDir = new File(modelDir, baseDigest);
+        if (baseDir.isDirectory()) {
+            return baseDir;
+        }
+        File[] dirs = modelDir.listFiles();
+        if (dirs == null) {
+            return null;
+        }
+        for (File dir : dirs) {
+            File manifestFile = new File(dir, "MAR-INF/" + MANIFEST_FILE);
+            if (!manifestFile.isFile()) {
+                continue;
+            }
+            byte[] manifest = FileUtils.readFileToByteArray(manifestFile);
+            if (baseDigest.equals(Hex.toHexString(ContentStore.newDigest().digest(manifest)))) {
+                return dir;
+            }
+        }
+        return null;
+    }
+
+    private static String getFileDigest(JsonObject files, String name)
+            throws InvalidModelException {
+        JsonElement file = files.get(name);
+        if (file == null) {
+            return null;
+        }
+        if (!file.isJsonObject()) {
+            throw new InvalidModelException("Invalid digest of file: " + name);
+        }
+        JsonElement sha256 = file.getAsJsonObject().get("sha256");
+        if (sha256 == null || !sha256.isJsonPrimitive()) {
+            throw new InvalidModelException("Missing SHA-256 digest of file: " + name);
+        }
+        String digest = sha256.getAsString().toLowerCase();
+        if (!digest.matches("[0-9a-f]{64}")) {
+            throw new InvalidModelException("Invalid SHA-256 digest of file: " + name);
+        }
+        return digest;
+    }
+
+    private static File getContentStoreDir() {
+        return new File(FileUtils.getTempDirectory(), "models/.store");
+    }
+
     public void validate() throws InvalidModelException {
         Manifest.Model model = manifest.getModel();
         try {
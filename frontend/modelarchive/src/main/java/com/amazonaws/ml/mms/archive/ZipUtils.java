@@ -44,6 +44,19 @@ public final class ZipUtils {
     }
 
     public static void unzip(InputStream is, File dest) throws IOException {
+        unzip(is, dest, null);
+    }
+
+    /**
+     * Extracts a zip stream. With a content store, the files are added to the store and linked into
+     * the destination directory.
+     *
+     * @param is the zip stream
+     * @param dest the destination directory
+     * @param store the content store, or null
+     * @throws IOException if the stream cannot be extracted
+     */
+    public static void unzip(InputStream is, File dest, ContentStore store) throws IOException {
         try (ZipInputStream zis = new ZipInputStream(is)) {
             ZipEntry entry;
             while ((entry = zis.getNextEntry()) != null) {
@@ -51,6 +64,11 @@ public final class ZipUtils {
                 File file = new File(dest, name);
                 if (entry.isDirectory()) {
                     FileUtils.forceMkdir(file);
+                } else if (store != null) {
+                    String digest = store.add(zis);
+                    if (!store.link(digest, file)) {
+                        throw new IOException("File removed from content store: " + digest);
+                    }
                 } else {
                     File parentFile = file.getParentFile();
                     FileUtils.forceMkdir(parentFile);
@@ -0,0 +1,62 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.archive;
+
+import java.io.ByteArrayInputStream;
+import java.io.File;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import org.apache.commons.io.FileUtils;
+import org.testng.Assert;
+import org.testng.annotations.BeforeMethod;
+import org.testng.annotations.Test;
+
+public class ContentStoreTest {
+
+    private File root = new File("build/tmp/test/store");
+    private File modelDir = new File("build/tmp/test/store-model");
+
+    @BeforeMethod
+    public void beforeMethod() {
+        FileUtils.deleteQuietly(root);
+        FileUtils.deleteQuietly(modelDir);
+    }
+
+    @Test
+    public void testAddAndLink() throws IOException {
+        ContentStore store = new ContentStore(root, 1024);
+        byte[] content = "synset".getBytes(StandardCharsets.UTF_8);
+        String digest = store.add(new ByteArrayInputStream(content));
+        Assert.assertEquals(digest, Hex.toHexString(ContentStore.newDigest().digest(content)));
+        Assert.assertEquals(store.add(new ByteArrayInputStream(content)), digest);
+
+        File file = new File(modelDir, "sub/synset.txt");
+        Assert.assertTrue(store.link(digest, file));
+        Assert.assertEquals(FileUtils.readFileToByteArray(file), content);
+
+        String missing = Hex.toHexString(ContentStore.newDigest().digest(new byte[0]));
+        Assert.assertFalse(store.link(missing, new File(modelDir, "empty.txt")));
+    }
+
+    @Test
+    public void testGc() throws IOException {
+        ContentStore store = new ContentStore(root, 150);
+        String used = store.add(new ByteArrayInputStream(new byte[100]));
+        Assert.assertTrue(store.link(used, new File(modelDir, "used.params")));
+        String unused = store.add(new ByteArrayInputStream(new byte[101]));
+
+        store.gc();
+        Assert.assertTrue(store.link(used, new File(modelDir, "used-again.params")));
+        Assert.assertFalse(store.link(unused, new File(modelDir, "unused.params")));
+    }
+}
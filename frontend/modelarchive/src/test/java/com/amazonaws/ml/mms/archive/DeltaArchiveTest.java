@@ -0,0 +1,98 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.archive;
+
+import java.io.File;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.util.zip.ZipEntry;
+import java.util.zip.ZipOutputStream;
+import org.apache.commons.io.FileUtils;
+import org.testng.Assert;
+import org.testng.annotations.AfterClass;
+import org.testng.annotations.BeforeClass;
+import org.testng.annotations.Test;
+
+public class DeltaArchiveTest {
+
+    private File modelStore = new File("build/tmp/test/delta");
+
+    @BeforeClass
+    public void beforeClass() {
+        FileUtils.deleteQuietly(modelStore);
+        FileUtils.deleteQuietly(new File(FileUtils.getTempDirectory(), "models"));
+    }
+
+    @AfterClass
+    public void afterClass() {
+        ModelArchive.initContentStore(10L * 1024 * 1024 * 1024);
+    }
+
+    @Test
+    public void testDeltaOfArchiveExtractedWithoutContentStore()
+            throws ModelException, IOException {
+        ModelArchive.initContentStore(0);
+        byte[] synset = "cat\ndog\n".getBytes(StandardCharsets.UTF_8);
+        byte[] params = "params-v1".getBytes(StandardCharsets.UTF_8);
+        String baseManifest =
+                "{\"model\": {\"modelName\": \"delta\", \"handler\": \"service:handle\"}, "
+                        + "\"files\": {\"synset.txt\": {\"sha256\": \""
+                        + digest(synset)
+                        + "\"}, \"model.params\": {\"sha256\": \""
+                        + digest(params)
+                        + "\"}}}";
+        writeArchive("base.mar", baseManifest, synset, params);
+
+        byte[] newParams = "params-v2".getBytes(StandardCharsets.UTF_8);
+        String deltaManifest =
+                "{\"model\": {\"modelName\": \"delta\", \"handler\": \"service:handle\"}, "
+                        + "\"baseArchive\": \""
+                        + digest(baseManifest.getBytes(StandardCharsets.UTF_8))
+                        + "\", \"files\": {\"synset.txt\": {\"sha256\": \""
+                        + digest(synset)
+                        + "\"}, \"model.params\": {\"sha256\": \""
+                        + digest(newParams)
+                        + "\"}}}";
+        writeArchive("delta.mar", deltaManifest, null, newParams);
+
+        // the base directory is named after the digest of the archive, not of its manifest
+        ModelArchive.downloadModel(modelStore.getPath(), "base.mar");
+        ModelArchive archive = ModelArchive.downloadModel(modelStore.getPath(), "delta.mar");
+
+        File modelDir = archive.getModelDir();
+        Assert.assertEquals(FileUtils.readFileToByteArray(new File(modelDir, "synset.txt")), synset);
+        Assert.assertEquals(
+                FileUtils.readFileToByteArray(new File(modelDir, "model.params")), newParams);
+    }
+
+    private void writeArchive(String name, String manifest, byte[] synset, byte[] params)
+            throws IOException {
+        FileUtils.forceMkdir(modelStore);
+        try (ZipOutputStream zos =
+                new ZipOutputStream(new FileOutputStream(new File(modelStore, name)))) {
+            if (synset != null) {
+                zos.putNextEntry(new ZipEntry("synset.txt"));
+                zos.write(synset);
+            }
+            zos.putNextEntry(new ZipEntry("model.params"));
+            zos.write(params);
+            zos.putNextEntry(new ZipEntry("MAR-INF/MANIFEST.json"));
+            zos.write(manifest.getBytes(StandardCharsets.UTF_8));
+        }
+    }
+
+    private static String digest(byte[] content) {
+        return Hex.toHexString(ContentStore.newDigest().digest(content));
+    }
+}
@@ -142,7 +142,9 @@ public class ModelServer {
                         logger.debug("Loading models from model store: {}", file.getName());
 
                         ModelArchive archive = modelManager.registerModel(file.getName());
-                        modelManager.updateModel(archive.getModelName(), workers, workers);
+                        String modelName = archive.getModelName();
+                        int modelWorkers = modelManager.getDefaultWorkers(modelName, workers);
+                        modelManager.updateModel(modelName, modelWorkers, modelWorkers);
                     } catch (ModelException | IOException e) {
                         logger.warn("Failed to load model: " + file.getAbsolutePath(), e);
                     }
@@ -170,8 +172,10 @@ public class ModelServer {
                 logger.info("Loading initial models: {}", url);
 
                 ModelArchive archive =
-                        modelManager.registerModel(url, modelName, null, null, 1, 100);
-                modelManager.updateModel(archive.getModelName(), workers, workers);
+                        modelManager.registerModel(url, modelName, null, null, -1, -1);
+                modelName = archive.getModelName();
+                int modelWorkers = modelManager.getDefaultWorkers(modelName, workers);
+                modelManager.updateModel(modelName, modelWorkers, modelWorkers);
             } catch (ModelException | IOException e) {
                 logger.warn("Failed to load model: " + url, e);
             }
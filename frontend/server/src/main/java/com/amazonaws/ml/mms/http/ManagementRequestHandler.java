@@ -67,6 +67,17 @@ public class ManagementRequestHandler extends HttpRequestHandler {
             throw new MethodNotAllowedException();
         }
 
+        if (segments.length > 3) {
+            if (!"profile".equals(segments[3])) {
+                throw new ResourceNotFoundException();
+            }
+            if (!HttpMethod.POST.equals(method)) {
+                throw new MethodNotAllowedException();
+            }
+            handleProfileModel(ctx, decoder, segments[2]);
+            return;
+        }
+
         if (HttpMethod.GET.equals(method)) {
             handleDescribeModel(ctx, segments[2]);
         } else if (HttpMethod.PUT.equals(method)) {
@@ -162,9 +173,10 @@ public class ManagementRequestHandler extends HttpRequestHandler {
         String modelName = NettyUtils.getParameter(decoder, "model_name", null);
         String runtime = NettyUtils.getParameter(decoder, "runtime", null);
         String handler = NettyUtils.getParameter(decoder, "handler", null);
-        int batchSize = NettyUtils.getIntParameter(decoder, "batch_size", 1);
-        int maxBatchDelay = NettyUtils.getIntParameter(decoder, "max_batch_delay", 100);
-        int initialWorkers = NettyUtils.getIntParameter(decoder, "initial_workers", 0);
+        // Unset values default to the performance hints of the model archive
+        int batchSize = NettyUtils.getIntParameter(decoder, "batch_size", -1);
+        int maxBatchDelay = NettyUtils.getIntParameter(decoder, "max_batch_delay", -1);
+        int initialWorkers = NettyUtils.getIntParameter(decoder, "initial_workers", -1);
         boolean synchronous =
                 Boolean.parseBoolean(NettyUtils.getParameter(decoder, "synchronous", null));
         Manifest.RuntimeType runtimeType = null;
@@ -187,6 +199,9 @@ public class ManagementRequestHandler extends HttpRequestHandler {
         }
 
         modelName = archive.getModelName();
+        if (initialWorkers < 0) {
+            initialWorkers = modelManager.getDefaultWorkers(modelName, 0);
+        }
 
         final String msg = "Model \"" + modelName + "\" registered";
         if (initialWorkers <= 0) {
@@ -234,6 +249,35 @@ public class ManagementRequestHandler extends HttpRequestHandler {
         updateModelWorkers(ctx, modelName, minWorkers, maxWorkers, synchronous, null);
     }
 
+    private void handleProfileModel(
+            ChannelHandlerContext ctx, QueryStringDecoder decoder, String modelName)
+            throws ModelNotFoundException {
+        int batches = NettyUtils.getIntParameter(decoder, "batches", 10);
+        if (batches <= 0) {
+            throw new BadRequestException("batches must be greater than 0.");
+        }
+        String profiler = NettyUtils.getParameter(decoder, "profiler", "mxnet");
+        if (!"mxnet".equals(profiler) && !"python".equals(profiler)) {
+            throw new BadRequestException("profiler must be mxnet or python.");
+        }
+
+        ModelManager modelManager = ModelManager.getInstance();
+        if (!modelManager.getModels().containsKey(modelName)) {
+            throw new ModelNotFoundException("Model not found: " + modelName);
+        }
+
+        int workers = modelManager.profileModel(modelName, batches, profiler);
+        String msg =
+                "Profiling next "
+                        + batches
+                        + " batches of model \""
+                        + modelName
+                        + "\" on "
+                        + workers
+                        + " workers.";
+        NettyUtils.sendJsonResponse(ctx, new StatusResponse(msg));
+    }
+
     private void updateModelWorkers(
             final ChannelHandlerContext ctx,
             final String modelName,
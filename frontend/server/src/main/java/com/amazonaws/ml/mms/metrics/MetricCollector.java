@@ -34,6 +34,8 @@ public class MetricCollector implements Runnable {
     private static final org.apache.log4j.Logger loggerMetrics =
             org.apache.log4j.Logger.getLogger(ConfigManager.MMS_METRICS_LOGGER);
     private ConfigManager configManager;
+    private Process process;
+    private BufferedReader reader;
 
     public MetricCollector(ConfigManager configManager) {
         this.configManager = configManager;
@@ -42,96 +44,132 @@ public class MetricCollector implements Runnable {
     @Override
     public void run() {
         try {
-            // Collect System level Metrics
-            String[] args = new String[2];
-            args[0] = configManager.getPythonExecutable();
-            args[1] = "mms/metrics/metric_collector.py";
-            File workingDir = new File(configManager.getModelServerHome());
-
-            String pythonPath = System.getenv("PYTHONPATH");
-            String pythonEnv;
-            if (pythonPath == null || pythonPath.isEmpty()) {
-                pythonEnv = "PYTHONPATH=" + workingDir.getAbsolutePath();
-            } else {
-                pythonEnv =
-                        "PYTHONPATH="
-                                + pythonPath
-                                + File.pathSeparatorChar
-                                + workingDir.getAbsolutePath();
+            if (process == null || !process.isAlive()) {
+                startCollector();
             }
-            // sbin added for macs for python sysctl pythonpath
-            StringBuilder path = new StringBuilder();
-            path.append("PATH=").append(System.getenv("PATH"));
-            String osName = System.getProperty("os.name");
-            if (osName.startsWith("Mac OS X")) {
-                path.append(File.pathSeparatorChar).append("/sbin/");
-            }
-            String[] env = {pythonEnv, path.toString()};
-            final Process p = Runtime.getRuntime().exec(args, env, workingDir);
 
+            // The collector is resident, every line of workers triggers one collection
             ModelManager modelManager = ModelManager.getInstance();
             Map<Integer, WorkerThread> workerMap = modelManager.getWorkers();
-            try (OutputStream os = p.getOutputStream()) {
-                writeWorkerPids(workerMap, os);
-            }
-
-            new Thread(
-                            () -> {
-                                try {
-                                    String error =
-                                            IOUtils.toString(
-                                                    p.getErrorStream(), StandardCharsets.UTF_8);
-                                    if (!error.isEmpty()) {
-                                        logger.error(error);
-                                    }
-                                } catch (IOException e) {
-                                    logger.error("", e);
-                                }
-                            })
-                    .start();
+            OutputStream os = process.getOutputStream();
+            writeWorkers(workerMap, os);
+            os.flush();
 
+            // Collect System level Metrics
             MetricManager metricManager = MetricManager.getInstance();
-            try (BufferedReader reader =
-                    new BufferedReader(
-                            new InputStreamReader(p.getInputStream(), StandardCharsets.UTF_8))) {
-                List<Metric> metricsSystem = new ArrayList<>();
-                metricManager.setMetrics(metricsSystem);
-
-                String line;
-                while ((line = reader.readLine()) != null) {
-                    if (line.isEmpty()) {
-                        break;
-                    }
-                    Metric metric = Metric.parse(line);
-                    if (metric == null) {
-                        logger.warn("Parse metrics failed: " + line);
-                    } else {
-                        loggerMetrics.info(metric);
-                        metricsSystem.add(metric);
-                    }
+            List<Metric> metricsSystem = new ArrayList<>();
+            String line;
+            while ((line = reader.readLine()) != null) {
+                if (line.isEmpty()) {
+                    break;
                 }
+                Metric metric = Metric.parse(line);
+                if (metric == null) {
+                    logger.warn("Parse metrics failed: " + line);
+                } else {
+                    loggerMetrics.info(metric);
+                    metricsSystem.add(metric);
+                }
+            }
+            metricManager.setMetrics(metricsSystem);
 
-                // Collect process level metrics
-                while ((line = reader.readLine()) != null) {
-                    String[] tokens = line.split(":");
-                    if (tokens.length != 2) {
-                        continue;
-                    }
+            // Collect process level metrics
+            while ((line = reader.readLine()) != null) {
+                if (line.isEmpty()) {
+                    break;
+                }
+                String[] tokens = line.split(":");
+                if (tokens.length != 2) {
+                    continue;
+                }
 
-                    Integer pid = Integer.valueOf(tokens[0]);
-                    WorkerThread worker = workerMap.get(pid);
+                WorkerThread worker = workerMap.get(Integer.valueOf(tokens[0]));
+                if (worker != null) {
                     worker.setMemory(Long.parseLong(tokens[1]));
                 }
             }
-        } catch (IOException e) {
+
+            if (line == null) {
+                logger.warn("Metric collector exited, restarting it at the next interval.");
+                stopCollector();
+            }
+        } catch (IOException | NumberFormatException e) {
             logger.error("", e);
+            stopCollector();
+        }
+    }
+
+    private void startCollector() throws IOException {
+        List<String> argl = new ArrayList<>();
+        argl.add(configManager.getPythonExecutable());
+        argl.add("mms/metrics/metric_collector.py");
+        String prometheusDir = configManager.getPrometheusDir();
+        if (prometheusDir != null) {
+            argl.add("--prometheus-dir");
+            argl.add(prometheusDir);
+        }
+        String[] args = argl.toArray(new String[0]); // NOPMD
+        File workingDir = new File(configManager.getModelServerHome());
+
+        String pythonPath = System.getenv("PYTHONPATH");
+        String pythonEnv;
+        if (pythonPath == null || pythonPath.isEmpty()) {
+            pythonEnv = "PYTHONPATH=" + workingDir.getAbsolutePath();
+        } else {
+            pythonEnv =
+                    "PYTHONPATH="
+                            + pythonPath
+                            + File.pathSeparatorChar
+                            + workingDir.getAbsolutePath();
+        }
+        // sbin added for macs for python sysctl pythonpath
+        StringBuilder path = new StringBuilder();
+        path.append("PATH=").append(System.getenv("PATH"));
+        String osName = System.getProperty("os.name");
+        if (osName.startsWith("Mac OS X")) {
+            path.append(File.pathSeparatorChar).append("/sbin/");
+        }
+        String[] env = {pythonEnv, path.toString()};
+        final Process p = Runtime.getRuntime().exec(args, env, workingDir);
+
+        Thread errorReader =
+                new Thread(
+                        () -> {
+                            try (BufferedReader err =
+                                    new BufferedReader(
+                                            new InputStreamReader(
+                                                    p.getErrorStream(),
+                                                    StandardCharsets.UTF_8))) {
+                                String error;
+                                while ((error = err.readLine()) != null) {
+                                    logger.error(error);
+                                }
+                            } catch (IOException e) {
+                                logger.error("", e);
+                            }
+                        });
+        errorReader.setDaemon(true);
+        errorReader.start();
+
+        process = p;
+        reader =
+                new BufferedReader(
+                        new InputStreamReader(p.getInputStream(), StandardCharsets.UTF_8));
+    }
+
+    private void stopCollector() {
+        if (process != null) {
+            process.destroy();
+            process = null;
+            reader = null;
         }
     }
 
-    private void writeWorkerPids(Map<Integer, WorkerThread> workerMap, OutputStream os)
+    private void writeWorkers(Map<Integer, WorkerThread> workerMap, OutputStream os)
             throws IOException {
         boolean first = true;
-        for (Integer pid : workerMap.keySet()) {
+        for (Map.Entry<Integer, WorkerThread> entry : workerMap.entrySet()) {
+            Integer pid = entry.getKey();
             if (pid < 0) {
                 logger.warn("worker pid is not available yet.");
                 continue;
@@ -141,7 +179,8 @@ public class MetricCollector implements Runnable {
             } else {
                 IOUtils.write(",", os, StandardCharsets.UTF_8);
             }
-            IOUtils.write(pid.toString(), os, StandardCharsets.UTF_8);
+            IOUtils.write(
+                    pid + ":" + entry.getValue().getModelName(), os, StandardCharsets.UTF_8);
         }
         os.write('\n');
     }
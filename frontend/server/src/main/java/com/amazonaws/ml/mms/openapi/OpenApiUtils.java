@@ -304,19 +304,22 @@ public final class OpenApiUtils {
         operation.addParameter(runtime);
         operation.addParameter(
                 new QueryParameter(
-                        "batch_size", "integer", "1", "Inference batch size, default: 1."));
+                        "batch_size",
+                        "integer",
+                        "1",
+                        "Inference batch size, default: the batch size hint of the model, or 1."));
         operation.addParameter(
                 new QueryParameter(
                         "max_batch_delay",
                         "integer",
                         "100",
-                        "Maximum delay for batch aggregation, default: 100."));
+                        "Maximum delay for batch aggregation, default: the max batch delay hint of the model, or 100."));
         operation.addParameter(
                 new QueryParameter(
                         "initial_worker",
                         "integer",
                         "0",
-                        "Number of initial workers, default: 0."));
+                        "Number of initial workers, default: the workers hint of the model, or 0."));
         operation.addParameter(
                 new QueryParameter(
                         "synchronous",
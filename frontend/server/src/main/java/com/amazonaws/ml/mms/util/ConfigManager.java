@@ -63,7 +63,14 @@ public final class ConfigManager {
     private static final String MAX_WORKERS = "max_workers";
     private static final String JOB_QUEUE_SIZE = "job_queue_size";
     private static final String NUMBER_OF_GPU = "number_of_gpu";
+    private static final String CPU_AFFINITY = "cpu_affinity";
+    private static final String CPUS_PER_WORKER = "cpus_per_worker";
+    private static final String DEFAULT_WORKERS_PER_MODEL = "default_workers_per_model";
+    private static final String PROFILE_DIR = "profile_dir";
     private static final String METRIC_TIME_INTERVAL = "metric_time_interval";
+    private static final String MODEL_METRICS_INTERVAL = "model_metrics_interval";
+    private static final String PROMETHEUS_DIR = "prometheus_dir";
+    private static final String MODEL_CACHE_SIZE = "model_cache_size";
 
     private static final String KEYSTORE = "keystore";
     private static final String KEYSTORE_PASS = "keystore_pass";
@@ -183,22 +190,59 @@ public final class ConfigManager {
         return getIntProperty(NUMBER_OF_GPU, 0);
     }
 
+    public boolean isCpuAffinity() {
+        return Boolean.parseBoolean(prop.getProperty(CPU_AFFINITY, "false"));
+    }
+
+    public int getCpusPerWorker() {
+        return getIntProperty(CPUS_PER_WORKER, 1);
+    }
+
     public int getDefaultWorkers() {
         if (isDebug()) {
             return 1;
         }
 
-        int workers = getNumberOfGpu();
+        int workers = getIntProperty(DEFAULT_WORKERS_PER_MODEL, 0);
+        if (workers > 0) {
+            return workers;
+        }
+
+        workers = getNumberOfGpu();
         if (workers == 0) {
             workers = Runtime.getRuntime().availableProcessors();
         }
         return workers;
     }
 
+    public String getProfileDir() {
+        String profileDir = prop.getProperty(PROFILE_DIR);
+        if (profileDir == null) {
+            profileDir = System.getProperty("LOG_LOCATION");
+        }
+        return getCanonicalPath(profileDir);
+    }
+
     public int getMetricTimeInterval() {
         return getIntProperty(METRIC_TIME_INTERVAL, 60);
     }
 
+    public int getModelMetricsInterval() {
+        return getIntProperty(MODEL_METRICS_INTERVAL, 60);
+    }
+
+    public String getPrometheusDir() {
+        String prometheusDir = prop.getProperty(PROMETHEUS_DIR);
+        if (prometheusDir == null) {
+            return null;
+        }
+        return getCanonicalPath(prometheusDir);
+    }
+
+    public long getModelCacheSize() {
+        return getIntProperty(MODEL_CACHE_SIZE, 10240) * 1024L * 1024;
+    }
+
     public String getModelServerHome() {
         String mmsHome = System.getenv("MODEL_SERVER_HOME");
         if (mmsHome == null) {
@@ -347,6 +391,8 @@ public final class ConfigManager {
                 + getManagementAddress().toString()
                 + "\nNumber of GPUs: "
                 + getNumberOfGpu()
+                + "\nCPU affinity: "
+                + (isCpuAffinity() ? getCpusPerWorker() + " CPUs per worker" : "N/A")
                 + "\nModel Store: "
                 + (getModelStore() == null ? "N/A" : getModelStore())
                 + "\nInitial Models: "
@@ -16,6 +16,7 @@ import com.amazonaws.ml.mms.util.messages.BaseModelRequest;
 import com.amazonaws.ml.mms.util.messages.InputParameter;
 import com.amazonaws.ml.mms.util.messages.ModelInferenceRequest;
 import com.amazonaws.ml.mms.util.messages.ModelLoadModelRequest;
+import com.amazonaws.ml.mms.util.messages.ModelProfileRequest;
 import com.amazonaws.ml.mms.util.messages.RequestInput;
 import io.netty.buffer.ByteBuf;
 import io.netty.channel.ChannelHandler;
@@ -59,6 +60,13 @@ public class ModelRequestEncoder extends MessageToByteEncoder<BaseModelRequest>
                 encodeRequest(input, out);
             }
             out.writeInt(-1); // End of List
+        } else if (msg instanceof ModelProfileRequest) {
+            out.writeByte('P');
+
+            ModelProfileRequest request = (ModelProfileRequest) msg;
+            out.writeInt(request.getBatches());
+            encodeField(request.getProfileDir(), out);
+            encodeField(request.getProfiler(), out);
         }
     }
 
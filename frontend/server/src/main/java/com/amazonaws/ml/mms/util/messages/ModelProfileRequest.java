@@ -0,0 +1,45 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.util.messages;
+
+public class ModelProfileRequest extends BaseModelRequest {
+
+    /**
+     * ModelProfileRequest is a interface between frontend and backend to notify the backend to
+     * profile the next batches of a model.
+     */
+    private int batches;
+
+    private String profileDir;
+    private String profiler;
+
+    public ModelProfileRequest(
+            String modelName, int batches, String profileDir, String profiler) {
+        super(WorkerCommands.PROFILE, modelName);
+        this.batches = batches;
+        this.profileDir = profileDir;
+        this.profiler = profiler;
+    }
+
+    public int getBatches() {
+        return batches;
+    }
+
+    public String getProfileDir() {
+        return profileDir;
+    }
+
+    public String getProfiler() {
+        return profiler;
+    }
+}
@@ -10,7 +10,9 @@ public enum WorkerCommands {
     @SerializedName("unload")
     UNLOAD("unload"),
     @SerializedName("stats")
-    STATS("stats");
+    STATS("stats"),
+    @SerializedName("profile")
+    PROFILE("profile");
 
     private String command;
 
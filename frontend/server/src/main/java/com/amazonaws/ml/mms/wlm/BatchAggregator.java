@@ -15,9 +15,11 @@ package com.amazonaws.ml.mms.wlm;
 import com.amazonaws.ml.mms.util.messages.BaseModelRequest;
 import com.amazonaws.ml.mms.util.messages.ModelInferenceRequest;
 import com.amazonaws.ml.mms.util.messages.ModelLoadModelRequest;
+import com.amazonaws.ml.mms.util.messages.ModelProfileRequest;
 import com.amazonaws.ml.mms.util.messages.ModelWorkerResponse;
 import com.amazonaws.ml.mms.util.messages.Predictions;
 import com.amazonaws.ml.mms.util.messages.RequestInput;
+import com.amazonaws.ml.mms.util.messages.WorkerCommands;
 import java.nio.charset.StandardCharsets;
 import java.util.LinkedHashMap;
 import java.util.Map;
@@ -43,6 +45,13 @@ public class BatchAggregator {
         Job job = model.nextJob(threadName);
         if (job.isControlCmd()) {
             RequestInput input = job.getPayload();
+            if (job.getCmd() == WorkerCommands.PROFILE) {
+                int batches = Integer.parseInt(input.getStringParameter("batches"));
+                String profileDir = input.getStringParameter("profile_dir");
+                String profiler = input.getStringParameter("profiler");
+                return new ModelProfileRequest(
+                        model.getModelName(), batches, profileDir, profiler);
+            }
             int gpuId = -1;
             String gpu = input.getStringParameter("gpu");
             if (gpu != null) {
@@ -123,6 +132,10 @@ public class BatchAggregator {
     }
 
     public void sendError(BaseModelRequest message, String error) {
+        if (message instanceof ModelProfileRequest) {
+            logger.warn("Profile model failed: {}, error: {}", message.getModelName(), error);
+            return;
+        }
         if (message instanceof ModelLoadModelRequest) {
             logger.warn("Load model failed: {}, error: {}", message.getModelName(), error);
             return;
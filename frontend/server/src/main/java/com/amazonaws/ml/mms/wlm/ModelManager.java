@@ -20,11 +20,17 @@ import com.amazonaws.ml.mms.http.BadRequestException;
 import com.amazonaws.ml.mms.http.StatusResponse;
 import com.amazonaws.ml.mms.util.ConfigManager;
 import com.amazonaws.ml.mms.util.NettyUtils;
+import com.amazonaws.ml.mms.util.messages.InputParameter;
+import com.amazonaws.ml.mms.util.messages.RequestInput;
+import com.amazonaws.ml.mms.util.messages.WorkerCommands;
 import io.netty.channel.ChannelHandlerContext;
 import io.netty.handler.codec.http.HttpResponseStatus;
 import java.io.IOException;
+import java.lang.management.ManagementFactory;
+import java.lang.management.OperatingSystemMXBean;
 import java.util.List;
 import java.util.Map;
+import java.util.UUID;
 import java.util.concurrent.CompletableFuture;
 import java.util.concurrent.ConcurrentHashMap;
 import java.util.concurrent.Executors;
@@ -36,6 +42,9 @@ public final class ModelManager {
 
     private static final Logger logger = LoggerFactory.getLogger(ModelManager.class);
 
+    private static final int DEFAULT_BATCH_SIZE = 1;
+    private static final int DEFAULT_MAX_BATCH_DELAY = 100;
+
     private static ModelManager modelManager;
 
     private ConfigManager configManager;
@@ -55,6 +64,7 @@ public final class ModelManager {
     }
 
     public static void init(ConfigManager configManager, WorkLoadManager wlm) {
+        ModelArchive.initContentStore(configManager.getModelCacheSize());
         modelManager = new ModelManager(configManager, wlm);
     }
 
@@ -63,9 +73,13 @@ public final class ModelManager {
     }
 
     public ModelArchive registerModel(String url) throws ModelException, IOException {
-        return registerModel(url, null, null, null, 1, 100);
+        return registerModel(url, null, null, null, -1, -1);
     }
 
+    /**
+     * Registers a model archive. A batch size of 0 or less, or a negative max batch delay, defaults
+     * to the performance hints of the archive, or to a batch size of 1 and a delay of 100 ms.
+     */
     public ModelArchive registerModel(
             String url,
             String modelName,
@@ -90,6 +104,20 @@ public final class ModelManager {
 
         archive.validate();
 
+        Manifest.Performance performance = archive.getManifest().getPerformance();
+        if (batchSize <= 0) {
+            batchSize = DEFAULT_BATCH_SIZE;
+            if (performance != null && performance.getBatchSize() > 0) {
+                batchSize = performance.getBatchSize();
+            }
+        }
+        if (maxBatchDelay < 0) {
+            maxBatchDelay = DEFAULT_MAX_BATCH_DELAY;
+            if (performance != null && performance.getMaxBatchDelay() != null) {
+                maxBatchDelay = performance.getMaxBatchDelay();
+            }
+        }
+
         Model model = new Model(archive, configManager.getJobQueueSize());
         model.setBatchSize(batchSize);
         model.setMaxBatchDelay(maxBatchDelay);
@@ -117,6 +145,54 @@ public final class ModelManager {
         return true;
     }
 
+    /**
+     * Returns the number of workers of a registered model when none is requested: the workers
+     * performance hint of its archive, or the default number of workers, limited to the workers
+     * that fit in the physical memory of the host according to the memory estimate of the archive.
+     *
+     * @param modelName the name of the model
+     * @param defaultWorkers the number of workers of a model without performance hints
+     * @return the number of workers
+     */
+    public int getDefaultWorkers(String modelName, int defaultWorkers) {
+        Model model = models.get(modelName);
+        if (model == null) {
+            throw new AssertionError("Model not found: " + modelName);
+        }
+        Manifest.Performance performance = model.getModelArchive().getManifest().getPerformance();
+        if (performance == null) {
+            return defaultWorkers;
+        }
+
+        int workers = defaultWorkers;
+        if (performance.getWorkers() != null) {
+            workers = performance.getWorkers();
+        }
+        Integer memoryEstimate = performance.getMemoryEstimate();
+        long memory = getPhysicalMemory();
+        if (memoryEstimate != null && memoryEstimate > 0 && memory > 0 && workers > 1) {
+            int maxWorkers = (int) Math.max(1, memory / (memoryEstimate * 1024L * 1024));
+            if (workers > maxWorkers) {
+                logger.warn(
+                        "Model {} needs {} MB per worker, starting {} workers instead of {}.",
+                        modelName,
+                        memoryEstimate,
+                        maxWorkers,
+                        workers);
+                workers = maxWorkers;
+            }
+        }
+        return workers;
+    }
+
+    private static long getPhysicalMemory() {
+        OperatingSystemMXBean os = ManagementFactory.getOperatingSystemMXBean();
+        if (os instanceof com.sun.management.OperatingSystemMXBean) {
+            return ((com.sun.management.OperatingSystemMXBean) os).getTotalPhysicalMemorySize();
+        }
+        return 0;
+    }
+
     public CompletableFuture<Boolean> updateModel(
             String modelName, int minWorkers, int maxWorkers) {
         Model model = models.get(modelName);
@@ -129,6 +205,26 @@ public final class ModelManager {
         return wlm.modelChanged(model);
     }
 
+    public int profileModel(String modelName, int batches, String profiler) {
+        Model model = models.get(modelName);
+        if (model == null) {
+            throw new AssertionError("Model not found: " + modelName);
+        }
+
+        List<WorkerThread> workers = wlm.getWorkers(modelName);
+        for (WorkerThread worker : workers) {
+            RequestInput input = new RequestInput(UUID.randomUUID().toString());
+            input.addParameter(new InputParameter("batches", String.valueOf(batches)));
+            input.addParameter(new InputParameter("profile_dir", configManager.getProfileDir()));
+            input.addParameter(new InputParameter("profiler", profiler));
+            model.addJob(
+                    worker.getWorkerId(), new Job(null, modelName, WorkerCommands.PROFILE, input));
+        }
+        logger.info(
+                "Profiling next {} batches of model {} with {}.", batches, modelName, profiler);
+        return workers.size();
+    }
+
     public Map<String, Model> getModels() {
         return models;
     }
@@ -15,6 +15,7 @@ package com.amazonaws.ml.mms.wlm;
 import com.amazonaws.ml.mms.util.ConfigManager;
 import io.netty.channel.EventLoopGroup;
 import java.util.ArrayList;
+import java.util.BitSet;
 import java.util.Collections;
 import java.util.HashMap;
 import java.util.List;
@@ -34,12 +35,14 @@ public class WorkLoadManager {
     private EventLoopGroup backendGroup;
     private int port = 9000;
     private int gpuCounter;
+    private BitSet cpuSlots;
 
     public WorkLoadManager(ConfigManager configManager, EventLoopGroup backendGroup) {
         this.configManager = configManager;
         this.backendGroup = backendGroup;
         threadPool = Executors.newCachedThreadPool();
         workers = new ConcurrentHashMap<>();
+        cpuSlots = new BitSet();
     }
 
     public List<WorkerThread> getWorkers(String modelName) {
@@ -109,6 +112,7 @@ public class WorkLoadManager {
                     // TODO: kill unhealthy worker first.
                     WorkerThread thread = threads.remove(i);
                     thread.shutdown();
+                    releaseCpuSlot(thread.getCpuSlot());
                 }
                 future.complete(Boolean.TRUE);
             }
@@ -128,10 +132,21 @@ public class WorkLoadManager {
                     gpuCounter = 0;
                 }
             }
+            int cpuSlot = -1;
+            if (configManager.isCpuAffinity()) {
+                cpuSlot = acquireCpuSlot();
+            }
             BatchAggregator aggregator = new BatchAggregator(model);
             WorkerThread thread =
                     new WorkerThread(
-                            configManager, backendGroup, port, gpuId, model, aggregator, listener);
+                            configManager,
+                            backendGroup,
+                            port,
+                            gpuId,
+                            cpuSlot,
+                            model,
+                            aggregator,
+                            listener);
             threads.add(thread);
             threadPool.submit(thread);
             if (!configManager.isDebug()) {
@@ -140,6 +155,18 @@ public class WorkLoadManager {
         }
     }
 
+    private synchronized int acquireCpuSlot() {
+        int slot = cpuSlots.nextClearBit(0);
+        cpuSlots.set(slot);
+        return slot;
+    }
+
+    private synchronized void releaseCpuSlot(int slot) {
+        if (slot >= 0) {
+            cpuSlots.clear(slot);
+        }
+    }
+
     public void scheduleAsync(Runnable r) {
         threadPool.execute(r);
     }
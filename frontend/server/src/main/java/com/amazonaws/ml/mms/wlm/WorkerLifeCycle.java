@@ -44,10 +44,12 @@ public class WorkerLifeCycle {
     private CountDownLatch latch;
     private boolean success;
     private int port;
+    private int cpuSlot;
 
-    public WorkerLifeCycle(ConfigManager configManager, Model model) {
+    public WorkerLifeCycle(ConfigManager configManager, Model model, int cpuSlot) {
         this.configManager = configManager;
         this.model = model;
+        this.cpuSlot = cpuSlot;
     }
 
     private String[] getEnvString(String cwd, String modelPath) {
@@ -85,26 +87,43 @@ public class WorkerLifeCycle {
         }
 
         SocketAddress address = NettyUtils.getSocketAddress(port);
-        String[] args = new String[6];
+        ArrayList<String> argl = new ArrayList<>();
         Manifest.RuntimeType runtime = model.getModelArchive().getManifest().getRuntime();
         if (runtime == Manifest.RuntimeType.PYTHON) {
-            args[0] = configManager.getPythonExecutable();
+            argl.add(configManager.getPythonExecutable());
         } else {
-            args[0] = runtime.getValue();
+            argl.add(runtime.getValue());
         }
-        args[1] = new File(workingDir, "mms/model_service_worker.py").getAbsolutePath();
-        args[4] = "--sock-type";
+        argl.add(new File(workingDir, "mms/model_service_worker.py").getAbsolutePath());
 
         if (address instanceof DomainSocketAddress) {
-            args[5] = "unix";
-            args[2] = "--sock-name";
-            args[3] = ((DomainSocketAddress) address).path();
+            argl.add("--sock-name");
+            argl.add(((DomainSocketAddress) address).path());
+            argl.add("--sock-type");
+            argl.add("unix");
         } else {
-            args[5] = "tcp";
-            args[2] = "--port";
-            args[3] = String.valueOf(port);
+            argl.add("--port");
+            argl.add(String.valueOf(port));
+            argl.add("--sock-type");
+            argl.add("tcp");
         }
 
+        argl.add("--cpus-per-worker");
+        argl.add(String.valueOf(configManager.getCpusPerWorker()));
+        argl.add("--metrics-interval");
+        argl.add(String.valueOf(configManager.getModelMetricsInterval()));
+        String prometheusDir = configManager.getPrometheusDir();
+        if (prometheusDir != null) {
+            argl.add("--prometheus-dir");
+            argl.add(prometheusDir);
+        }
+        if (cpuSlot >= 0) {
+            argl.add("--cpu-slot");
+            argl.add(String.valueOf(cpuSlot));
+        }
+
+        String[] args = argl.toArray(new String[0]); // NOPMD
+
         String[] envp = getEnvString(workingDir.getAbsolutePath(), modelPath.getAbsolutePath());
 
         try {
@@ -65,6 +65,7 @@ public class WorkerThread implements Runnable {
     private WorkerStateListener listener;
     ArrayBlockingQueue<ModelWorkerResponse> replies;
     private int gpuId;
+    private int cpuSlot;
     private long memory;
     private long startTime;
     private Thread currentThread;
@@ -83,6 +84,7 @@ public class WorkerThread implements Runnable {
             EventLoopGroup backendEventGroup,
             int port,
             int gpuId,
+            int cpuSlot,
             Model model,
             BatchAggregator aggregator,
             WorkerStateListener listener) {
@@ -93,9 +95,10 @@ public class WorkerThread implements Runnable {
         this.model = model;
         this.aggregator = aggregator;
         this.gpuId = gpuId;
+        this.cpuSlot = cpuSlot;
         this.listener = listener;
         startTime = System.currentTimeMillis();
-        lifeCycle = new WorkerLifeCycle(configManager, model);
+        lifeCycle = new WorkerLifeCycle(configManager, model, cpuSlot);
         replies = new ArrayBlockingQueue<>(1);
     }
 
@@ -133,12 +136,16 @@ public class WorkerThread implements Runnable {
                         break;
                     case LOAD:
                         if (reply.getCode() == 200) {
+                            logger.info(reply.getMessage());
                             setState(WorkerState.WORKER_MODEL_LOADED);
                             backoffIdx = 0;
                         } else {
                             setState(WorkerState.WORKER_ERROR);
                         }
                         break;
+                    case PROFILE:
+                        logger.info(reply.getMessage());
+                        break;
                     case UNLOAD:
                     case STATS:
                     default:
@@ -166,6 +173,10 @@ public class WorkerThread implements Runnable {
         return workerId;
     }
 
+    public String getModelName() {
+        return model.getModelName();
+    }
+
     public long getMemory() {
         return memory;
     }
@@ -259,6 +270,10 @@ public class WorkerThread implements Runnable {
         return gpuId;
     }
 
+    public int getCpuSlot() {
+        return cpuSlot;
+    }
+
     public long getStartTime() {
         return startTime;
     }
@@ -32,6 +32,9 @@ class ArgParser(object):
         sub_parse = parser.add_mutually_exclusive_group(required=False)
         sub_parse.add_argument('--start', action='store_true', help='Start the model-server')
         sub_parse.add_argument('--stop', action='store_true', help='Stop the model-server')
+        sub_parse.add_argument('--tune', action='store_true',
+                               help='Sweep worker and thread counts for the model given in --models on this '
+                                    'machine and write the best settings into the --mms-config file')
 
         parser.add_argument('--mms-config',
                             dest='mms_config',
@@ -48,6 +51,16 @@ class ArgParser(object):
         parser.add_argument('--log-config',
                             dest='log_config',
                             help='Log4j configuration file for model server')
+        parser.add_argument('--tune-duration',
+                            dest='tune_duration',
+                            type=int,
+                            default=10,
+                            help='Seconds each configuration is measured in --tune mode')
+        parser.add_argument('--tune-max-p99',
+                            dest='tune_max_p99',
+                            type=float,
+                            help='Only recommend configurations with a p99 latency below this many milliseconds '
+                                 'in --tune mode')
         return parser
 
     @staticmethod
@@ -81,6 +94,45 @@ class ArgParser(object):
                             type=str,
                             help='If \'sock-type\' is \'tcp\' this is expected to have the host port to bind on')
 
+        parser.add_argument('--cpu-slot',
+                            dest="cpu_slot",
+                            type=int,
+                            help='CPU slot assigned by the frontend. If given, the worker pins itself to the '
+                                 'slot\'s CPU set and NUMA node')
+
+        parser.add_argument('--cpus-per-worker',
+                            dest="cpus_per_worker",
+                            type=int,
+                            default=1,
+                            help='Number of CPUs in the CPU set of each worker slot')
+
+        parser.add_argument('--metrics-interval',
+                            dest="metrics_interval",
+                            type=int,
+                            default=60,
+                            help='Seconds between model metric summaries of the worker. 0 logs the metrics of '
+                                 'every batch')
+
+        parser.add_argument('--prometheus-dir',
+                            dest="prometheus_dir",
+                            help='Directory the worker writes its metrics into in Prometheus text format, at every '
+                                 'metrics interval')
+
+        return parser
+
+    @staticmethod
+    def metric_collector_args():
+        """
+        Argument parser for the system metrics collector
+        :return:
+        """
+        parser = argparse.ArgumentParser(prog='metric-collector', description='System metrics collector')
+
+        parser.add_argument('--prometheus-dir',
+                            dest="prometheus_dir",
+                            help='Directory the collector writes the host and worker process metrics into in '
+                                 'Prometheus text format')
+
         return parser
 
     @staticmethod
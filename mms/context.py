@@ -11,6 +11,9 @@
 """
 Context object of incoming request
 """
+import time
+
+from mms.metrics.dimension import Dimension
 
 
 class Context(object):
@@ -53,10 +56,48 @@ class Context(object):
     def metrics(self, metrics):
         self._metrics = metrics
 
+    def stage(self, name):
+        """
+        Time one stage of handling the current batch, like "Preprocess", "Inference", "Postprocess" or
+        "Serialize". The duration is added to the batch metrics as `<name>Time` in ms with a BatchSize dimension.
+
+            with context.stage("Preprocess"):
+                data = preprocess(data)
+
+        :param name: stage name
+        :return: StageTimer context manager
+        """
+        return StageTimer(self, name)
+
     def __eq__(self, other):
         return isinstance(other, Context) and self.__dict__ == other.__dict__
 
 
+class StageTimer(object):
+    """
+    Context manager measuring the duration of a stage
+    """
+
+    def __init__(self, context, name):
+        self.context = context
+        self.name = name
+        self.start = None
+        self.duration = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = (time.time() - self.start) * 1000
+        metrics = self.context.metrics
+        if metrics is not None:
+            batch_size = len(self.context.request_ids) if self.context.request_ids else 1
+            metrics.add_time(self.name + "Time", round(self.duration, 2),
+                             dimensions=[Dimension("BatchSize", batch_size)])
+        return False
+
+
 class RequestProcessor(object):
     """
     Request processor
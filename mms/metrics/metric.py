@@ -21,6 +21,9 @@ from mms.metrics.unit import Units
 
 MetricUnit = Units()
 
+# resolved once, it is part of every metric line
+HOSTNAME = socket.gethostname()
+
 
 class Metric(object):
     """
@@ -78,10 +81,10 @@ class Metric(object):
         dims = ",".join([str(d) for d in self.dimensions])
         if self.request_id:
             return "{}.{}:{}|#{}|#hostname:{},{}".format(
-                self.name, self.unit, self.value, dims, socket.gethostname(), self.request_id)
+                self.name, self.unit, self.value, dims, HOSTNAME, self.request_id)
 
         return "{}.{}:{}|#{}|#hostname:{}".format(
-            self.name, self.unit, self.value, dims, socket.gethostname())
+            self.name, self.unit, self.value, dims, HOSTNAME)
 
     def to_dict(self):
         """
@@ -90,5 +93,5 @@ class Metric(object):
         return OrderedDict({'MetricName': self.name, 'Value': self.value, 'Unit': self.unit,
                             'Dimensions': self.dimensions,
                             'Timestamp': datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-                            'HostName': socket.gethostname(),
+                            'HostName': HOSTNAME,
                             'RequestId': self.request_id})
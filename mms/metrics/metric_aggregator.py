@@ -0,0 +1,211 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+In-worker aggregation of model metrics.
+
+Instead of logging every metric of every batch, a worker accumulates them and emits one summary per series and
+flush interval: counters are summed, time metrics go into fixed-bucket histograms reported as count, p50, p90,
+p99 and max, and other metrics report their last value.
+"""
+
+import logging
+import os
+import threading
+from array import array
+from bisect import bisect_left
+
+from mms.metrics.dimension import Dimension
+from mms.metrics.metric import Metric
+from mms.metrics.prometheus import PrometheusRegistry, write_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 60
+TIME_UNITS = ("Milliseconds", "Seconds")
+PERCENTILES = (50, 90, 99)
+
+
+def _bucket_bounds(lowest=0.01, highest=3600000.0, growth=1.1):
+    bounds = array('d')
+    bound = lowest
+    while bound < highest:
+        bounds.append(bound)
+        bound *= growth
+    bounds.append(highest)
+    return bounds
+
+
+# Upper bounds of the histogram buckets, growing by 10% from 10us to 1h, values above go into an overflow bucket.
+# Percentiles are interpolated inside a bucket, so they are within 10% of the exact value.
+BUCKET_BOUNDS = _bucket_bounds()
+
+
+class Histogram(object):
+    """
+    Fixed-bucket histogram backed by an array of counts.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = array('l', [0] * (len(BUCKET_BOUNDS) + 1))
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """
+        Record one value.
+
+        :param value:
+        :return:
+        """
+        self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        """
+        Estimate a percentile by linear interpolation inside the bucket holding its rank.
+
+        :param pct:
+        :return:
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i > 0 else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(value, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+
+class MetricAggregator(object):
+    """
+    Accumulates the metrics of all batches handled by a worker and logs a summary every interval.
+
+    With a prometheus_file, the metrics are also fed into a Prometheus registry that is written to the file at
+    every flush.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, prometheus_file=None):
+        self.interval = interval
+        self.prometheus_file = prometheus_file
+        self.prometheus = None
+        if prometheus_file is not None:
+            self.prometheus = PrometheusRegistry(labels={"pid": os.getpid()})
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, metrics):
+        """
+        Add the metrics of one batch. Error metrics are rare and logged right away.
+
+        :param metrics: list of Metric
+        :return:
+        """
+        with self._lock:
+            for metric in metrics:
+                if self.prometheus is not None:
+                    self.prometheus.record(metric)
+                if metric.request_id is None:
+                    logger.info("[METRICS]%s", str(metric))
+                    continue
+
+                key = (metric.name, metric.unit, tuple(str(d) for d in metric.dimensions))
+                if metric.metric_method == 'counter':
+                    self.counters[key] = self.counters.get(key, 0) + metric.value
+                elif metric.unit in TIME_UNITS:
+                    histogram = self.histograms.get(key)
+                    if histogram is None:
+                        histogram = self.histograms[key] = Histogram()
+                    histogram.add(metric.value)
+                else:
+                    self.gauges[key] = metric.value
+
+    def summary(self):
+        """
+        Summary metrics of the current interval, and reset the aggregates.
+
+        :return: list of Metric
+        """
+        with self._lock:
+            counters, histograms, gauges = self.counters, self.histograms, self.gauges
+            self.counters, self.histograms, self.gauges = {}, {}, {}
+
+        summary = []
+        for (name, unit, dims), value in counters.items():
+            summary.append(Metric(name, value, unit, list(dims)))
+        for (name, unit, dims), value in gauges.items():
+            summary.append(Metric(name, value, unit, list(dims)))
+        for (name, unit, dims), histogram in histograms.items():
+            summary.append(Metric(name, histogram.count, 'count', list(dims) + [Dimension("Stat", "Count")]))
+            for pct in PERCENTILES:
+                summary.append(Metric(name, round(histogram.percentile(pct), 2), unit,
+                                      list(dims) + [Dimension("Stat", "P{}".format(pct))]))
+            summary.append(Metric(name, histogram.max, unit, list(dims) + [Dimension("Stat", "Max")]))
+        return summary
+
+    def flush(self):
+        """
+        Log the summary of the current interval.
+
+        :return:
+        """
+        for metric in self.summary():
+            logger.info("[METRICS]%s", str(metric))
+
+        if self.prometheus is not None:
+            with self._lock:
+                exposition = self.prometheus.exposition()
+            write_file(self.prometheus_file, exposition)
+
+    def start(self):
+        """
+        Start flushing every interval in a daemon thread.
+
+        :return:
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metric-aggregator")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the flush thread and flush what is left.
+
+        :return:
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
@@ -11,16 +11,48 @@
 """
 Single start point for system metrics and process metrics script
 
+The collector is resident: for every line of comma separated `pid:model_name` workers read from stdin, it writes
+the system metrics and the resource metrics of each worker, an empty line, the memory of each worker as
+`pid:bytes` and another empty line. It exits at the end of stdin.
+
+With --prometheus-dir, the host and worker process metrics are also written into a Prometheus text file of that
+directory at every collection.
+
 """
 import logging
+import os
 import sys
 
+import psutil
+
+from mms.arg_parser import ArgParser
+from mms.metrics import prometheus
 from mms.metrics import system_metrics
-from mms.metrics.process_memory_metric import check_process_mem_usage
+from mms.metrics.process_memory_metric import check_process_mem_usage, check_worker_metrics, parse_workers
 
 if __name__ == '__main__':
     logging.basicConfig(stream=sys.stdout, format="%(message)s", level=logging.INFO)
+    args = ArgParser.metric_collector_args().parse_args()
+    registry = None
+    if args.prometheus_dir is not None:
+        registry = prometheus.PrometheusRegistry()
+        if not os.path.isdir(args.prometheus_dir):
+            os.makedirs(args.prometheus_dir)
+
+    # cpu_percent() reports the utilization since its previous call, start measuring the first interval now
+    psutil.cpu_percent()
 
-    system_metrics.collect_all(sys.modules['mms.metrics.system_metrics'])
+    for line in iter(sys.stdin.readline, ''):
+        workers = parse_workers(line)
+        metrics = system_metrics.collect_all(sys.modules['mms.metrics.system_metrics'])
+        metrics.extend(check_worker_metrics(workers))
+        logging.info("")
+        check_process_mem_usage(workers)
+        logging.info("")
 
-    check_process_mem_usage(sys.stdin)
+        if registry is not None:
+            registry.remove("pid", workers)
+            for met in metrics:
+                registry.record(met)
+            registry.write(prometheus.host_file(args.prometheus_dir))
+            prometheus.remove_stale_worker_files(args.prometheus_dir, workers)
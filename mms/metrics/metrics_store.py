@@ -11,15 +11,53 @@
 """
 Metrics collection module
 """
-from builtins import str
+import logging
 
 from mms.metrics.dimension import Dimension
 from mms.metrics.metric import Metric
 
+MAX_SERIES_PER_MODEL = 500
+
+ERROR_DIMENSIONS = (Dimension("Level", "Error"),)
+
+# Series seen by the worker per model. Keys are interned here, so the stores of all batches share one key tuple
+# per series, and a model cannot create more than MAX_SERIES_PER_MODEL series.
+_series = {}
+_capped_models = set()
+_model_dimensions = {}
+
+
+def _intern(model_name, key):
+    keys = _series.get(model_name)
+    if keys is None:
+        keys = _series[model_name] = {}
+    interned = keys.get(key)
+    if interned is None:
+        if len(keys) >= MAX_SERIES_PER_MODEL:
+            if model_name not in _capped_models:
+                logging.warning("Model %s reached %d metric series, metrics of new series are dropped.",
+                                model_name, MAX_SERIES_PER_MODEL)
+                _capped_models.add(model_name)
+            return None
+        interned = keys[key] = key
+    return interned
+
+
+def _get_model_dimensions(model_name):
+    dimensions = _model_dimensions.get(model_name)
+    if dimensions is None:
+        dimensions = _model_dimensions[model_name] = (Dimension("ModelName", model_name),
+                                                      Dimension("Level", "Model"))
+    return dimensions
+
 
 class MetricsStore(object):
     """
     Class for creating, modifying different metrics. And keep them in a dictionary
+
+    A series is identified by the name, unit and dimensions of a metric, and a model has a bounded number of series.
+    The request id is not part of the series: every request of a batch keeps its own observation of the series,
+    with the request id as an exemplar, so the values of a batch are all emitted and aggregated.
     """
 
     def __init__(self, request_ids, model_name):
@@ -56,20 +94,22 @@ class MetricsStore(object):
         elif not isinstance(dimensions, list):
             raise ValueError("Please provide a list of dimensions")
         if req_id is None:
-            dimensions.append(Dimension("Level", "Error"))
+            dimensions = dimensions + list(ERROR_DIMENSIONS)
         else:
-            dimensions.append(Dimension("ModelName", self.model_name))
-            dimensions.append(Dimension("Level", "Model"))
-
-        # Cache the metric with an unique key for update
-        dim_str = [name, unit, str(req_id)] + [str(d) for d in dimensions]
-        dim_str = '-'.join(dim_str)
-        if dim_str not in self.cache:
+            dimensions = dimensions + list(_get_model_dimensions(self.model_name))
+
+        # Cache the observation of the series by request for update
+        key = (name, unit, tuple((d.name, d.value) for d in dimensions))
+        metric = self.cache.get((key, req_id))
+        if metric is None:
+            key = _intern(self.model_name, key)
+            if key is None:
+                return
             metric = Metric(name, value, unit, dimensions, req_id, metrics_method)
             self.store.append(metric)
-            self.cache[dim_str] = metric
+            self.cache[(key, req_id)] = metric
         else:
-            self.cache[dim_str].update(value)
+            metric.update(value)
 
     def _get_req(self, idx):
         """
@@ -128,7 +168,7 @@ class MetricsStore(object):
         if unit not in ['ms', 's']:
             raise ValueError("the unit for a timed metric should be one of ['ms', 's']")
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
 
     def add_size(self, name, value, idx=None, unit='MB', dimensions=None):
         """
@@ -150,7 +190,7 @@ class MetricsStore(object):
         if unit not in ['MB', 'kB', 'GB', 'B']:
             raise ValueError("The unit for size based metric is one of ['MB','kB', 'GB', 'B']")
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
 
     def add_percent(self, name, value, idx=None, dimensions=None):
         """
@@ -169,7 +209,7 @@ class MetricsStore(object):
         """
         unit = 'percent'
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
 
     def add_error(self, name, value, dimensions=None):
         """
@@ -186,7 +226,7 @@ class MetricsStore(object):
         unit = ''
 
         # noinspection PyTypeChecker
-        self._add_or_update(name, value, None, unit, dimensions)
+        self._add_or_update(name, value, None, unit, dimensions=dimensions)
 
     def add_metric(self, name, value, idx=None, unit=None, dimensions=None):
         """
@@ -206,4 +246,4 @@ class MetricsStore(object):
             list of dimensions for the metric
         """
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
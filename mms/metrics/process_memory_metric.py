@@ -14,35 +14,142 @@ Pass a json, collection of pids and gpuID
 """
 
 import logging
+from collections import OrderedDict
+from builtins import str
 
 import psutil
 
+from mms.metrics.dimension import Dimension
+from mms.metrics.metric import Metric
 
-def get_cpu_usage(pid):
+# psutil.Process handles of the worker pids, kept between collections of the resident collector
+processes = {}
+# (cpu time, context switches) of every worker at the previous collection, for the per-interval metrics
+previous_counters = {}
+
+
+def parse_workers(line):
+    """
+    Parse the worker list sent by the frontend, comma separated `pid:model_name` entries, and forget the cached
+    processes of workers that are gone.
+
+    :param line: str
+    :return: OrderedDict of pid to model name
     """
-    use psutil for cpu memory
-    :param pid: str
+    workers = OrderedDict()
+    for entry in line.strip().split(","):
+        if not entry:
+            continue
+        pid, _, model_name = entry.partition(":")
+        workers[int(pid)] = model_name or None
+
+    for pid in list(processes):
+        if pid not in workers:
+            del processes[pid]
+            previous_counters.pop(pid, None)
+    return workers
+
+
+def get_process(pid):
+    """
+    Cached psutil.Process of a pid. A cached handle of a pid that was reused by a new process is replaced.
+
+    :param pid: int
+    :return: psutil.Process
+    """
+    process = processes.get(pid)
+    if process is None or not process.is_running():
+        process = psutil.Process(pid)
+        processes[pid] = process
+        previous_counters.pop(pid, None)
+    return process
+
+
+def get_memory_usage(pid):
+    """
+    Resident set size of a process
+    :param pid: int
     :return: int
     """
     try:
-        process = psutil.Process(int(pid))
+        process = get_process(pid)
+        mem_utilization = process.memory_info()[0]
     except psutil.Error:
         logging.error("Failed get process for pid: %s", pid, exc_info=True)
         return 0
 
-    mem_utilization = process.memory_info()[0]
     return mem_utilization
 
 
-def check_process_mem_usage(stdin):
+def get_worker_metrics(pid, model_name):
+    """
+    Resource usage metrics of a worker process: USS and PSS memory, cumulative and per-interval CPU time, threads,
+    open file descriptors and context switches.
+
+    Per-interval metrics are reported from the second collection of a process on.
+
+    :param pid: int
+    :param model_name: str
+    :return: list of Metric
     """
+    process = get_process(pid)
+    dimensions = [Dimension("ModelName", model_name), Dimension("Level", "Worker"), Dimension("Pid", pid)]
+
+    with process.oneshot():
+        cpu_times = process.cpu_times()
+        num_threads = process.num_threads()
+        num_fds = process.num_fds() if hasattr(process, "num_fds") else process.num_handles()
+        ctx_switches = process.num_ctx_switches()
+
+    cpu_time = cpu_times.user + cpu_times.system
+    ctx_switches = ctx_switches.voluntary + ctx_switches.involuntary
+    metrics = [Metric('WorkerCPUTime', round(cpu_time, 3), 's', dimensions),
+               Metric('WorkerThreads', num_threads, 'count', dimensions),
+               Metric('WorkerFileDescriptors', num_fds, 'count', dimensions)]
+
+    previous = previous_counters.get(pid)
+    previous_counters[pid] = (cpu_time, ctx_switches)
+    if previous is not None:
+        metrics.append(Metric('WorkerIntervalCPUTime', round(cpu_time - previous[0], 3), 's', dimensions))
+        metrics.append(Metric('WorkerContextSwitches', ctx_switches - previous[1], 'count', dimensions))
+
+    try:
+        # USS and PSS walk the process' memory maps, they are not part of oneshot()
+        memory = process.memory_full_info()
+    except psutil.AccessDenied:
+        return metrics
+    metrics.append(Metric('WorkerUSS', memory.uss / (1024.0 * 1024), 'MB', dimensions))
+    if hasattr(memory, "pss"):
+        metrics.append(Metric('WorkerPSS', memory.pss / (1024.0 * 1024), 'MB', dimensions))
+    return metrics
+
 
-    Return
-    ------
-    mem_utilization: float
+def check_worker_metrics(workers):
     """
-    process_list = stdin.readline().strip().split(",")
-    for process in process_list:
-        if not process:
+    Log the resource usage metrics of the workers.
+
+    :param workers: dict of pid to model name
+    :return: list of Metric
+    """
+    collected = []
+    for pid, model_name in workers.items():
+        try:
+            metrics = get_worker_metrics(pid, model_name)
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+            # the worker exited, or cannot be read, the other workers are still reported
             continue
-        logging.info("%s:%d", process, get_cpu_usage(process))
+        for met in metrics:
+            logging.info(str(met))
+        collected.extend(metrics)
+    return collected
+
+
+def check_process_mem_usage(workers):
+    """
+    Log the memory usage of the workers as `pid:bytes`.
+
+    :param workers: dict of pid to model name
+    :return:
+    """
+    for pid in workers:
+        logging.info("%d:%d", pid, get_memory_usage(pid))
@@ -0,0 +1,325 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Prometheus text exposition of model, worker and host metrics.
+
+Every backend worker and the system metrics collector keep a registry of pre-registered metric families and write
+it into a `.prom` file of a directory, to be scraped by the textfile collector of the Prometheus node exporter.
+Only known metrics and known dimensions become Prometheus series, request ids are never labels, and every family
+holds a bounded number of series.
+"""
+
+import logging
+import os
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# upper bounds in milliseconds of the latency histogram buckets
+LATENCY_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+MAX_SERIES_PER_FAMILY = 200
+
+# MMS dimension names that may become labels, and their label names
+LABELS = {"ModelName": "model", "BatchSize": "batch_size", "Pid": "pid"}
+# counters reported as the increment of the last interval instead of a cumulative value
+INTERVAL_COUNTERS = ("WorkerContextSwitches",)
+
+
+class MetricFamily(object):
+    """
+    A Prometheus metric family and its series, keyed by tuples of label values.
+    """
+
+    def __init__(self, name, metric_type, description, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.type = metric_type
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self.series = OrderedDict()
+        self._warned = False
+
+    def _get(self, labels, default):
+        value = self.series.get(labels)
+        if value is None:
+            if len(self.series) >= MAX_SERIES_PER_FAMILY:
+                if not self._warned:
+                    logger.warning("Metric %s reached %d series, new series are dropped.",
+                                   self.name, MAX_SERIES_PER_FAMILY)
+                    self._warned = True
+                return None
+            value = self.series[labels] = default()
+        return value
+
+    def observe(self, labels, value):
+        """
+        Add a value to a histogram. The series holds the bucket counts, followed by the count and the sum.
+
+        :param labels: tuple of label values
+        :param value:
+        :return:
+        """
+        series = self._get(labels, lambda: array('d', [0] * (len(self.buckets) + 3)))
+        if series is not None:
+            series[bisect_left(self.buckets, value)] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def inc(self, labels, value):
+        """
+        Increment a counter.
+
+        :param labels: tuple of label values
+        :param value:
+        :return:
+        """
+        if self._get(labels, lambda: [0]) is not None:
+            self.series[labels][0] += value
+
+    def set(self, labels, value):
+        """
+        Set a gauge, or a counter read from a cumulative source.
+
+        :param labels: tuple of label values
+        :param value:
+        :return:
+        """
+        if self._get(labels, lambda: [0]) is not None:
+            self.series[labels][0] = value
+
+    def remove(self, label_name, keep):
+        """
+        Remove the series whose label is not one of the values to keep.
+
+        :param label_name:
+        :param keep: set of label values
+        :return:
+        """
+        if label_name not in self.label_names:
+            return
+        idx = self.label_names.index(label_name)
+        for labels in list(self.series):
+            if labels[idx] not in keep:
+                del self.series[labels]
+
+    def _format(self, suffix, labels, value, extra=None):
+        pairs = list(zip(self.label_names, labels))
+        if extra:
+            pairs.append(extra)
+        label_str = ",".join('{}="{}"'.format(k, _escape(v)) for k, v in pairs)
+        if label_str:
+            label_str = "{" + label_str + "}"
+        return "{}{}{} {}".format(self.name, suffix, label_str, _format_value(value))
+
+    def lines(self):
+        """
+        Text exposition of the family.
+
+        :return: list of lines
+        """
+        if not self.series:
+            return []
+
+        lines = ["# HELP {} {}".format(self.name, self.description), "# TYPE {} {}".format(self.name, self.type)]
+        for labels, value in self.series.items():
+            if self.type == HISTOGRAM:
+                cumulative = 0
+                for bound, count in zip(self.buckets, value):
+                    cumulative += count
+                    lines.append(self._format("_bucket", labels, cumulative, ("le", _format_value(bound))))
+                lines.append(self._format("_bucket", labels, value[-2], ("le", "+Inf")))
+                lines.append(self._format("_sum", labels, value[-1]))
+                lines.append(self._format("_count", labels, value[-2]))
+            else:
+                lines.append(self._format("", labels, value[0]))
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# Pre-registered families: MMS metric name -> (family name, type, description, label names, constant labels)
+FAMILIES = OrderedDict([
+    ("PredictionTime", ("mms_prediction_time_milliseconds", HISTOGRAM,
+                        "Time to handle a batch in the worker.", ("model", "pid"), ())),
+    ("PreprocessTime", ("mms_stage_time_milliseconds", HISTOGRAM,
+                        "Time of a stage of handling a batch.", ("model", "pid", "stage", "batch_size"),
+                        (("stage", "Preprocess"),))),
+    ("InferenceTime", ("mms_stage_time_milliseconds", HISTOGRAM,
+                       "Time of a stage of handling a batch.", ("model", "pid", "stage", "batch_size"),
+                       (("stage", "Inference"),))),
+    ("PostprocessTime", ("mms_stage_time_milliseconds", HISTOGRAM,
+                         "Time of a stage of handling a batch.", ("model", "pid", "stage", "batch_size"),
+                         (("stage", "Postprocess"),))),
+    ("SerializeTime", ("mms_stage_time_milliseconds", HISTOGRAM,
+                       "Time of a stage of handling a batch.", ("model", "pid", "stage", "batch_size"),
+                       (("stage", "Serialize"),))),
+    ("CPUUtilization", ("mms_host_cpu_utilization_percent", GAUGE, "CPU utilization of the host.", (), ())),
+    ("MemoryUsed", ("mms_host_memory_used_megabytes", GAUGE, "Memory used on the host.", (), ())),
+    ("MemoryAvailable", ("mms_host_memory_available_megabytes", GAUGE, "Memory available on the host.", (), ())),
+    ("MemoryUtilization", ("mms_host_memory_utilization_percent", GAUGE, "Memory utilization of the host.",
+                           (), ())),
+    ("DiskUsage", ("mms_host_disk_used_gigabytes", GAUGE, "Disk used on the host.", (), ())),
+    ("DiskAvailable", ("mms_host_disk_available_gigabytes", GAUGE, "Disk available on the host.", (), ())),
+    ("DiskUtilization", ("mms_host_disk_utilization_percent", GAUGE, "Disk utilization of the host.", (), ())),
+    ("WorkerUSS", ("mms_worker_uss_megabytes", GAUGE, "Memory used only by the worker process.",
+                   ("model", "pid"), ())),
+    ("WorkerPSS", ("mms_worker_pss_megabytes", GAUGE, "Proportional set size of the worker process.",
+                   ("model", "pid"), ())),
+    ("WorkerCPUTime", ("mms_worker_cpu_seconds_total", COUNTER, "User and system CPU time of the worker process.",
+                       ("model", "pid"), ())),
+    ("WorkerThreads", ("mms_worker_threads", GAUGE, "Threads of the worker process.", ("model", "pid"), ())),
+    ("WorkerFileDescriptors", ("mms_worker_open_fds", GAUGE, "Open file descriptors of the worker process.",
+                               ("model", "pid"), ())),
+    ("WorkerContextSwitches", ("mms_worker_context_switches_total", COUNTER,
+                               "Context switches of the worker process.", ("model", "pid"), ())),
+])
+
+
+class PrometheusRegistry(object):
+    """
+    Registry of the pre-registered families, fed with MMS Metric objects.
+    """
+
+    def __init__(self, families=None, labels=None):
+        """
+        :param families: metric families, FAMILIES by default
+        :param labels: label values of every series that the metrics do not have as dimensions, like the pid of
+            a worker
+        """
+        self.labels = labels or {}
+        self.families = OrderedDict()
+        self.metric_families = {}
+        for metric_name, (name, metric_type, description, label_names, constants) in \
+                (families or FAMILIES).items():
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = MetricFamily(name, metric_type, description, label_names)
+            self.metric_families[metric_name] = (family, dict(constants))
+
+    def record(self, metric):
+        """
+        Feed an MMS metric into its family. Metrics without a pre-registered family, and dimensions that are not
+        labels of the family, are ignored.
+
+        :param metric: Metric
+        :return:
+        """
+        entry = self.metric_families.get(metric.name)
+        if entry is None:
+            return
+
+        family, constants = entry
+        values = dict(self.labels)
+        values.update(constants)
+        for dim in metric.dimensions:
+            label = LABELS.get(dim.name)
+            if label is not None:
+                values[label] = dim.value
+        labels = tuple(str(values.get(name, "")) for name in family.label_names)
+
+        if family.type == HISTOGRAM:
+            family.observe(labels, metric.value)
+        elif metric.name in INTERVAL_COUNTERS:
+            family.inc(labels, metric.value)
+        else:
+            family.set(labels, metric.value)
+
+    def remove(self, label_name, keep):
+        """
+        Remove the series of all families whose label is not one of the values to keep, e.g. of exited workers.
+
+        :param label_name:
+        :param keep: iterable of label values
+        :return:
+        """
+        keep = set(str(k) for k in keep)
+        for family in self.families.values():
+            family.remove(label_name, keep)
+
+    def exposition(self):
+        """
+        Prometheus text format of all families.
+
+        :return: str
+        """
+        lines = []
+        for family in self.families.values():
+            lines.extend(family.lines())
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, path):
+        """
+        Write the exposition into a file.
+
+        :param path:
+        :return:
+        """
+        write_file(path, self.exposition())
+
+
+def write_file(path, exposition):
+    """
+    Atomically replace a file with an exposition, so scrapers never read a partial file.
+
+    :param path:
+    :param exposition:
+    :return:
+    """
+    tmp = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+    try:
+        with open(tmp, "w") as f:
+            f.write(exposition)
+        os.rename(tmp, path)
+    except (IOError, OSError):
+        logger.warning("Failed to write Prometheus metrics to %s", path, exc_info=True)
+
+
+def worker_file(prometheus_dir, pid):
+    return os.path.join(prometheus_dir, "mms-worker-{}.prom".format(pid))
+
+
+def host_file(prometheus_dir):
+    return os.path.join(prometheus_dir, "mms-host.prom")
+
+
+def remove_stale_worker_files(prometheus_dir, pids):
+    """
+    Delete the files of workers that are not running anymore.
+
+    :param prometheus_dir:
+    :param pids: pids of the current workers
+    :return:
+    """
+    import psutil
+
+    for name in os.listdir(prometheus_dir):
+        if not (name.startswith("mms-worker-") and name.endswith(".prom")):
+            continue
+        pid = name[len("mms-worker-"):-len(".prom")]
+        if pid.isdigit() and int(pid) not in pids and not psutil.pid_exists(int(pid)):
+            try:
+                os.remove(os.path.join(prometheus_dir, name))
+            except OSError:
+                pass
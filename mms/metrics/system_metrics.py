@@ -63,7 +63,7 @@ def collect_all(mod):
     Collect all system metrics.
 
     :param mod:
-    :return:
+    :return: list of Metric
     """
     members = dir(mod)
     for i in members:
@@ -71,7 +71,9 @@ def collect_all(mod):
         if isinstance(value, types.FunctionType) and value.__name__ not in ('collect_all', 'log_msg'):
             value()
 
-    for met in system_metrics:
+    collected = list(system_metrics)
+    for met in collected:
         logging.info(str(met))
-
-    logging.info("")
+    # the collector is resident, start the next collection with an empty list
+    del system_metrics[:]
+    return collected
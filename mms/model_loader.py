@@ -24,6 +24,20 @@ from builtins import str
 from mms.service import Service
 
 
+def read_performance_hints(model_dir):
+    """
+    Read the performance hints of the manifest of a MMS 1.0 model, set by model-archiver.
+
+    :param model_dir:
+    :return: dict of the hints, empty if the model has none
+    """
+    manifest_file = os.path.join(model_dir, "MAR-INF/MANIFEST.json")
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file) as f:
+        return json.load(f).get("performance", {})
+
+
 class ModelLoaderFactory(object):
     """
     ModelLoaderFactory
@@ -19,6 +19,19 @@ def start():
     :return:
     """
     args = ArgParser.mms_parser().parse_args()
+    if args.tune:
+        if not args.models or len(args.models) != 1:
+            print("--tune requires exactly one model in --models.")
+            sys.exit(1)
+
+        from mms.tuner import tune
+        try:
+            tune(args.models[0], args.mms_config or "config.properties", args.tune_duration, args.tune_max_p99)
+        except RuntimeError as e:
+            print(e)
+            sys.exit(1)
+        return
+
     pid_file = os.path.join(tempfile.gettempdir(), ".model_server.pid")
     pid = None
     if os.path.isfile(pid_file):
@@ -13,7 +13,7 @@
 import mxnet
 import numpy as np
 from mms.model_service.mxnet_model_service import GluonImperativeBaseService
-from mms.utils.mxnet import ndarray
+from mms.utils.mxnet import image, ndarray
 
 
 class GluonVisionService(GluonImperativeBaseService):
@@ -28,7 +28,7 @@ class GluonVisionService(GluonImperativeBaseService):
             input_shape = self.signature['inputs'][idx]['data_shape']
             # We are assuming input shape is NCHW
             [h, w] = input_shape[2:]
-            img_arr = mxnet.img.imdecode(img)
+            img_arr = image.read_downscaled(img, w, h)
             img_arr = mxnet.image.imresize(img_arr, w, h)
             img_arr = img_arr.astype(np.float32)
             img_arr /= 255
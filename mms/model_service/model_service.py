@@ -14,9 +14,7 @@
 
 import ast
 import json
-import logging
 import os
-import time
 from abc import ABCMeta, abstractmethod
 
 
@@ -147,17 +145,15 @@ class SingleNodeService(ModelService):
         list of outputs to be sent back to client.
             data to be sent back
         """
-        preprocess_start = time.time()
-        data = self._preprocess(data)
-        inference_start = time.time()
-        data = self._inference(data)
-        postprocess_start = time.time()
-        data = self._postprocess(data)
-        end_time = time.time()
-
-        logging.info("preprocess time: %.2f", (inference_start - preprocess_start) * 1000)
-        logging.info("inference time: %.2f", (postprocess_start - inference_start) * 1000)
-        logging.info("postprocess time: %.2f", (end_time - postprocess_start) * 1000)
+        if self._context is None:
+            return self._postprocess(self._inference(self._preprocess(data)))
+
+        with self._context.stage("Preprocess"):
+            data = self._preprocess(data)
+        with self._context.stage("Inference"):
+            data = self._inference(data)
+        with self._context.stage("Postprocess"):
+            data = self._postprocess(data)
 
         return data
 
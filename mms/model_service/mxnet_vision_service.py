@@ -27,7 +27,7 @@ class MXNetVisionService(MXNetBaseService):
             input_shape = self.signature['inputs'][idx]['data_shape']
             # We are assuming input shape is NCHW
             [h, w] = input_shape[2:]
-            img_arr = image.read(img)
+            img_arr = image.read_downscaled(img, w, h)
             img_arr = image.resize(img_arr, w, h)
             img_arr = image.transform_shape(img_arr)
             img_list.append(img_arr)
@@ -21,8 +21,15 @@ import socket
 import sys
 
 from mms.arg_parser import ArgParser
-from mms.model_loader import ModelLoaderFactory
+from mms.metrics.dimension import Dimension
+from mms.metrics.metric import Metric
+from mms.metrics import prometheus
+from mms.metrics.metric_aggregator import MetricAggregator
+from mms.model_loader import ModelLoaderFactory, read_performance_hints
 from mms.protocol.otf_message_handler import retrieve_msg, create_load_model_response
+from mms.utils import cpu_placement
+from mms.utils.mxnet_profiler import MXNetProfiler
+from mms.utils.stack_sampler import StackSampler
 
 MAX_FAILURE_THRESHOLD = 5
 SOCKET_ACCEPT_TIMEOUT = 30.0
@@ -33,9 +40,25 @@ class MXNetModelServiceWorker(object):
     """
     Backend worker to handle Model Server's python service code
     """
-    def __init__(self, s_type=None, s_name=None, host_addr=None, port_num=None):
+    def __init__(self, s_type=None, s_name=None, host_addr=None, port_num=None, cpu_slot=None,
+                 cpus_per_worker=1, metrics_interval=0, prometheus_dir=None):
+        self.placement = None
+        self.metrics_aggregator = None
+        # thread pool sizes that are not set in the environment, which the performance hints of the model may set
+        self.default_thread_env = [name for name in cpu_placement.THREAD_ENV_VARIABLES if name not in os.environ]
+        if metrics_interval > 0:
+            prometheus_file = None
+            if prometheus_dir is not None:
+                prometheus_file = prometheus.worker_file(prometheus_dir, os.getpid())
+            self.metrics_aggregator = MetricAggregator(metrics_interval, prometheus_file)
+        self.profilers = {"mxnet": MXNetProfiler(), "python": StackSampler()}
+        if cpu_slot is not None:
+            self.placement = cpu_placement.assign(cpu_slot, cpus_per_worker)
+            cpu_placement.set_thread_env(self.placement)
+            if not cpu_placement.apply(self.placement):
+                self.placement = None
         if os.environ.get("OMP_NUM_THREADS") is None:
-            os.environ["OMP_NUM_THREADS"] = "1"
+            os.environ["OMP_NUM_THREADS"] = str(cpus_per_worker)
         self.sock_type = s_type
         if s_type == "unix":
             if s_name is None:
@@ -59,8 +82,7 @@ class MXNetModelServiceWorker(object):
         socket_family = socket.AF_INET if s_type == "tcp" else socket.AF_UNIX
         self.sock = socket.socket(socket_family, socket.SOCK_STREAM)
 
-    @staticmethod
-    def load_model(load_model_request):
+    def load_model(self, load_model_request):
         """
         Expected command
         {
@@ -86,9 +108,68 @@ class MXNetModelServiceWorker(object):
         if "gpu" in load_model_request:
             gpu = int(load_model_request["gpu"])
 
+        threads = read_performance_hints(model_dir).get("threadsPerWorker")
+        if threads:
+            self.set_threads(threads)
+
         model_loader = ModelLoaderFactory.get_model_loader(model_dir)
         service = model_loader.load(model_name, model_dir, handler, gpu, batch_size)
-        return service, "loaded model {}".format(model_name), 200
+        if self.metrics_aggregator is not None:
+            service.metrics_aggregator = self.metrics_aggregator
+            self.metrics_aggregator.start()
+        if self.placement is None:
+            return service, "loaded model {}".format(model_name), 200
+
+        cpus = cpu_placement.format_cpu_list(self.placement.cpus)
+        dimensions = [Dimension("ModelName", model_name),
+                      Dimension("Level", "Worker"),
+                      Dimension("CPUs", cpus),
+                      Dimension("NumaNode", self.placement.node)]
+        logging.info("[METRICS]%s", str(Metric("WorkerCPUs", len(self.placement.cpus), "count", dimensions)))
+        return service, "loaded model {} on cpus {} numa node {}".format(model_name, cpus, self.placement.node), 200
+
+    def set_threads(self, threads):
+        """
+        Size the operator thread pools with the threadsPerWorker performance hint of the model, unless they are sized
+        in the environment of the worker, within the CPUs of the worker. The thread pools are created once the model
+        imports MXNet.
+
+        :param threads:
+        :return:
+        """
+        if self.placement is not None:
+            threads = min(threads, len(self.placement.cpus))
+        for name in self.default_thread_env:
+            os.environ[name] = str(threads)
+
+    def start_profiler(self, profile_request, service):
+        """
+        Expected command
+        {
+            "command" : "profile", string
+            "batches" : number of batches to profile, int
+            "profileDir" : "/path/to/trace/dir", string
+            "profiler" : "mxnet" for operator traces or "python" for sampled python stacks, string
+        }
+
+        :param profile_request:
+        :param service:
+        :return:
+        """
+        if service is None:
+            return "no model loaded", 400
+
+        profiler = self.profilers.get(profile_request.get("profiler", b"mxnet").decode() or "mxnet")
+        if profiler is None:
+            return "unknown profiler {}".format(profile_request["profiler"].decode()), 400
+
+        batches = profile_request["batches"]
+        profile_dir = profile_request["profileDir"].decode() or os.getcwd()
+        try:
+            filename = profiler.start(service.context.model_name, batches, profile_dir)
+        except (ValueError, RuntimeError, OSError) as e:
+            return str(e), 400
+        return "profiling next {} batches to {}".format(batches, filename), 200
 
     def handle_connection(self, cl_socket):
         """
@@ -101,13 +182,25 @@ class MXNetModelServiceWorker(object):
         while True:
             cmd, msg = retrieve_msg(cl_socket)
             if cmd == b'I':
-                resp = service.predict(msg)
+                for profiler in self.profilers.values():
+                    profiler.before_batch()
+                try:
+                    resp = service.predict(msg)
+                except Exception:
+                    # the worker exits, the sampling timer must not keep firing meanwhile
+                    self.profilers["python"].stop()
+                    raise
+                for profiler in self.profilers.values():
+                    profiler.after_batch()
                 cl_socket.send(resp)
             elif cmd == b'L':
                 service, result, code = self.load_model(msg)
                 resp = bytearray()
                 resp += create_load_model_response(code, result)
                 cl_socket.send(resp)
+            elif cmd == b'P':
+                result, code = self.start_profiler(msg, service)
+                cl_socket.send(create_load_model_response(code, result))
             else:
                 raise ValueError("Received unknown command: {}".format(cmd))
 
@@ -128,13 +221,18 @@ class MXNetModelServiceWorker(object):
         logging.info("[PID]%d", os.getpid())
         logging.info("MXNet worker started.")
 
-        while True:
-            (cl_socket, _) = self.sock.accept()
-            # workaround error(35, 'Resource temporarily unavailable') on OSX
-            cl_socket.setblocking(True)
+        try:
+            while True:
+                (cl_socket, _) = self.sock.accept()
+                # workaround error(35, 'Resource temporarily unavailable') on OSX
+                cl_socket.setblocking(True)
 
-            logging.info("Connection accepted: %s.", cl_socket.getsockname())
-            self.handle_connection(cl_socket)
+                logging.info("Connection accepted: %s.", cl_socket.getsockname())
+                self.handle_connection(cl_socket)
+        finally:
+            # emit the summaries of the last interval
+            if self.metrics_aggregator is not None:
+                self.metrics_aggregator.stop()
 
 
 if __name__ == "__main__":
@@ -148,7 +246,8 @@ if __name__ == "__main__":
         host = args.host
         port = args.port
 
-        worker = MXNetModelServiceWorker(sock_type, socket_name, host, port)
+        worker = MXNetModelServiceWorker(sock_type, socket_name, host, port, args.cpu_slot, args.cpus_per_worker,
+                                         args.metrics_interval, args.prometheus_dir)
         worker.run_server()
     except socket.timeout:
         logging.error("Backend worker did not receive connection in: %d", SOCKET_ACCEPT_TIMEOUT)
@@ -25,6 +25,7 @@ int_size = 4
 END_OF_LIST = -1
 LOAD_MSG = b'L'
 PREDICT_MSG = b'I'
+PROFILE_MSG = b'P'
 RESPONSE = 3
 
 
@@ -40,6 +41,8 @@ def retrieve_msg(conn):
         msg = _retrieve_load_msg(conn)
     elif cmd == PREDICT_MSG:
         msg = _retrieve_inference_msg(conn)
+    elif cmd == PROFILE_MSG:
+        msg = _retrieve_profile_msg(conn)
     else:
         raise ValueError("Invalid command: {}".format(cmd))
 
@@ -168,6 +171,28 @@ def _retrieve_load_msg(conn):
     return msg
 
 
+def _retrieve_profile_msg(conn):
+    """
+    MSG Frame Format:
+
+    | cmd value |
+    | int batches |
+    | int profile-dir length | profile-dir value |
+    | int profiler length | profiler value |
+
+    :param conn:
+    :return:
+    """
+    msg = dict()
+    msg["batches"] = _retrieve_int(conn)
+    length = _retrieve_int(conn)
+    msg["profileDir"] = _retrieve_buffer(conn, length)
+    length = _retrieve_int(conn)
+    msg["profiler"] = _retrieve_buffer(conn, length)
+
+    return msg
+
+
 def _retrieve_inference_msg(conn):
     """
     MSG Frame Format:
@@ -33,6 +33,7 @@ class Service(object):
     def __init__(self, model_name, model_dir, manifest, entry_point, gpu, batch_size):
         self._context = Context(model_name, model_dir, manifest, batch_size, gpu, mms.__version__)
         self._entry_point = entry_point
+        self.metrics_aggregator = None
 
     @property
     def context(self):
@@ -111,9 +112,15 @@ class Service(object):
 
         duration = int((time.time() - start_time) * 1000)
         metrics.add_time(PREDICTION_METRIC, duration)
-        emit_metrics(metrics.store)
 
-        return create_predict_response(ret, req_id_map, "Prediction success", 200)
+        with self.context.stage("Serialize"):
+            response = create_predict_response(ret, req_id_map, "Prediction success", 200)
+        if self.metrics_aggregator is not None:
+            self.metrics_aggregator.record(metrics.store)
+        else:
+            emit_metrics(metrics.store)
+
+        return response
 
 
 def emit_metrics(metrics):
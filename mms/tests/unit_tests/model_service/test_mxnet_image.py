@@ -52,6 +52,20 @@ class TestMXNetImageUtils(unittest.TestCase):
         output2 = image.read(input_buf2, flag=0)
         assert output2.shape == (128, 128, 1), "Read method failed. Got %s shape." % (str(output2.shape))
 
+    def test_read_downscaled(self):
+        input1 = mx.nd.random.uniform(0, 255, shape=(3, 1024, 1024))
+        input_buf1 = self._write_image(input1)
+        output1 = image.read_downscaled(input_buf1, 224, 224)
+        assert output1.shape == (256, 256, 3), "read_downscaled method failed. Got %s shape." % (str(output1.shape))
+
+        input2 = mx.nd.random.uniform(0, 255, shape=(1, 512, 512))
+        input_buf2 = self._write_image(input2, flag=0)
+        output2 = image.read_downscaled(input_buf2, 300, 300, flag=0)
+        assert output2.shape == (512, 512, 1), "read_downscaled method failed. Got %s shape." % (str(output2.shape))
+
+        output3 = image.read_downscaled(input_buf1, 1024, 1024)
+        assert output3.shape == (1024, 1024, 3), "read_downscaled method failed. Got %s shape." % (str(output3.shape))
+
     def test_write(self):
         input1 = mx.nd.random.uniform(0, 255, shape=(3, 256, 256))
         output1 = image.write(input1)
@@ -79,6 +93,7 @@ class TestMXNetImageUtils(unittest.TestCase):
     def runTest(self):
         self.test_transform_shape()
         self.test_read()
+        self.test_read_downscaled()
         self.test_write()
         self.test_resize()
         self.test_fix_crop()
@@ -12,9 +12,11 @@ import os
 import sys
 curr_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(curr_path + '/../../..')
+sys.path.append(curr_path + '/../../../../examples/model_service_template')
 
 import unittest
 import utils.mxnet.nlp as nlp
+from mxnet_utils import nlp as example_nlp
 
 from random import randint
 
@@ -48,4 +50,42 @@ class TestMXNetNLPUtils(unittest.TestCase):
             assert databatch.data[0].shape[1] in buckets, "pad_sentence failed. Padded sentence has length %d." \
                                                           % (databatch.data[0].shape[1])
 
+    def test_encode_sentences_batch(self):
+        vocab = {}
+        for i in range(100):
+            vocab['word%d' % (i)] = i
+        frozen_vocab = nlp.freeze_vocab(vocab)
+        sentences = [['word0', 'word56', 'unknown', 'word10'], [], ['word99']]
+        res = nlp.encode_sentences_batch(sentences, frozen_vocab, invalid_label=-1)
+        assert [list(r) for r in res] == [[0, 56, -1, 10], [], [99]], \
+            "encode_sentences_batch method failed. Result vector invalid."
+        assert len(vocab) == 100, "encode_sentences_batch method failed. Vocab must not grow."
+        assert nlp.encode_sentences_batch([], frozen_vocab) == [], \
+            "encode_sentences_batch method failed. Empty batch must have no sentences."
+
+    def test_encode_sentences_batch_of_example(self):
+        frozen_vocab = example_nlp.freeze_vocab({'word0': 0, 'word1': 1})
+        res = example_nlp.encode_sentences_batch([['word1', 'unknown'], []], frozen_vocab)
+        assert [list(r) for r in res] == [[1, -1], []], \
+            "encode_sentences_batch of the example failed. Result vector invalid."
+        assert example_nlp.encode_sentences_batch([], frozen_vocab) == [], \
+            "encode_sentences_batch of the example failed. Empty batch must have no sentences."
+
+    def test_pad_sentences(self):
+        buckets = [10, 20, 30, 40, 50, 60]
+        sentences = [[i for i in range(randint(1, 60))] for _ in range(8)]
+        batches = nlp.pad_sentences(sentences, buckets)
+        seen = []
+        for databatch in batches:
+            data = databatch.data[0].asnumpy()
+            assert data.shape == (len(databatch.index), databatch.bucket_key), \
+                "pad_sentences failed. Padded batch has shape %s." % (str(data.shape))
+            for row, idx in zip(data, databatch.index):
+                sent = sentences[idx]
+                assert list(row[:len(sent)]) == sent and (row[len(sent):] == -1).all(), \
+                    "pad_sentences failed. Padded sentence invalid."
+                seen.append(idx)
+        assert sorted(seen) == list(range(len(sentences))), "pad_sentences failed. Sentences lost."
 
+        with self.assertRaises(ValueError):
+            nlp.pad_sentences([[0] * 61], buckets)
@@ -10,18 +10,11 @@ logging.basicConfig(stream=sys.stdout, format="%(message)s", level=logging.INFO)
 
 
 def get_model_key(name, unit, req_id, model_name):
-    dimensions = list()
-    dimensions.append(Dimension("ModelName", model_name))
-    dimensions.append(Dimension("Level", "Model"))
-    dim_str = [name, unit, str(req_id)] + [str(d) for d in dimensions]
-    return '-'.join(dim_str)
+    return (name, unit, (("ModelName", model_name), ("Level", "Model"))), req_id
 
 
 def get_error_key(name, unit):
-    dimensions = list()
-    dimensions.append(Dimension("Level", "Error"))
-    dim_str = [name, unit, 'None'] + [str(d) for d in dimensions]
-    return '-'.join(dim_str)
+    return (name, unit, (("Level", "Error"),)), None
 
 
 def test_metrics(caplog):
@@ -29,6 +22,7 @@ def test_metrics(caplog):
     Test if metric classes methods behave as expected
     Also checks global metric service methods
     """
+    caplog.set_level(logging.INFO)
     # Create a batch of request ids
     request_ids = {0: 'abcd', 1: "xyz", 2: "qwerty", 3: "hjshfj"}
     all_req_ids = ','.join(request_ids.values())
@@ -97,3 +91,37 @@ def test_metrics(caplog):
     metrics.add_error('CorrectError', 'Wrong values')
     test_metric = metrics.cache[get_error_key('CorrectError', '')]
     assert test_metric.value == 'Wrong values'
+
+
+def test_dimensions_are_not_modified():
+    metrics = MetricsStore({0: 'abcd'}, "dummy model")
+    dimensions = [Dimension("Stage", "Preprocess")]
+    metrics.add_time('StageTime', 5, dimensions=dimensions)
+    assert [str(d) for d in dimensions] == ["Stage:Preprocess"]
+    assert [str(d) for d in metrics.store[0].dimensions] == \
+        ["Stage:Preprocess", "ModelName:dummy model", "Level:Model"]
+
+
+def test_series_are_interned_across_batches():
+    first = MetricsStore({0: 'abcd'}, "interned model")
+    second = MetricsStore({0: 'xyz'}, "interned model")
+    first.add_time('PredictionTime', 5)
+    second.add_time('PredictionTime', 6)
+    assert list(first.cache)[0][0] is list(second.cache)[0][0]
+
+
+def test_requests_keep_their_observations():
+    metrics = MetricsStore({0: 'abcd', 1: 'xyz'}, "dummy model")
+    metrics.add_time('PredictionTime', 5, 0)
+    metrics.add_time('PredictionTime', 7, 1)
+    assert [(m.value, m.request_id) for m in metrics.store] == [(5, 'abcd'), (7, 'xyz')]
+
+
+def test_series_limit(mocker):
+    mocker.patch("mms.metrics.metrics_store.MAX_SERIES_PER_MODEL", 2)
+    metrics = MetricsStore({0: 'abcd'}, "capped model")
+    for i in range(3):
+        metrics.add_counter('Counter', 1, dimensions=[Dimension("Index", i)])
+    assert len(metrics.store) == 2
+    metrics.add_counter('Counter', 1, dimensions=[Dimension("Index", 0)])
+    assert metrics.store[0].value == 2
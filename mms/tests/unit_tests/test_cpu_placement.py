@@ -0,0 +1,77 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Tests for CPU and NUMA placement of backend workers
+"""
+
+import os
+from collections import OrderedDict
+
+import pytest
+
+from mms.utils import cpu_placement
+
+TOPOLOGY = OrderedDict([(0, list(range(0, 8))), (1, list(range(8, 16)))])
+
+
+def test_parse_cpu_list():
+    assert cpu_placement.parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert cpu_placement.parse_cpu_list("") == []
+
+
+def test_format_cpu_list():
+    assert cpu_placement.format_cpu_list([11, 0, 1, 2, 3, 8, 10]) == "0-3,8,10-11"
+    assert cpu_placement.format_cpu_list([5]) == "5"
+
+
+def test_assign_alternates_nodes():
+    placements = [cpu_placement.assign(slot, 4, TOPOLOGY) for slot in range(4)]
+    assert [p.node for p in placements] == [0, 1, 0, 1]
+    assert [p.cpus for p in placements] == [[0, 1, 2, 3], [8, 9, 10, 11], [4, 5, 6, 7], [12, 13, 14, 15]]
+
+
+def test_assign_wraps_around():
+    assert cpu_placement.assign(4, 4, TOPOLOGY) == cpu_placement.assign(0, 4, TOPOLOGY)._replace(slot=4)
+
+
+def test_assign_larger_than_node():
+    placement = cpu_placement.assign(1, 16, TOPOLOGY)
+    assert placement.node == 1
+    assert placement.cpus == list(range(8, 16))
+
+
+def test_assign_invalid():
+    with pytest.raises(ValueError, match="Invalid cpu slot.*"):
+        cpu_placement.assign(-1, 1, TOPOLOGY)
+    with pytest.raises(ValueError, match="Invalid cpus per worker.*"):
+        cpu_placement.assign(0, 0, TOPOLOGY)
+
+
+def test_numa_topology(tmpdir, mocker):
+    mocker.patch('mms.utils.cpu_placement.available_cpus', return_value=list(range(6)))
+    for node, cpu_list in (("node0", "0-3"), ("node1", "4-7"), ("node2", "")):
+        tmpdir.mkdir(node).join("cpulist").write(cpu_list)
+
+    topology = cpu_placement.numa_topology(str(tmpdir))
+    assert topology == OrderedDict([(0, [0, 1, 2, 3]), (1, [4, 5])])
+
+
+def test_numa_topology_without_sysfs(tmpdir, mocker):
+    mocker.patch('mms.utils.cpu_placement.available_cpus', return_value=[0, 1])
+    assert cpu_placement.numa_topology(os.path.join(str(tmpdir), "missing")) == {0: [0, 1]}
+
+
+def test_set_thread_env(mocker):
+    mocker.patch.dict(os.environ, {"OMP_NUM_THREADS": "2"})
+    os.environ.pop("MXNET_OMP_MAX_THREADS", None)
+    cpu_placement.set_thread_env(cpu_placement.CpuPlacement(0, [0, 1, 2, 3], 0))
+    assert os.environ["OMP_NUM_THREADS"] == "2"
+    assert os.environ["MXNET_OMP_MAX_THREADS"] == "4"
@@ -0,0 +1,73 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Tests for in-worker metric aggregation
+"""
+
+import pytest
+
+from mms.metrics.metric_aggregator import Histogram, MetricAggregator
+from mms.metrics.metrics_store import MetricsStore
+
+
+def summary_by_stat(aggregator):
+    return {(m.name, str(m.dimensions[-1])): m for m in aggregator.summary()}
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.add(value)
+
+    assert histogram.count == 1000
+    assert histogram.percentile(50) == pytest.approx(500, rel=0.1)
+    assert histogram.percentile(99) == pytest.approx(990, rel=0.1)
+    assert histogram.percentile(100) == 1000
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_histogram_single_value():
+    histogram = Histogram()
+    histogram.add(42)
+    assert histogram.percentile(50) == 42
+    assert histogram.percentile(99) == 42
+
+
+def test_aggregate_batches():
+    aggregator = MetricAggregator()
+    for i in range(100):
+        metrics = MetricsStore({0: "req-{}".format(i)}, "model")
+        metrics.add_time("PredictionTime", i + 1)
+        metrics.add_counter("Requests", 1)
+        metrics.add_metric("QueueDepth", i, unit="count")
+        aggregator.record(metrics.store)
+
+    summary = summary_by_stat(aggregator)
+    assert summary[("PredictionTime", "Stat:Count")].value == 100
+    assert summary[("PredictionTime", "Stat:P50")].value == pytest.approx(50, rel=0.1)
+    assert summary[("PredictionTime", "Stat:Max")].value == 100
+    assert summary[("PredictionTime", "Stat:P99")].unit == "Milliseconds"
+    assert summary[("Requests", "Level:Model")].value == 100
+    assert summary[("QueueDepth", "Level:Model")].value == 99
+    assert all(m.request_id is None for m in summary.values())
+
+    assert aggregator.summary() == []
+
+
+def test_error_metrics_logged_right_away(mocker):
+    logger = mocker.patch("mms.metrics.metric_aggregator.logger")
+    aggregator = MetricAggregator()
+    metrics = MetricsStore({0: "req"}, "model")
+    metrics.add_error("Failure", "out of memory")
+    aggregator.record(metrics.store)
+
+    logger.info.assert_called_once()
+    assert aggregator.summary() == []
@@ -12,6 +12,8 @@
 ModelServiceWorker is the worker that is started by the MMS front-end.
 """
 
+import os
+import signal
 import socket
 from collections import namedtuple
 
@@ -21,6 +23,7 @@ from mock import Mock
 
 from mms.model_service_worker import MXNetModelServiceWorker
 from mms.service import Service
+from mms.utils.cpu_placement import CpuPlacement
 
 
 @pytest.fixture()
@@ -77,6 +80,15 @@ class TestInit:
         patches.remove.assert_called_once_with(self.socket_name)
         patches.socket.assert_called_once_with(socket.AF_UNIX, socket.SOCK_STREAM)
 
+    def test_cpu_slot(self, patches, mocker):
+        apply = mocker.patch('mms.utils.cpu_placement.apply', return_value=True)
+        mocker.patch('mms.utils.cpu_placement.set_thread_env')
+        mocker.patch('mms.utils.cpu_placement.numa_topology', return_value={0: [0, 1, 2, 3]})
+
+        worker = MXNetModelServiceWorker('unix', self.socket_name, cpu_slot=1, cpus_per_worker=2)
+        assert worker.placement == CpuPlacement(1, [2, 3], 0)
+        apply.assert_called_once_with(worker.placement)
+
 
 # noinspection PyClassHasNoInit
 class TestRunServer:
@@ -121,6 +133,14 @@ class TestRunServer:
             model_service_worker.run_server()
         model_service_worker.sock.accept.assert_called_once()
 
+    def test_metrics_are_flushed_on_exit(self, model_service_worker):
+        model_service_worker.sock.accept.return_value = self.accept_result
+        model_service_worker.sock.recv.return_value = b""
+        model_service_worker.metrics_aggregator = Mock()
+        with pytest.raises(SystemExit):
+            model_service_worker.run_server()
+        model_service_worker.metrics_aggregator.stop.assert_called_once()
+
 
 # noinspection PyClassHasNoInit
 class TestLoadModel:
@@ -148,6 +168,24 @@ class TestLoadModel:
             data['gpu'] = gpu[0]
             model_service_worker.load_model(data)
 
+    def test_load_model_with_placement(self, patches, model_service_worker):
+        model_service_worker.placement = CpuPlacement(1, [4, 5, 6, 7], 1)
+        _, result, code = model_service_worker.load_model(self.data)
+        assert code == 200
+        assert result == "loaded model name on cpus 4-7 numa node 1"
+
+    def test_load_model_with_threads_hint(self, patches, model_service_worker, mocker):
+        mocker.patch('mms.model_service_worker.read_performance_hints', return_value={'threadsPerWorker': 3})
+        mocker.patch.dict(os.environ, {'OMP_NUM_THREADS': '1', 'MXNET_OMP_MAX_THREADS': '8'})
+        model_service_worker.default_thread_env = ['OMP_NUM_THREADS']
+        model_service_worker.load_model(self.data)
+        assert os.environ['OMP_NUM_THREADS'] == '3'
+        assert os.environ['MXNET_OMP_MAX_THREADS'] == '8'
+
+        model_service_worker.placement = CpuPlacement(1, [4, 5], 1)
+        model_service_worker.load_model(self.data)
+        assert os.environ['OMP_NUM_THREADS'] == '2'
+
 
 # noinspection PyClassHasNoInit
 class TestHandleConnection:
@@ -172,3 +210,59 @@ class TestHandleConnection:
             model_service_worker.handle_connection(cl_socket)
 
         cl_socket.send.assert_called()
+
+    def test_profile_batches(self, patches, model_service_worker, tmpdir, mocker):
+        patches.retrieve_msg.side_effect = [(b"L", ""), (b"P", {"batches": 2, "profileDir": str(tmpdir).encode()}),
+                                            (b"I", ""), (b"I", ""), (b"I", ""), (b"U", "")]
+        model_service_worker.load_model = Mock()
+        service = Mock()
+        service.context.model_name = "name"
+        model_service_worker.load_model.return_value = (service, "", 200)
+        mx = mocker.patch.dict("sys.modules", {"mxnet": Mock()})["mxnet"]
+
+        with pytest.raises(ValueError, match=r"Received unknown command.*"):
+            model_service_worker.handle_connection(Mock())
+
+        mx.profiler.set_state.assert_has_calls([mock.call("run"), mock.call("stop")])
+        mx.profiler.dump.assert_called_once()
+        assert model_service_worker.profilers["mxnet"].filename.startswith(str(tmpdir.join("name-")))
+        assert service.predict.call_count == 3
+
+    def test_profile_python(self, patches, model_service_worker, tmpdir):
+        patches.retrieve_msg.side_effect = [(b"L", ""),
+                                            (b"P", {"batches": 1, "profileDir": str(tmpdir).encode(),
+                                                    "profiler": b"python"}),
+                                            (b"I", ""), (b"U", "")]
+        model_service_worker.load_model = Mock()
+        service = Mock()
+        service.context.model_name = "name"
+        model_service_worker.load_model.return_value = (service, "", 200)
+
+        with pytest.raises(ValueError, match=r"Received unknown command.*"):
+            model_service_worker.handle_connection(Mock())
+
+        assert os.path.exists(model_service_worker.profilers["python"].filename)
+
+    def test_profile_python_failed_batch(self, patches, model_service_worker, tmpdir):
+        patches.retrieve_msg.side_effect = [(b"L", ""),
+                                            (b"P", {"batches": 2, "profileDir": str(tmpdir).encode(),
+                                                    "profiler": b"python"}),
+                                            (b"I", "")]
+        model_service_worker.load_model = Mock()
+        service = Mock()
+        service.context.model_name = "name"
+        service.predict.side_effect = RuntimeError("predict failed")
+        model_service_worker.load_model.return_value = (service, "", 200)
+
+        with pytest.raises(RuntimeError, match=r"predict failed"):
+            model_service_worker.handle_connection(Mock())
+
+        assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+        assert signal.getsignal(signal.SIGPROF) == signal.SIG_DFL
+
+    def test_profile_unknown(self, model_service_worker):
+        service = Mock()
+        result, code = model_service_worker.start_profiler(
+            {"batches": 1, "profileDir": b"", "profiler": b"java"}, service)
+        assert code == 400
+        assert result == "unknown profiler java"
@@ -74,6 +74,18 @@ class TestOtfCodecHandler:
         assert cmd == b"L"
         assert ret == expected
 
+    def test_retrieve_msg_profile(self, socket_patches):
+        socket_patches.socket.recv.side_effect = [
+            b"P",
+            b"\x00\x00\x00\x05",
+            b"\x00\x00\x00\x04", b"logs",
+            b"\x00\x00\x00\x06", b"python"
+        ]
+        cmd, ret = codec.retrieve_msg(socket_patches.socket)
+
+        assert cmd == b"P"
+        assert ret == {"batches": 5, "profileDir": b"logs", "profiler": b"python"}
+
     def test_retrieve_msg_predict(self, socket_patches):
         expected = [{
             "requestId": b"request_id", "headers": [], "parameters": [
@@ -0,0 +1,70 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Tests for worker process metrics of the metric collector
+"""
+
+import os
+
+import psutil
+import pytest
+
+from mms.metrics import process_memory_metric
+
+
+@pytest.fixture()
+def processes(mocker):
+    mocker.patch.dict(process_memory_metric.previous_counters, clear=True)
+    return mocker.patch.dict(process_memory_metric.processes, clear=True)
+
+
+def test_process_handles_are_cached(processes):
+    pid = os.getpid()
+    process = process_memory_metric.get_process(pid)
+    assert process_memory_metric.get_process(pid) is process
+    assert process_memory_metric.get_memory_usage(pid) > 0
+
+
+def test_parse_workers_drops_stale_processes(processes, mocker):
+    process_memory_metric.processes[-1] = mocker.Mock()
+    process_memory_metric.processes[os.getpid()] = mocker.Mock()
+
+    workers = process_memory_metric.parse_workers("{}:resnet,1:squeezenet\n".format(os.getpid()))
+    assert list(workers.items()) == [(os.getpid(), "resnet"), (1, "squeezenet")]
+    assert list(process_memory_metric.processes) == [os.getpid()]
+
+
+def test_worker_metrics(processes):
+    pid = os.getpid()
+    first = {m.name: m for m in process_memory_metric.get_worker_metrics(pid, "resnet")}
+    assert {"WorkerCPUTime", "WorkerThreads", "WorkerFileDescriptors"} <= set(first)
+    assert "WorkerIntervalCPUTime" not in first
+    assert [str(d) for d in first["WorkerThreads"].dimensions] == \
+        ["ModelName:resnet", "Level:Worker", "Pid:{}".format(pid)]
+
+    second = {m.name: m for m in process_memory_metric.get_worker_metrics(pid, "resnet")}
+    assert second["WorkerIntervalCPUTime"].value >= 0
+    assert second["WorkerContextSwitches"].value >= 0
+
+
+def test_unreadable_workers_are_skipped(processes, mocker):
+    pid = os.getpid()
+    get_worker_metrics = process_memory_metric.get_worker_metrics
+    errors = {1: psutil.AccessDenied(1), 2: psutil.ZombieProcess(2), 3: psutil.NoSuchProcess(3)}
+
+    def worker_metrics(worker_pid, model_name):
+        if worker_pid in errors:
+            raise errors[worker_pid]
+        return get_worker_metrics(worker_pid, model_name)
+
+    mocker.patch.object(process_memory_metric, "get_worker_metrics", side_effect=worker_metrics)
+    metrics = process_memory_metric.check_worker_metrics({1: "a", 2: "b", 3: "c", pid: "resnet"})
+    assert metrics and all(str(m.dimensions[2]) == "Pid:{}".format(pid) for m in metrics)
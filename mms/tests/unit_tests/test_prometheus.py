@@ -0,0 +1,107 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Tests for the Prometheus text exposition of metrics
+"""
+
+import os
+
+from mms.metrics import prometheus
+from mms.metrics.dimension import Dimension
+from mms.metrics.metric import Metric
+from mms.metrics.metric_aggregator import MetricAggregator
+from mms.metrics.metrics_store import MetricsStore
+
+
+def test_histogram():
+    registry = prometheus.PrometheusRegistry(labels={"pid": 42})
+    for i, value in enumerate((0.5, 3, 3, 20000)):
+        metrics = MetricsStore({0: "request-{}".format(i)}, "resnet")
+        metrics.add_time("PredictionTime", value)
+        registry.record(metrics.store[0])
+
+    lines = registry.exposition().splitlines()
+    assert "# TYPE mms_prediction_time_milliseconds histogram" in lines
+    assert 'mms_prediction_time_milliseconds_bucket{model="resnet",pid="42",le="1"} 1' in lines
+    assert 'mms_prediction_time_milliseconds_bucket{model="resnet",pid="42",le="5"} 3' in lines
+    assert 'mms_prediction_time_milliseconds_bucket{model="resnet",pid="42",le="10000"} 3' in lines
+    assert 'mms_prediction_time_milliseconds_bucket{model="resnet",pid="42",le="+Inf"} 4' in lines
+    assert 'mms_prediction_time_milliseconds_sum{model="resnet",pid="42"} 20006.5' in lines
+    assert 'mms_prediction_time_milliseconds_count{model="resnet",pid="42"} 4' in lines
+    assert "request" not in registry.exposition()
+
+
+def test_stage_labels():
+    registry = prometheus.PrometheusRegistry()
+    registry.record(Metric("InferenceTime", 7, "ms", [Dimension("BatchSize", 8), Dimension("ModelName", "m"),
+                                                     Dimension("Level", "Model")], "request"))
+    assert 'mms_stage_time_milliseconds_count{model="m",pid="",stage="Inference",batch_size="8"} 1' in \
+        registry.exposition().splitlines()
+
+
+def test_unknown_metrics_are_ignored():
+    registry = prometheus.PrometheusRegistry()
+    registry.record(Metric("CustomLoopCount", 7, "count", [Dimension("ModelName", "m")]))
+    assert registry.exposition() == ""
+
+
+def test_gauges_counters_and_removal():
+    registry = prometheus.PrometheusRegistry()
+    dims = [Dimension("ModelName", "m"), Dimension("Level", "Worker"), Dimension("Pid", 7)]
+    registry.record(Metric("WorkerThreads", 4, "count", dims))
+    registry.record(Metric("WorkerContextSwitches", 10, "count", dims))
+    registry.record(Metric("WorkerContextSwitches", 5, "count", dims))
+    registry.record(Metric("CPUUtilization", 12.5, "percent", [Dimension("Level", "Host")]))
+
+    lines = registry.exposition().splitlines()
+    assert 'mms_worker_threads{model="m",pid="7"} 4' in lines
+    assert 'mms_worker_context_switches_total{model="m",pid="7"} 15' in lines
+    assert "mms_host_cpu_utilization_percent 12.5" in lines
+
+    registry.remove("pid", [8])
+    assert "pid=" not in registry.exposition()
+    assert "mms_host_cpu_utilization_percent 12.5" in registry.exposition()
+
+
+def test_series_cap(mocker):
+    mocker.patch("mms.metrics.prometheus.MAX_SERIES_PER_FAMILY", 2)
+    registry = prometheus.PrometheusRegistry()
+    for model in ("a", "b", "c"):
+        registry.record(Metric("WorkerThreads", 1, "count", [Dimension("ModelName", model)]))
+    assert len(registry.families["mms_worker_threads"].series) == 2
+
+
+def test_label_escaping():
+    registry = prometheus.PrometheusRegistry()
+    registry.record(Metric("WorkerThreads", 1, "count", [Dimension("ModelName", 'a"b\\c')]))
+    assert 'model="a\\"b\\\\c"' in registry.exposition()
+
+
+def test_aggregator_writes_file(tmpdir):
+    prometheus_file = prometheus.worker_file(str(tmpdir), os.getpid())
+    aggregator = MetricAggregator(prometheus_file=prometheus_file)
+    metrics = MetricsStore({0: "request"}, "resnet")
+    metrics.add_time("PredictionTime", 12)
+    aggregator.record(metrics.store)
+    aggregator.flush()
+
+    assert os.listdir(str(tmpdir)) == [os.path.basename(prometheus_file)]
+    with open(prometheus_file) as f:
+        assert 'mms_prediction_time_milliseconds_count{{model="resnet",pid="{}"}} 1'.format(os.getpid()) in f.read()
+
+
+def test_remove_stale_worker_files(tmpdir):
+    for pid in (os.getpid(), 999999999):
+        tmpdir.join("mms-worker-{}.prom".format(pid)).write("")
+    tmpdir.join("other.prom").write("")
+
+    prometheus.remove_stale_worker_files(str(tmpdir), [])
+    assert sorted(os.listdir(str(tmpdir))) == ["mms-worker-{}.prom".format(os.getpid()), "other.prom"]
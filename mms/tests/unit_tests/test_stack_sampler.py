@@ -0,0 +1,70 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Tests for the sampling python profiler
+"""
+
+import signal
+import time
+
+import pytest
+
+from mms.utils.stack_sampler import StackSampler
+
+
+def busy_loop(seconds):
+    end = time.time() + seconds
+    total = 0
+    while time.time() < end:
+        total += sum(range(100))
+    return total
+
+
+def test_sample_batches(tmpdir):
+    sampler = StackSampler(interval=0.001)
+    filename = sampler.start("model", 2, str(tmpdir))
+    assert filename.startswith(str(tmpdir.join("model-")))
+    assert filename.endswith(".folded")
+
+    for _ in range(2):
+        sampler.before_batch()
+        busy_loop(0.1)
+        sampler.after_batch()
+
+    assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+    lines = tmpdir.join(filename.split("/")[-1]).read().splitlines()
+    assert lines
+    assert all(line.startswith("model;") for line in lines)
+    assert any("busy_loop (test_stack_sampler.py:" in line for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) > 0
+
+
+def test_not_armed():
+    sampler = StackSampler()
+    sampler.before_batch()
+    sampler.after_batch()
+    assert not sampler.stacks
+    assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+
+
+def test_invalid_batches(tmpdir):
+    with pytest.raises(ValueError, match="Invalid number of batches.*"):
+        StackSampler().start("model", 0, str(tmpdir))
+
+
+def test_stop(tmpdir):
+    sampler = StackSampler()
+    sampler.start("model", 2, str(tmpdir))
+    sampler.before_batch()
+    sampler.stop()
+    assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+    assert signal.getsignal(signal.SIGPROF) == signal.SIG_DFL
+    sampler.stop()
@@ -0,0 +1,117 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Tests for the workers x threads tuning mode
+"""
+
+import json
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from mms.tuner import TuneResult, candidate_configs, percentile, recommend, synthetic_input, tune, write_config
+
+ECHO_SERVICE = """
+def handle(data, context):
+    if data is None:
+        return None
+    return ["ok" for _ in data]
+"""
+
+# dies on the first request after the warm-up requests
+DYING_SERVICE = """
+import os
+calls = []
+def handle(data, context):
+    if data is None:
+        return None
+    calls.append(1)
+    if len(calls) > 5:
+        os._exit(1)
+    return ["ok" for _ in data]
+"""
+
+
+def test_candidate_configs():
+    assert candidate_configs(1) == [(1, 1)]
+    assert candidate_configs(6) == [(1, 1), (2, 1), (4, 1), (6, 1), (1, 2), (2, 2), (3, 2), (1, 4)]
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 51
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+
+def test_recommend():
+    results = [TuneResult(8, 1, 100.0, 10.0, 80.0),
+               TuneResult(4, 2, 90.0, 8.0, 20.0),
+               TuneResult(2, 4, 90.0, 6.0, 15.0)]
+    assert recommend(results) == results[0]
+    assert recommend(results, max_p99=50) == results[2]
+    assert recommend(results, max_p99=1) == results[2]
+
+
+def test_write_config(tmpdir):
+    config = tmpdir.join("config.properties")
+    config.write("# MMS config\ninference_address=http://0.0.0.0:8080\ncpus_per_worker=8\n")
+
+    write_config(str(config), TuneResult(4, 2, 90.0, 8.0, 20.0))
+    assert config.read() == "# MMS config\ninference_address=http://0.0.0.0:8080\ncpus_per_worker=2\n" \
+                            "default_workers_per_model=4\ncpu_affinity=true\n"
+
+
+def test_synthetic_input(tmpdir):
+    tmpdir.join("signature.json").write(json.dumps({
+        "inputs": [{"data_name": "data", "data_shape": [0, 3, 24, 32]}],
+        "input_type": "image/jpeg"
+    }))
+    parameters = synthetic_input(str(tmpdir))
+    assert parameters[0]["name"] == "data"
+    assert Image.open(BytesIO(parameters[0]["value"])).size == (32, 24)
+
+    tmpdir.join("signature.json").write(json.dumps({
+        "inputs": [{"data_name": "data", "data_shape": [1, 2, 3]}],
+        "input_type": "application/json"
+    }))
+    tensor = json.loads(synthetic_input(str(tmpdir))[0]["value"].decode("utf-8"))
+    assert len(tensor) == 1 and len(tensor[0]) == 2 and len(tensor[0][0]) == 3
+
+
+def test_tune(tmpdir, mocker):
+    mocker.patch("mms.utils.cpu_placement.available_cpus", return_value=[0])
+    model_dir = tmpdir.mkdir("model")
+    model_dir.mkdir("MAR-INF").join("MANIFEST.json").write(json.dumps(
+        {"model": {"modelName": "echo", "handler": "tuner_echo_service:handle"}}))
+    model_dir.join("tuner_echo_service.py").write(ECHO_SERVICE)
+    config = tmpdir.join("config.properties")
+
+    best = tune("echo={}".format(model_dir), str(config), duration=1)
+    assert (best.workers, best.threads) == (1, 1)
+    assert best.throughput > 0
+    assert "cpus_per_worker=1" in config.read()
+
+
+def test_tune_worker_dies(tmpdir, mocker, capsys):
+    mocker.patch("mms.utils.cpu_placement.available_cpus", return_value=[0])
+    mocker.patch("mms.tuner.RESULT_TIMEOUT", 1)
+    model_dir = tmpdir.mkdir("model")
+    model_dir.mkdir("MAR-INF").join("MANIFEST.json").write(json.dumps(
+        {"model": {"modelName": "dying", "handler": "tuner_dying_service:handle"}}))
+    model_dir.join("tuner_dying_service.py").write(DYING_SERVICE)
+    config = tmpdir.join("config.properties")
+
+    with pytest.raises(RuntimeError, match="No configuration of model dying could be measured."):
+        tune("dying={}".format(model_dir), str(config), duration=1)
+    assert "failed: Worker did not report its latencies" in capsys.readouterr().out
+    assert not config.check()
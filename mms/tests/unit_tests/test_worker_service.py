@@ -5,6 +5,7 @@ import sys
 import pytest
 
 from mms.context import Context
+from mms.metrics.metric_aggregator import MetricAggregator
 from mms.service import Service
 from mms.service import emit_metrics
 
@@ -28,6 +29,7 @@ class TestService:
         service = object.__new__(Service)
         service._entry_point = mocker.MagicMock(return_value=['prediction'])
         service._context = Context(self.model_name, self.model_dir, self.manifest, 1, 0, '1.0')
+        service.metrics_aggregator = None
         return service
 
     def test_predict(self, service, mocker):
@@ -35,6 +37,26 @@ class TestService:
         service.predict(self.data)
         create_predict_response.assert_called()
 
+    def test_stage_metrics(self, service):
+        service.predict(self.data)
+        metrics = {m.name: m for m in service.context.metrics.store}
+        assert "SerializeTime" in metrics
+        assert "BatchSize:1" in [str(d) for d in metrics["SerializeTime"].dimensions]
+
+    def test_aggregated_metrics(self, service, mocker):
+        emit = mocker.patch("mms.service.emit_metrics")
+        service.metrics_aggregator = MetricAggregator()
+        service.predict(self.data)
+        service.predict(self.data)
+        emit.assert_not_called()
+        assert service.metrics_aggregator.histograms
+
+    def test_stage_without_metrics(self, service):
+        with service.context.stage("Preprocess") as stage:
+            pass
+        assert stage.duration >= 0
+        assert service.context.metrics is None
+
     def test_with_nil_request(self, service):
         with pytest.raises(ValueError, match=r"Received invalid inputs"):
             service.retrieve_data_for_inference(None)
@@ -0,0 +1,324 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Tuning mode of model server.
+
+Sweeps (workers x threads per worker) configurations for one model on the local machine. Every configuration
+runs its workers as pinned processes that load the model and serve synthetic requests built from the model's
+signature.json as fast as they can. The configuration with the best throughput, optionally under a p99 latency
+bound, is written into a config.properties file.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from collections import namedtuple
+
+from mms.utils import cpu_placement
+
+TuneResult = namedtuple("TuneResult", ["workers", "threads", "throughput", "p50", "p99"])
+
+WARMUP_REQUESTS = 5
+LOAD_TIMEOUT = 120
+# seconds a worker may take past the measuring time to finish its last request and report its latencies
+RESULT_TIMEOUT = 60
+
+
+def extract_model(model_path, work_dir):
+    """
+    Return the model directory of a model archive, extracting .mar/.model files into work_dir.
+
+    :param model_path:
+    :param work_dir:
+    :return:
+    """
+    if os.path.isdir(model_path):
+        return os.path.realpath(model_path)
+    if not zipfile.is_zipfile(model_path):
+        raise ValueError("Invalid model archive: {}".format(model_path))
+
+    model_dir = os.path.join(work_dir, "model")
+    with zipfile.ZipFile(model_path) as zf:
+        zf.extractall(model_dir)
+    return model_dir
+
+
+def read_handler(model_dir):
+    """
+    Read the service handler from the model's manifest.
+
+    :param model_dir:
+    :return:
+    """
+    manifest_file = os.path.join(model_dir, "MAR-INF/MANIFEST.json")
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            return json.load(f)["model"]["handler"]
+
+    with open(os.path.join(model_dir, "MANIFEST.json")) as f:
+        return json.load(f)["Model"]["Service"]
+
+
+def synthetic_input(model_dir):
+    """
+    Build one request input from the model's signature.json. Images are random pictures of the input's size,
+    JSON inputs are random tensors of the input's shape.
+
+    :param model_dir:
+    :return: list of request parameters
+    """
+    signature_file = os.path.join(model_dir, "signature.json")
+    if not os.path.exists(signature_file):
+        return [{"name": "data", "value": b"Hello world"}]
+
+    with open(signature_file) as f:
+        signature = json.load(f)
+
+    input_type = signature.get("input_type", "application/json")
+    parameters = []
+    for sig_input in signature["inputs"]:
+        shape = [d if d > 0 else 1 for d in sig_input.get("data_shape", [1])]
+        if input_type.startswith("image/"):
+            from PIL import Image
+
+            height, width = shape[-2:]
+            pixels = bytes(bytearray(random.getrandbits(8) for _ in range(width * height * 3)))
+            buf = io.BytesIO()
+            Image.frombytes("RGB", (width, height), pixels).save(buf, format=input_type[len("image/"):].upper())
+            value = buf.getvalue()
+        elif input_type == "application/json":
+            value = json.dumps(_random_tensor(shape)).encode("utf-8")
+        else:
+            value = b"Hello world"
+        parameters.append({"name": sig_input["data_name"], "value": value})
+    return parameters
+
+
+def _random_tensor(shape):
+    if len(shape) == 1:
+        return [random.random() for _ in range(shape[0])]
+    return [_random_tensor(shape[1:]) for _ in range(shape[0])]
+
+
+def candidate_configs(num_cpus):
+    """
+    (workers, threads) pairs to sweep: powers of two threads per worker, and for each of them powers of two worker
+    counts plus the worker count that fills all CPUs.
+
+    :param num_cpus:
+    :return:
+    """
+    configs = []
+    threads = 1
+    while threads <= num_cpus:
+        max_workers = num_cpus // threads
+        workers = 1
+        while workers < max_workers:
+            configs.append((workers, threads))
+            workers *= 2
+        configs.append((max_workers, threads))
+        threads *= 2
+    return configs
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest rank percentile of an ascending list.
+
+    :param sorted_values:
+    :param pct:
+    :return:
+    """
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _run_worker(slot, threads, model, parameters, duration, ready, start, results):
+    # pylint: disable=broad-except
+    try:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MXNET_OMP_MAX_THREADS"] = str(threads)
+        cpu_placement.apply(cpu_placement.assign(slot, threads))
+
+        from mms.model_loader import ModelLoaderFactory
+
+        model_name, model_dir, handler = model
+        os.chdir(model_dir)
+        sys.path.insert(0, model_dir)
+        model_loader = ModelLoaderFactory.get_model_loader(model_dir)
+        service = model_loader.load(model_name, model_dir, handler, None, 1)
+
+        batch = [{"requestId": b"tune", "parameters": parameters}]
+        for _ in range(WARMUP_REQUESTS):
+            service.predict(batch)
+    except Exception as e:
+        ready.put("Worker failed to load model: {}".format(e))
+        return
+
+    ready.put(None)
+    start.wait()
+    latencies = []
+    end = time.time() + duration
+    while time.time() < end:
+        begin = time.time()
+        service.predict(batch)
+        latencies.append((time.time() - begin) * 1000)
+    results.put(latencies)
+
+
+def measure(workers, threads, model, parameters, duration):
+    """
+    Run one configuration and return its throughput (requests/s) and latency percentiles (ms).
+
+    :param workers: number of worker processes
+    :param threads: CPUs and OpenMP threads per worker
+    :param model: (model_name, model_dir, handler) tuple
+    :param parameters: request parameters sent in every request
+    :param duration: measuring time in seconds, after all workers are warmed up
+    :return: TuneResult
+    :raises RuntimeError: when a worker fails to load the model, or dies or hangs while measuring
+    """
+    ready = multiprocessing.Queue()
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_run_worker,
+                                         args=(slot, threads, model, parameters, duration, ready, start, results))
+                 for slot in range(workers)]
+    for p in processes:
+        p.start()
+
+    completed = False
+    try:
+        for _ in processes:
+            try:
+                error = ready.get(timeout=LOAD_TIMEOUT)
+            except queue.Empty:
+                raise RuntimeError("Worker did not load the model in {} seconds.".format(LOAD_TIMEOUT))
+            if error is not None:
+                raise RuntimeError(error)
+        start.set()
+
+        latencies = []
+        for _ in processes:
+            try:
+                latencies.extend(results.get(timeout=duration + RESULT_TIMEOUT))
+            except queue.Empty:
+                raise RuntimeError("Worker did not report its latencies, it died or hung while measuring.")
+        completed = True
+    finally:
+        for p in processes:
+            if not completed:
+                p.terminate()
+            p.join()
+
+    latencies.sort()
+    return TuneResult(workers, threads, len(latencies) / float(duration),
+                      percentile(latencies, 50), percentile(latencies, 99))
+
+
+def recommend(results, max_p99=None):
+    """
+    Pick the configuration with the highest throughput among those within the p99 bound. Ties prefer fewer
+    workers, which use less memory.
+
+    :param results:
+    :param max_p99:
+    :return:
+    """
+    candidates = [r for r in results if max_p99 is None or r.p99 <= max_p99]
+    if not candidates:
+        candidates = [min(results, key=lambda r: r.p99)]
+    return max(candidates, key=lambda r: (r.throughput, -r.workers))
+
+
+def write_config(config_file, result):
+    """
+    Write the recommended settings into a properties file. Other properties in an existing file are kept.
+
+    :param config_file:
+    :param result:
+    :return:
+    """
+    settings = [("default_workers_per_model", str(result.workers)),
+                ("cpus_per_worker", str(result.threads)),
+                ("cpu_affinity", "true")]
+    lines = []
+    if os.path.exists(config_file):
+        with open(config_file) as f:
+            lines = f.read().splitlines()
+
+    for key, value in settings:
+        entry = "{}={}".format(key, value)
+        for i, line in enumerate(lines):
+            if not line.strip().startswith("#") and line.split("=", 1)[0].strip() == key:
+                lines[i] = entry
+                break
+        else:
+            lines.append(entry)
+
+    with open(config_file, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def tune(model, config_file, duration=10, max_p99=None):
+    """
+    Sweep worker and thread configurations for a model and write the best one into config_file. Configurations
+    that fail are reported and skipped.
+
+    :param model: [model_name=]model_path of a local model archive or directory
+    :param config_file: properties file to write the recommended settings into
+    :param duration: measuring time of each configuration in seconds
+    :param max_p99: optional p99 latency bound in milliseconds
+    :return: recommended TuneResult
+    :raises RuntimeError: when no configuration could be measured
+    """
+    if "=" in model:
+        model_name, model_path = model.split("=", 1)
+    else:
+        model_path = model
+        model_name = os.path.splitext(os.path.basename(model_path.rstrip("/")))[0]
+
+    work_dir = tempfile.mkdtemp(prefix="mms-tune-")
+    try:
+        model_dir = extract_model(model_path, work_dir)
+        handler = read_handler(model_dir)
+        parameters = synthetic_input(model_dir)
+
+        results = []
+        print("{:>8} {:>8} {:>12} {:>10} {:>10}".format("workers", "threads", "requests/s", "p50 (ms)", "p99 (ms)"))
+        for workers, threads in candidate_configs(len(cpu_placement.available_cpus())):
+            try:
+                result = measure(workers, threads, (model_name, model_dir, handler), parameters, duration)
+            except RuntimeError as e:
+                print("{:>8} {:>8} failed: {}".format(workers, threads, e))
+                continue
+            print("{:>8} {:>8} {:>12.1f} {:>10.1f} {:>10.1f}".format(*result))
+            results.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if not results:
+        raise RuntimeError("No configuration of model {} could be measured.".format(model_name))
+    best = recommend(results, max_p99)
+    write_config(config_file, best)
+    print("Recommended: {} workers with {} threads each, written to {}.".format(best.workers, best.threads,
+                                                                            config_file))
+    return best
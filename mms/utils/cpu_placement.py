@@ -0,0 +1,190 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+CPU and NUMA placement of backend workers.
+
+The frontend hands every worker a CPU slot number. Slots are mapped onto the NUMA topology read from sysfs:
+each node's CPUs are cut into disjoint sets of `cpus_per_worker` CPUs and consecutive slots alternate between
+nodes, so workers are spread over all sockets and never share a core.
+"""
+
+import ctypes
+import logging
+import multiprocessing
+import os
+import platform
+from collections import OrderedDict, namedtuple
+
+NODE_DIR = "/sys/devices/system/node"
+
+# set_mempolicy(2) is not exported by glibc, it is called through syscall(2).
+SET_MEMPOLICY_SYSCALL = {"x86_64": 238, "aarch64": 237}
+MPOL_PREFERRED = 1
+
+CpuPlacement = namedtuple("CpuPlacement", ["slot", "cpus", "node"])
+
+# Environment variables sizing the OpenMP and MXNet operator thread pools
+THREAD_ENV_VARIABLES = ("OMP_NUM_THREADS", "MXNET_OMP_MAX_THREADS")
+
+
+def parse_cpu_list(cpu_list):
+    """
+    Parse a kernel cpu list string like "0-3,8,10-11" into a list of CPU ids.
+
+    :param cpu_list:
+    :return:
+    """
+    cpus = []
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus):
+    """
+    Format CPU ids as a compact kernel cpu list string, the inverse of parse_cpu_list.
+
+    :param cpus:
+    :return:
+    """
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(s) if s == e else "{}-{}".format(s, e) for s, e in ranges)
+
+
+def available_cpus():
+    """
+    CPUs this process is allowed to run on.
+
+    :return:
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(multiprocessing.cpu_count()))
+
+
+def numa_topology(node_dir=NODE_DIR):
+    """
+    Map of NUMA node id to the available CPUs on that node. Hosts without NUMA information in sysfs are
+    reported as a single node 0.
+
+    :param node_dir:
+    :return:
+    """
+    allowed = set(available_cpus())
+    topology = OrderedDict()
+    if os.path.isdir(node_dir):
+        nodes = [d for d in os.listdir(node_dir) if d.startswith("node") and d[4:].isdigit()]
+        for node in sorted(nodes, key=lambda d: int(d[4:])):
+            try:
+                with open(os.path.join(node_dir, node, "cpulist")) as f:
+                    cpus = [c for c in parse_cpu_list(f.read()) if c in allowed]
+            except (IOError, OSError, ValueError):
+                continue
+            if cpus:
+                topology[int(node[4:])] = cpus
+
+    if not topology:
+        topology[0] = sorted(allowed)
+    return topology
+
+
+def assign(slot, cpus_per_worker, topology=None):
+    """
+    Compute the CPU set and memory node of a worker slot.
+
+    CPU sets are taken round robin over NUMA nodes. When there are more slots than CPU sets, slots wrap around
+    and share CPU sets.
+
+    :param slot: worker slot number assigned by the frontend
+    :param cpus_per_worker: number of CPUs in each worker's set
+    :param topology: NUMA topology, read from sysfs if not given
+    :return: CpuPlacement
+    """
+    if slot < 0:
+        raise ValueError("Invalid cpu slot: {}".format(slot))
+    if cpus_per_worker < 1:
+        raise ValueError("Invalid cpus per worker: {}".format(cpus_per_worker))
+    if topology is None:
+        topology = numa_topology()
+
+    per_node = []
+    for node, cpus in topology.items():
+        size = min(cpus_per_worker, len(cpus))
+        chunks = [cpus[i:i + size] for i in range(0, len(cpus) - size + 1, size)]
+        per_node.append([(node, chunk) for chunk in chunks])
+
+    cpu_sets = []
+    for i in range(max(len(chunks) for chunks in per_node)):
+        cpu_sets.extend(chunks[i] for chunks in per_node if i < len(chunks))
+
+    if slot >= len(cpu_sets):
+        logging.warning("Not enough CPUs for worker slot %d, sharing CPUs with slot %d.",
+                        slot, slot % len(cpu_sets))
+    node, cpus = cpu_sets[slot % len(cpu_sets)]
+    return CpuPlacement(slot, cpus, node)
+
+
+def _set_preferred_node(node):
+    syscall_nr = SET_MEMPOLICY_SYSCALL.get(platform.machine())
+    if syscall_nr is None:
+        return False
+
+    mask_bits = ctypes.sizeof(ctypes.c_ulong) * 8
+    node_mask = (ctypes.c_ulong * (node // mask_bits + 1))()
+    node_mask[node // mask_bits] = 1 << (node % mask_bits)
+    libc = ctypes.CDLL(None, use_errno=True)
+    ret = libc.syscall(syscall_nr, MPOL_PREFERRED, node_mask, ctypes.c_ulong(len(node_mask) * mask_bits + 1))
+    return ret == 0
+
+
+def apply(placement):
+    """
+    Pin the current process to the placement's CPUs and prefer allocating memory on its NUMA node.
+
+    Without a memory policy the kernel still allocates on the local node on first touch, so failing to set it
+    is only logged.
+
+    :param placement:
+    :return: True if the CPU affinity was applied
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        logging.warning("CPU affinity is not supported on this platform.")
+        return False
+
+    multi_node = len(numa_topology()) > 1
+    os.sched_setaffinity(0, placement.cpus)
+    if multi_node and not _set_preferred_node(placement.node):
+        logging.warning("Failed to set preferred memory node %d.", placement.node)
+    return True
+
+
+def set_thread_env(placement):
+    """
+    Size the OpenMP and MXNet operator thread pools to the worker's CPU set. Values already present in the
+    environment are kept.
+
+    :param placement:
+    :return:
+    """
+    num_threads = str(len(placement.cpus))
+    for name in THREAD_ENV_VARIABLES:
+        os.environ.setdefault(name, num_threads)
@@ -101,3 +101,105 @@ def pad_sentence(sentence, buckets, invalid_label=-1, data_name='data', layout='
                                name=data_name,
                                shape=shape,
                                layout=layout)])
+
+
+def freeze_vocab(vocab):
+    """Build a sorted lookup table from a vocabulary, to be used by
+    `encode_sentences_batch`. A frozen vocabulary can not grow, unknown
+    tokens are encoded as the invalid label.
+
+    Parameters
+    ----------
+    vocab : dict of str -> int
+        Vocabulary to freeze.
+
+    Returns
+    -------
+    result : tuple of (numpy.ndarray, numpy.ndarray)
+        Sorted tokens and their indices.
+    """
+    keys = np.array(sorted(vocab))
+    values = np.array([vocab[key] for key in keys], dtype='int64')
+    return keys, values
+
+
+def encode_sentences_batch(sentences, frozen_vocab, invalid_label=-1):
+    """Encode many sentences at once against a frozen vocabulary.
+    All tokens of the batch are looked up in a single vectorized
+    binary search instead of one dict lookup per token.
+
+    Parameters
+    ----------
+    sentences : list of list of str
+        A list of sentences to encode. Each sentence
+        should be a list of string tokens.
+    frozen_vocab : tuple of (numpy.ndarray, numpy.ndarray)
+        Lookup table built by `freeze_vocab`.
+    invalid_label : int, default -1
+        Index for tokens missing from the vocabulary.
+
+    Returns
+    -------
+    result : list of numpy.ndarray
+        encoded sentences
+    """
+    if not sentences:
+        return []
+    keys, values = frozen_vocab
+    lengths = [len(sent) for sent in sentences]
+    tokens = [word for sent in sentences for word in sent]
+    if not tokens or len(keys) == 0:
+        codes = np.full((len(tokens),), invalid_label, dtype='int64')
+    else:
+        tokens = np.array(tokens)
+        pos = np.minimum(np.searchsorted(keys, tokens), len(keys) - 1)
+        codes = np.where(keys[pos] == tokens, values[pos], invalid_label)
+    return np.split(codes, np.cumsum(lengths)[:-1])
+
+
+def pad_sentences(sentences, buckets, invalid_label=-1, data_name='data', layout='NT'):
+    """Group encoded sentences by the closest length in provided buckets
+    and pad every group into a single array.
+
+    Parameters
+    ----------
+    sentences : list of list of int
+        A list of encoded sentences.
+    buckets : list of int
+        Size of the data buckets, in increasing order.
+    invalid_label : int, optional
+        Index for invalid token, like <end-of-sentence>.
+    data_name : str, optional
+        Input data name.
+    layout : str, optional
+        Format of data and label. 'NT' means (batch_size, length)
+        and 'TN' means (length, batch_size).
+
+    Returns
+    -------
+    result : list of mx.io.DataBatch
+        One DataBatch per non-empty bucket. `index` of each DataBatch holds
+        the positions of its sentences in `sentences`.
+    """
+    lengths = np.array([len(sent) for sent in sentences], dtype='int64')
+    if lengths.size and lengths.max() > buckets[-1]:
+        raise ValueError("Sentence length must be no greater than %d." % buckets[-1])
+    bucket_idx = np.searchsorted(buckets, lengths)
+
+    batches = []
+    for buck in np.unique(bucket_idx):
+        sent_bucket = buckets[buck]
+        index = np.flatnonzero(bucket_idx == buck)
+        buff = np.full((len(index), sent_bucket), invalid_label, dtype='float32')
+        mask = np.arange(sent_bucket) < lengths[index][:, np.newaxis]
+        if mask.any():
+            buff[mask] = np.concatenate([sentences[i] for i in index])
+        if layout != 'NT':
+            buff = buff.T
+        batches.append(mx.io.DataBatch([mx.nd.array(buff, dtype='float32')], pad=0,
+                                       index=index, bucket_key=sent_bucket,
+                                       provide_data=[mx.io.DataDesc(
+                                           name=data_name,
+                                           shape=buff.shape,
+                                           layout=layout)]))
+    return batches
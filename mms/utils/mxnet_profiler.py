@@ -0,0 +1,81 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+On-demand MXNet profiler capture for the next N batches of a worker.
+"""
+
+import logging
+import os
+import time
+
+
+class MXNetProfiler(object):
+    """
+    Captures mx.profiler chrome traces around the next batches handled by a worker.
+
+    The trace of each capture is written to `<profile_dir>/<model_name>-<pid>-<timestamp>.json` and can be opened
+    in chrome://tracing.
+    """
+
+    def __init__(self):
+        self.remaining = 0
+        self.filename = None
+        self._running = False
+
+    def start(self, model_name, batches, profile_dir):
+        """
+        Arm the profiler for the next batches.
+
+        :param model_name:
+        :param batches: number of batches to profile
+        :param profile_dir: directory the trace is written to
+        :return: trace file name
+        """
+        if batches <= 0:
+            raise ValueError("Invalid number of batches: {}".format(batches))
+        if self._running:
+            raise RuntimeError("Profiler is already running, trace file: {}".format(self.filename))
+
+        if not os.path.isdir(profile_dir):
+            os.makedirs(profile_dir)
+        self.filename = os.path.join(profile_dir, "{}-{}-{}.json".format(
+            model_name, os.getpid(), time.strftime("%Y%m%d%H%M%S")))
+        self.remaining = batches
+        return self.filename
+
+    def before_batch(self):
+        """
+        Called before a batch is handled, starts the capture of the first armed batch.
+        """
+        if self.remaining > 0 and not self._running:
+            import mxnet as mx
+
+            mx.profiler.set_config(profile_all=True, filename=self.filename)
+            mx.profiler.set_state("run")
+            self._running = True
+
+    def after_batch(self):
+        """
+        Called after a batch is handled, dumps the trace after the last armed batch.
+        """
+        if not self._running:
+            return
+
+        self.remaining -= 1
+        if self.remaining <= 0:
+            import mxnet as mx
+
+            # operators run asynchronously, wait for them to show up in the trace
+            mx.nd.waitall()
+            mx.profiler.set_state("stop")
+            mx.profiler.dump()
+            self._running = False
+            logging.info("MXNet profiler trace written to %s", self.filename)
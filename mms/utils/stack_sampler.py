@@ -0,0 +1,138 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Sampling profiler for the python code of a worker.
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+
+DEFAULT_INTERVAL = 0.01
+
+
+class StackSampler(object):
+    """
+    Samples the python stacks of all threads on a SIGPROF timer while the next N batches are handled.
+
+    A sample only walks the frames and counts the tuple of code objects, so the overhead stays well below 1% at
+    the default 100 samples per CPU second. Only CPU time is sampled, a worker waiting for requests costs nothing.
+    The stacks are written to `<profile_dir>/<model_name>-<pid>-<timestamp>.folded` in the folded format of
+    flamegraph.pl, with the model name as root frame.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.remaining = 0
+        self.filename = None
+        self.model_name = None
+        self.stacks = defaultdict(int)
+        self._running = False
+        self._previous_handler = None
+
+    def start(self, model_name, batches, profile_dir):
+        """
+        Arm the sampler for the next batches.
+
+        :param model_name:
+        :param batches: number of batches to sample
+        :param profile_dir: directory the folded stacks are written to
+        :return: folded stacks file name
+        """
+        if batches <= 0:
+            raise ValueError("Invalid number of batches: {}".format(batches))
+        if self._running:
+            raise RuntimeError("Sampler is already running, output file: {}".format(self.filename))
+        if not hasattr(signal, "setitimer"):
+            raise RuntimeError("Sampling profiler is not supported on this platform")
+
+        if not os.path.isdir(profile_dir):
+            os.makedirs(profile_dir)
+        self.filename = os.path.join(profile_dir, "{}-{}-{}.folded".format(
+            model_name, os.getpid(), time.strftime("%Y%m%d%H%M%S")))
+        self.model_name = model_name
+        self.remaining = batches
+        self.stacks.clear()
+        return self.filename
+
+    def before_batch(self):
+        """
+        Called before a batch is handled, starts sampling at the first armed batch.
+        """
+        if self.remaining > 0 and not self._running:
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            self._running = True
+
+    def after_batch(self):
+        """
+        Called after a batch is handled, writes the folded stacks after the last armed batch.
+        """
+        if not self._running:
+            return
+
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.stop()
+            with open(self.filename, "w") as f:
+                for line in self.folded():
+                    f.write(line)
+                    f.write("\n")
+            logging.info("Python stack samples written to %s", self.filename)
+
+    def stop(self):
+        """
+        Disarm the timer and restore the previous SIGPROF handler, without writing the samples.
+        """
+        if not self._running:
+            return
+        self.remaining = 0
+        try:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        finally:
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+            self._running = False
+
+    def _sample(self, signum, frame):  # pylint: disable=unused-argument
+        frames = sys._current_frames()  # pylint: disable=protected-access
+        # report the interrupted frame instead of this handler for the main thread
+        frames[threading.current_thread().ident] = frame
+        for f in frames.values():
+            stack = []
+            while f is not None:
+                stack.append(f.f_code)
+                f = f.f_back
+            self.stacks[tuple(stack)] += 1
+
+    def folded(self):
+        """
+        Aggregated samples in folded format: one line per distinct stack, frames from root to leaf separated by
+        ';' followed by the number of samples.
+
+        :return: list of lines
+        """
+        labels = {}
+        counts = defaultdict(int)
+        for stack, count in self.stacks.items():
+            frames = [self.model_name]
+            for code in reversed(stack):
+                label = labels.get(code)
+                if label is None:
+                    label = "{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename),
+                                                code.co_firstlineno).replace(";", ":")
+                    labels[code] = label
+                frames.append(label)
+            counts[";".join(frames)] += count
+        return ["{} {}".format(stack, count) for stack, count in sorted(counts.items())]
@@ -11,9 +11,13 @@
 timeit decorator
 """
 
+import logging
 import time
 from functools import wraps
 
+# time.clock is wall time on Windows and was removed in python 3.8
+cpu_time = time.process_time if hasattr(time, "process_time") else time.clock  # pylint: disable=no-member
+
 
 def timeit(func):
     """
@@ -24,11 +28,11 @@ def timeit(func):
     @wraps(func)
     def time_and_log(*args, **kwargs):
         start = time.time()
-        start_cpu = time.clock()
+        start_cpu = cpu_time()
         result = func(*args, **kwargs)
         end = time.time()
-        end_cpu = time.clock()
-        print("func: %r took a total of %2.4f sec to run and %2.4f sec of CPU time\n",
-              (func.__name__, (end-start), (end_cpu - start_cpu)))
+        end_cpu = cpu_time()
+        logging.info("func: %r took a total of %2.4f sec to run and %2.4f sec of CPU time",
+                     func.__name__, (end - start), (end_cpu - start_cpu))
         return result
     return time_and_log
@@ -18,6 +18,27 @@ import os
 from .manifest_components.manifest import RuntimeType
 
 
+def _non_negative_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError("invalid non-negative integer value: '{}'".format(value))
+    return number
+
+
+def _positive_int(value):
+    number = _non_negative_int(value)
+    if number == 0:
+        raise argparse.ArgumentTypeError("invalid positive integer value: '{}'".format(value))
+    return number
+
+
+def _batch_sizes(value):
+    return sorted(set(_positive_int(v.strip()) for v in value.split(',')))
+
+
 # noinspection PyTypeChecker
 class ArgParser(object):
 
@@ -81,4 +102,181 @@ class ArgParser(object):
                                         'name as that provided in --model-name in the path specified by --export-path '
                                         'will overwritten')
 
+        parser_export.add_argument('--aligned',
+                                   required=False,
+                                   action='store_true',
+                                   help='Store files of 1 MB or more, like model parameters, uncompressed and aligned '
+                                        'to 4 kB pages in the .mar file, so they can be memory-mapped from the archive '
+                                        'without inflating them. Smaller files are still compressed.')
+
+        parser_export.add_argument('--compression-threads',
+                                   required=False,
+                                   type=int,
+                                   default=None,
+                                   help='Number of threads compressing the files, the number of CPUs by default. '
+                                        'The .mar file does not depend on the number of threads.')
+
+        parser_export.add_argument('--base-archive',
+                                   required=False,
+                                   type=str,
+                                   default=None,
+                                   help='Path of a previous .mar file of the model. A delta .mar file is created, '
+                                        'with only the files that changed since the base archive. Model server '
+                                        'loads it once the base archive was registered.')
+
+        parser_export.add_argument('--optimize',
+                                   required=False,
+                                   action='store_true',
+                                   help='Optimize the graph of an MXNet model for inference: remove training '
+                                        'operators and fold batch normalizations into convolutions. The optimized '
+                                        'symbol, shapes and warm-up samples are stored in MAR-INF/optimized and '
+                                        'preferred by the model loader. Requires MXNet.')
+
+        parser_export.add_argument('--batch-sizes',
+                                   required=False,
+                                   type=_batch_sizes,
+                                   default=None,
+                                   help='Performance hint: comma separated batch sizes the model performs best with, '
+                                        'e.g. 1,8. Model server batches up to the largest one, unless a batch size '
+                                        'is given when the model is registered.')
+
+        parser_export.add_argument('--max-batch-delay',
+                                   required=False,
+                                   type=_non_negative_int,
+                                   default=None,
+                                   help='Performance hint: maximum delay in milliseconds to aggregate a batch.')
+
+        parser_export.add_argument('--workers',
+                                   required=False,
+                                   type=_positive_int,
+                                   default=None,
+                                   help='Performance hint: number of workers started for the model.')
+
+        parser_export.add_argument('--threads-per-worker',
+                                   required=False,
+                                   type=_positive_int,
+                                   default=None,
+                                   help='Performance hint: number of operator threads of each worker, unless '
+                                        'OMP_NUM_THREADS is set.')
+
+        parser_export.add_argument('--warmup-samples',
+                                   required=False,
+                                   type=_non_negative_int,
+                                   default=None,
+                                   help='Performance hint: number of samples run through the model when it is '
+                                        'loaded. With --optimize, the number of warm-up samples generated, 4 by '
+                                        'default.')
+
+        parser_export.add_argument('--memory-estimate',
+                                   required=False,
+                                   type=_positive_int,
+                                   default=None,
+                                   help='Performance hint: memory used by a worker, in MB. Model server does not '
+                                        'start more default workers than fit in the memory of the host.')
+
         return parser_export
+
+    @staticmethod
+    def batch_args_parser():
+
+        """ Argument parser for model-archiver-batch
+        """
+        runtime_types = ', '.join(s.value for s in RuntimeType)
+
+        parser_batch = argparse.ArgumentParser(prog='model-archiver-batch',
+                                               description='Model Archiver Tool, packaging a batch of models')
+
+        parser_batch.add_argument('specs',
+                                  type=str,
+                                  help='A json file holding a list of model specifications, or a directory of json '
+                                       'files holding one model specification each. A model specification is a json '
+                                       'object of model-archiver arguments, e.g. {"model-name": "squeezenet", '
+                                       '"model-path": "squeezenet/", "handler": "mxnet_vision_service:handle"}. '
+                                       'Relative model paths are relative to the file of the specification.')
+
+        parser_batch.add_argument('-j', '--jobs',
+                                  required=False,
+                                  type=int,
+                                  default=None,
+                                  help='Number of models packaged at the same time, the number of CPUs by default.')
+
+        parser_batch.add_argument('--runtime',
+                                  required=False,
+                                  type=str,
+                                  default=RuntimeType.PYTHON.value,
+                                  choices=[s.value for s in RuntimeType],
+                                  help='Runtime of the models that do not specify one, one of {}.'.format(
+                                      runtime_types))
+
+        parser_batch.add_argument('--export-path',
+                                  required=False,
+                                  type=str,
+                                  default=os.getcwd(),
+                                  help='Path where the .mar files of the models that do not specify one are saved, '
+                                       'the current working directory by default.')
+
+        parser_batch.add_argument('-f', '--force',
+                                  required=False,
+                                  action='store_true',
+                                  help='Overwrite existing .mar files.')
+
+        parser_batch.add_argument('--aligned',
+                                  required=False,
+                                  action='store_true',
+                                  help='Create aligned .mar files, see model-archiver --aligned.')
+
+        parser_batch.add_argument('--optimize',
+                                  required=False,
+                                  action='store_true',
+                                  help='Optimize the models for inference, see model-archiver --optimize.')
+
+        parser_batch.add_argument('--compression-threads',
+                                  required=False,
+                                  type=int,
+                                  default=None,
+                                  help='Number of threads compressing the files of each model, the number of CPUs '
+                                       'divided by the number of jobs by default.')
+
+        return parser_batch
+
+    @staticmethod
+    def inspect_args_parser():
+
+        """ Argument parser for model-archiver-inspect
+        """
+        parser_inspect = argparse.ArgumentParser(prog='model-archiver-inspect',
+                                                 description='Model Archiver Tool, inspecting model archives without '
+                                                             'extracting them')
+
+        parser_inspect.add_argument('archives',
+                                    type=str,
+                                    nargs='+',
+                                    help='.mar files, or directories of .mar files, to inspect.')
+
+        parser_inspect.add_argument('--json',
+                                    required=False,
+                                    action='store_true',
+                                    help='Print a json list describing each archive: manifest, handler, files with '
+                                         'their sizes, signature and errors, instead of a table.')
+
+        parser_inspect.add_argument('--validate',
+                                    required=False,
+                                    action='store_true',
+                                    help='Import the handler of each archive, and check the input shapes of its '
+                                         'signature against the MXNet symbol when MXNet is installed. Each archive '
+                                         'is validated in a separate Python process.')
+
+        parser_inspect.add_argument('-j', '--jobs',
+                                    required=False,
+                                    type=int,
+                                    default=None,
+                                    help='Number of archives validated at the same time, the number of CPUs by '
+                                         'default.')
+
+        parser_inspect.add_argument('--timeout',
+                                    required=False,
+                                    type=int,
+                                    default=120,
+                                    help='Seconds the validation of an archive may take, 120 by default.')
+
+        return parser_inspect
@@ -0,0 +1,204 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Batch mode of model-archiver: packages many models in one invocation with a pool of processes.
+
+A model specification is a json object of model-archiver arguments, e.g.
+{"model-name": "squeezenet", "model-path": "squeezenet/", "handler": "mxnet_vision_service:handle"}.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+
+from .arg_parser import ArgParser
+from .model_archiver_error import ModelArchiverError
+from .model_packaging import export_model
+from .model_packaging_utils import ModelExportUtils, MANIFEST_FILE_NAME, MAR_INF, ONNX_TYPE
+
+# command line arguments applying to every model of a batch, unless a specification sets them
+SHARED_ARGUMENTS = ('runtime', 'export_path', 'force', 'aligned', 'compression_threads', 'optimize')
+
+
+def read_specs(path):
+    """
+    Read model specifications from a json file holding a list of specifications, or from a directory of json files
+    holding one specification each. Relative model paths are relative to the file of the specification.
+    :param path:
+    :return: list of specifications, with keys in the form of argument names, e.g. model_name
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith('.json')]
+    else:
+        files = [path]
+
+    specs = []
+    for spec_file in files:
+        try:
+            with open(spec_file) as f:
+                content = json.load(f)
+        except (IOError, ValueError) as e:
+            raise ModelArchiverError("Failed to read model specifications from {}: {}".format(spec_file, e))
+
+        for spec in content if isinstance(content, list) else [content]:
+            if not isinstance(spec, dict):
+                raise ModelArchiverError("Invalid model specification in {}: {}".format(spec_file, spec))
+            spec = dict((k.replace('-', '_'), v) for k, v in spec.items())
+            if 'model_path' in spec:
+                spec['model_path'] = os.path.join(os.path.dirname(os.path.abspath(spec_file)), spec['model_path'])
+            specs.append(spec)
+    return specs
+
+
+def spec_arguments(spec, defaults):
+    """
+    Command line arguments of a model specification
+    :param spec:
+    :param defaults: values of the shared arguments given on the command line
+    :return: list of arguments
+    """
+    values = dict(defaults)
+    values.update(spec)
+    argv = []
+    for key, value in sorted(values.items()):
+        if value is None or value is False:
+            continue
+        argv.append('--' + key.replace('_', '-'))
+        if isinstance(value, list):
+            argv.append(','.join(str(v) for v in value))
+        elif value is not True:
+            argv.append(str(value))
+    return argv
+
+
+def package_spec(argv):
+    """
+    Package one model of a batch. Runs in a worker process.
+    :param argv: command line arguments of the model
+    :return: summary of the model: name, error, number of files, size of the files, size of the archive and time
+    """
+    start = time.time()
+    summary = {'model_name': None, 'error': None, 'files': 0, 'size': 0, 'archive_size': 0, 'time': 0.0}
+    try:
+        parser = ArgParser.export_model_args_parser()
+        # argparse reports invalid arguments by exiting
+        try:
+            args = parser.parse_args(argv)
+        except SystemExit:
+            raise ModelArchiverError("Invalid model specification: {}".format(' '.join(argv)))
+        summary['model_name'] = args.model_name
+
+        manifest = ModelExportUtils.generate_manifest_json(args)
+        mar_path = export_model(args, manifest)
+        with zipfile.ZipFile(mar_path) as z:
+            files = json.loads(z.read('{}/{}'.format(MAR_INF, MANIFEST_FILE_NAME)).decode('utf-8'))['files']
+        summary['files'] = len(files)
+        summary['size'] = sum(f['size'] for f in files.values())
+        summary['archive_size'] = os.path.getsize(mar_path)
+    except Exception as e:  # pylint: disable=broad-except
+        summary['error'] = str(e) or type(e).__name__
+    summary['time'] = time.time() - start
+    return summary
+
+
+def preload_mxnet(specs, optimize=False):
+    """
+    Import MXNet and ONNX before the worker processes are forked if any model needs an ONNX conversion or an
+    optimization, so they are imported once instead of in every worker.
+    :param specs:
+    :param optimize: value of --optimize for the models that do not set it
+    :return:
+    """
+    for spec in specs:
+        model_path = spec.get('model_path')
+        if spec.get('optimize', optimize) or (model_path and os.path.isdir(model_path) and
+                                              any(f.endswith(ONNX_TYPE) for f in os.listdir(model_path))):
+            try:
+                import mxnet  # pylint: disable=unused-import
+                from mxnet.contrib import onnx as onnx_mxnet  # pylint: disable=unused-import
+                import onnx  # pylint: disable=unused-import
+            except ImportError:
+                pass
+            return
+
+
+def package_models(specs, args, jobs=None):
+    """
+    Package the models of a list of specifications with a pool of processes.
+    :param specs: model specifications
+    :param args: command line arguments, holding the shared arguments
+    :param jobs: number of processes, the number of CPUs by default
+    :return: list of model summaries, in the order of the specifications
+    """
+    jobs = min(jobs or multiprocessing.cpu_count(), len(specs)) or 1
+    defaults = dict((name, getattr(args, name, None)) for name in SHARED_ARGUMENTS)
+    if defaults['compression_threads'] is None:
+        # share the CPUs between the processes
+        defaults['compression_threads'] = max(1, multiprocessing.cpu_count() // jobs)
+
+    argvs = [spec_arguments(spec, defaults) for spec in specs]
+    if jobs == 1:
+        return [package_spec(argv) for argv in argvs]
+
+    preload_mxnet(specs, defaults['optimize'])
+    pool = multiprocessing.Pool(jobs)
+    try:
+        return pool.map(package_spec, argvs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def print_summary(summaries):
+    """
+    Print a table of the model summaries
+    :param summaries:
+    :return: number of failed models
+    """
+    print("{:<30} {:>7} {:>6} {:>12} {:>12} {:>9}".format("model", "status", "files", "size (MB)",
+                                                           "archive (MB)", "time (s)"))
+    failed = 0
+    for s in summaries:
+        print("{:<30} {:>7} {:>6} {:>12.1f} {:>12.1f} {:>9.2f}".format(
+            s['model_name'] or '-', "failed" if s['error'] else "ok", s['files'], s['size'] / 1024.0 / 1024,
+            s['archive_size'] / 1024.0 / 1024, s['time']))
+        if s['error']:
+            failed += 1
+    for s in summaries:
+        if s['error']:
+            logging.error("%s: %s", s['model_name'] or '-', s['error'])
+    return failed
+
+
+def generate_model_archives():
+    """
+    Generate the model archives of a batch of model specifications
+    :return:
+    """
+    logging.basicConfig(format='%(levelname)s - %(message)s')
+    args = ArgParser.batch_args_parser().parse_args()
+    try:
+        specs = read_specs(args.specs)
+    except ModelArchiverError as e:
+        logging.error(e)
+        sys.exit(1)
+
+    summaries = package_models(specs, args, args.jobs)
+    if print_summary(summaries):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    generate_model_archives()
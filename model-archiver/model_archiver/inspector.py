@@ -0,0 +1,370 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Inspection of model archives: describes the manifest, handler, files and signature of .mar files without extracting
+them, and validates that the handler can be imported and the signature fits the model.
+
+Only the central directory of an archive and its small metadata entries are read: zipfile seeks to the local header
+of an entry to read it, so the size of the model parameters does not matter. The handler is imported from the
+archive with zipimport in a separate Python process, so a handler that crashes or hangs does not stop the
+inspection. The handler is not sandboxed: inspect only archives you would serve.
+"""
+
+import importlib
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import zipfile
+from multiprocessing.pool import ThreadPool
+
+from past.builtins import basestring
+
+from .arg_parser import ArgParser
+from .manifest_components.engine import EngineType
+from .model_archiver_error import ModelArchiverError
+from .model_packaging_utils import ModelExportUtils, MANIFEST_FILE_NAME, MAR_INF, MODEL_ARCHIVE_EXTENSION, \
+    SIGNATURE_FILE_NAME
+from .optimizer import OPTIMIZED_DIR, SHAPES_FILE_NAME, SYMBOL_SUFFIX
+
+MANIFEST_ENTRY = '{}/{}'.format(MAR_INF, MANIFEST_FILE_NAME)
+SHAPES_ENTRY = '{}/{}/{}'.format(MAR_INF, OPTIMIZED_DIR, SHAPES_FILE_NAME)
+# seconds a validation process may run, importing the handler may import a deep learning framework
+VALIDATION_TIMEOUT = 120
+# command of the validation process, which writes the list of errors of the archive as json to its stdout
+VALIDATION_COMMAND = 'import sys; from model_archiver.inspector import check_archive; check_archive(sys.argv[1])'
+
+
+def find_archives(paths):
+    """
+    List the model archives of a list of paths
+    :param paths: paths of .mar files, or of directories of .mar files
+    :return: list of archive paths
+    """
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            archives.extend(os.path.join(path, f) for f in sorted(os.listdir(path))
+                            if f.endswith(MODEL_ARCHIVE_EXTENSION))
+        else:
+            archives.append(path)
+    return archives
+
+
+def read_metadata(z):
+    """
+    Read the manifest and signature of an open archive
+    :param z: ZipFile
+    :return: manifest and signature, None if the archive has no signature
+    """
+    try:
+        manifest = json.loads(z.read(MANIFEST_ENTRY).decode('utf-8'))
+    except KeyError:
+        raise ModelArchiverError("Archive has no {}, it is not a model archive.".format(MANIFEST_ENTRY))
+    except ValueError as e:
+        raise ModelArchiverError("Invalid {}: {}".format(MANIFEST_ENTRY, e))
+    if not isinstance(manifest, dict):
+        raise ModelArchiverError("Invalid {}: expected a JSON object.".format(MANIFEST_ENTRY))
+
+    signature = None
+    if SIGNATURE_FILE_NAME in z.NameToInfo:
+        try:
+            signature = json.loads(z.read(SIGNATURE_FILE_NAME).decode('utf-8'))
+        except ValueError as e:
+            raise ModelArchiverError("Invalid {}: {}".format(SIGNATURE_FILE_NAME, e))
+    return manifest, signature
+
+
+def validate_signature(signature):
+    """
+    Validate the shape of a signature: a list of inputs, each with a name and a shape of non-negative dimensions
+    :param signature:
+    :return: list of errors
+    """
+    inputs = signature.get('inputs') if isinstance(signature, dict) else None
+    if not isinstance(inputs, list) or not inputs:
+        return ["{} has no inputs.".format(SIGNATURE_FILE_NAME)]
+
+    errors = []
+    for i, input_data in enumerate(inputs):
+        if not isinstance(input_data, dict) or not isinstance(input_data.get('data_name'), basestring):
+            errors.append("Input {} of {} has no data_name.".format(i, SIGNATURE_FILE_NAME))
+            continue
+        shape = input_data.get('data_shape')
+        if not isinstance(shape, list) or not shape or \
+                not all(isinstance(d, int) and not isinstance(d, bool) and d >= 0 for d in shape):
+            errors.append("Input {} of {} has an invalid data_shape: {}, expected a list of non-negative "
+                          "integers.".format(input_data['data_name'], SIGNATURE_FILE_NAME, shape))
+    if 'outputs' in signature and not isinstance(signature['outputs'], list):
+        errors.append("Outputs of {} are not a list.".format(SIGNATURE_FILE_NAME))
+    return errors
+
+
+def inspect_archive(mar_path):
+    """
+    Describe a model archive and check its consistency, without extracting it
+    :param mar_path:
+    :return: report of the archive: path, size, model name, handler, manifest without the file digests, files
+        with their sizes, signature, errors and validity
+    """
+    report = {'archive': mar_path, 'size': 0, 'modelName': None, 'handler': None, 'manifest': None, 'files': [],
+              'signature': None, 'errors': [], 'valid': False}
+    try:
+        report['size'] = os.path.getsize(mar_path)
+        with zipfile.ZipFile(mar_path) as z:
+            infos = z.infolist()
+            manifest, signature = read_metadata(z)
+    except (IOError, OSError, zipfile.BadZipfile) as e:
+        report['errors'].append("Failed to read the archive: {}".format(e))
+        return report
+    except ModelArchiverError as e:
+        report['errors'].append(str(e))
+        return report
+
+    digests = manifest.pop('files', None) or {}
+    model = manifest.get('model') or {}
+    report['modelName'] = model.get('modelName')
+    report['handler'] = model.get('handler')
+    report['manifest'] = manifest
+    report['signature'] = signature
+    for info in infos:
+        if info.filename.endswith('/'):
+            continue
+        entry = {'name': info.filename, 'size': info.file_size, 'compressedSize': info.compress_size,
+                 'stored': info.compress_type == zipfile.ZIP_STORED}
+        if info.filename in digests:
+            entry['sha256'] = digests[info.filename].get('sha256')
+        report['files'].append(entry)
+
+    errors = report['errors']
+    if not report['handler']:
+        errors.append("Manifest has no handler.")
+    if signature is not None:
+        errors.extend(validate_signature(signature))
+    sizes = dict((info.filename, info.file_size) for info in infos)
+    for name, digest in digests.items():
+        # a delta archive skips the files that did not change since its base archive
+        if name not in sizes:
+            if 'baseArchive' not in manifest:
+                errors.append("File {} of the manifest is missing.".format(name))
+        elif digest.get('size') != sizes[name]:
+            errors.append("File {} has {} bytes, the manifest expects {}.".format(name, sizes[name],
+                                                                                  digest.get('size')))
+    report['valid'] = not errors
+    return report
+
+
+def _check_handler(z, manifest):
+    """
+    Import the handler of an archive like the model loader of model server, without initializing it. The archive
+    must be on sys.path.
+    :param z: ZipFile
+    :param manifest:
+    :return: list of errors
+    """
+    handler = manifest['model']['handler']
+    temp = handler.split(':', 1)
+    module_name = temp[0][:-3] if temp[0].endswith('.py') else temp[0]
+    function_name = 'handle' if len(temp) == 1 else temp[1]
+    module_file = module_name.replace('.', '/') + '.py'
+    if 'baseArchive' in manifest and module_file not in z.NameToInfo:
+        # the handler of a delta archive may be in its base archive
+        return []
+
+    try:
+        module = importlib.import_module(module_name)
+    except Exception as e:  # pylint: disable=broad-except
+        return ["Handler module {} cannot be imported: {}: {}".format(module_name, type(e).__name__, e)]
+
+    if hasattr(module, function_name):
+        return []
+    classes = [m for _, m in inspect.getmembers(module, inspect.isclass) if m.__module__ == module.__name__]
+    if len(classes) != 1:
+        return ["Handler module {} has no function {} and {} classes, expected one service class.".format(
+            module_name, function_name, len(classes))]
+    if not callable(getattr(classes[0], 'handle', None)):
+        return ["Handler class {} has no handle method.".format(classes[0].__name__)]
+    return []
+
+
+def _check_shapes(z, manifest, signature):
+    """
+    Infer the shapes of the symbol of an MXNet model from the input shapes of its signature, or of its optimized
+    graph. Skipped when MXNet is not installed, or the archive is not an MXNet model.
+    :param z: ZipFile
+    :param manifest:
+    :param signature:
+    :return: list of errors
+    """
+    engine = (manifest.get('engine') or {}).get('engineName')
+    if engine not in (None, EngineType.MXNET.value):
+        return []
+
+    names = z.NameToInfo
+    optimized_dir = '{}/{}/'.format(MAR_INF, OPTIMIZED_DIR)
+    try:
+        symbol_file = ModelExportUtils.find_unique([n for n in names if n.startswith(optimized_dir)],
+                                                   SYMBOL_SUFFIX) or \
+            ModelExportUtils.find_unique([n for n in names if '/' not in n], SYMBOL_SUFFIX)
+    except ModelArchiverError as e:
+        return [str(e)]
+    if symbol_file is None:
+        return []
+
+    try:
+        import mxnet as mx
+    except ImportError:
+        return []
+
+    inputs = signature['inputs']
+    if SHAPES_ENTRY in names:
+        inputs = json.loads(z.read(SHAPES_ENTRY).decode('utf-8'))['inputs']
+    symbol = mx.sym.load_json(z.read(symbol_file).decode('utf-8'))
+    arguments = symbol.list_arguments()
+    shapes = {}
+    for input_data in inputs:
+        if input_data['data_name'] not in arguments:
+            return ["Input {} of the signature is not an input of {}.".format(input_data['data_name'], symbol_file)]
+        # model server binds a batch of 1 for the unknown dimensions
+        shapes[input_data['data_name']] = tuple(d or 1 for d in input_data['data_shape'])
+
+    try:
+        arg_shapes, _, _ = symbol.infer_shape(**shapes)
+    except mx.base.MXNetError as e:
+        return ["Input shapes of the signature do not fit {}: {}".format(symbol_file, str(e).split('\n', 1)[0])]
+    if arg_shapes is None:
+        return ["Input shapes of the signature are not enough to infer the shapes of {}.".format(symbol_file)]
+    return []
+
+
+def check_archive(mar_path):
+    """
+    Validate the handler and the signature of an archive. Runs in a separate process, started by run_checks, and
+    writes the list of errors as json to stdout.
+    :param mar_path:
+    :return:
+    """
+    out = sys.stdout
+    # the handler and the frameworks it imports may print, which must not corrupt the result
+    sys.stdout = sys.stderr
+    errors = []
+    with zipfile.ZipFile(mar_path) as z:
+        manifest, signature = read_metadata(z)
+        # import the handler from the archive only, not from the working directory
+        sys.path = [mar_path] + [p for p in sys.path if p not in ('', os.getcwd())]
+        errors.extend(_check_handler(z, manifest))
+        if signature is not None and not validate_signature(signature):
+            errors.extend(_check_shapes(z, manifest, signature))
+    out.write(json.dumps(errors))
+    out.flush()
+
+
+def run_checks(mar_path, timeout=VALIDATION_TIMEOUT):
+    """
+    Validate the handler and the signature of an archive in a separate Python process
+    :param mar_path:
+    :param timeout: seconds after which the process is killed
+    :return: list of errors
+    """
+    process = subprocess.Popen([sys.executable, '-c', VALIDATION_COMMAND, os.path.abspath(mar_path)],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    timed_out = []
+
+    def kill():
+        timed_out.append(True)
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        out, err = process.communicate()
+    finally:
+        timer.cancel()
+
+    if timed_out:
+        return ["Validation of the handler timed out after {} seconds.".format(timeout)]
+    if process.returncode != 0:
+        lines = err.decode('utf-8', 'replace').strip().splitlines()
+        return ["Validation of the handler failed: {}".format(lines[-1] if lines else process.returncode)]
+    return json.loads(out.decode('utf-8'))
+
+
+def inspect_archives(paths, validate=False, jobs=None, timeout=VALIDATION_TIMEOUT):
+    """
+    Inspect model archives, and validate them in parallel processes
+    :param paths: paths of .mar files, or of directories of .mar files
+    :param validate: import the handlers and check the signatures against the models
+    :param jobs: number of validation processes, the number of CPUs by default
+    :param timeout: seconds a validation process may run
+    :return: list of archive reports, in the order of the paths
+    """
+    reports = [inspect_archive(mar_path) for mar_path in find_archives(paths)]
+    # archives that failed the inspection are not validated
+    pending = [r for r in reports if validate and r['valid']]
+    if not pending:
+        return reports
+
+    pool = ThreadPool(min(jobs or multiprocessing.cpu_count(), len(pending)))
+    try:
+        results = pool.map(lambda r: run_checks(r['archive'], timeout), pending, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    for report, errors in zip(pending, results):
+        report['errors'].extend(errors)
+        report['valid'] = not report['errors']
+    return reports
+
+
+def print_reports(reports):
+    """
+    Print a table of the archive reports
+    :param reports:
+    :return: number of invalid archives
+    """
+    print("{:<30} {:<30} {:>7} {:>6} {:>12} {:>12}".format("archive", "model", "status", "files", "size (MB)",
+                                                            "archive (MB)"))
+    invalid = 0
+    for r in reports:
+        print("{:<30} {:<30} {:>7} {:>6} {:>12.1f} {:>12.1f}".format(
+            os.path.basename(r['archive']), r['modelName'] or '-', "ok" if r['valid'] else "invalid",
+            len(r['files']), sum(f['size'] for f in r['files']) / 1024.0 / 1024, r['size'] / 1024.0 / 1024))
+        if not r['valid']:
+            invalid += 1
+    for r in reports:
+        for error in r['errors']:
+            logging.error("%s: %s", r['archive'], error)
+    return invalid
+
+
+def inspect_model_archives():
+    """
+    Inspect the model archives given on the command line
+    :return:
+    """
+    logging.basicConfig(format='%(levelname)s - %(message)s')
+    args = ArgParser.inspect_args_parser().parse_args()
+    reports = inspect_archives(args.archives, args.validate, args.jobs, args.timeout)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        invalid = len([r for r in reports if not r['valid']])
+    else:
+        invalid = print_reports(reports)
+    if invalid:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    inspect_model_archives()
@@ -29,7 +29,8 @@ class Manifest(object):
     """
 
     def __init__(self, runtime, model, engine=None, specification_version='1.0', implementation_version='1.0',
-                 description=None, publisher=None, model_server_version='1.0', license=None, user_data=None):
+                 description=None, publisher=None, model_server_version='1.0', license=None, user_data=None,
+                 performance=None):
 
         self.runtime = RuntimeType(runtime)
         self.engine = engine
@@ -41,6 +42,7 @@ class Manifest(object):
         self.license = license
         self.description = description
         self.user_data = user_data
+        self.performance = performance
         self.manifest_dict = self.__to_dict__()
 
     def __to_dict__(self):
@@ -74,6 +76,9 @@ class Manifest(object):
         if self.publisher is not None:
             manifest_dict['publisher'] = self.publisher.__to_dict__()
 
+        if self.performance is not None:
+            manifest_dict['performance'] = self.performance.__to_dict__()
+
         return manifest_dict
 
     def __str__(self):
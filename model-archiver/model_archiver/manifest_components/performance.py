@@ -0,0 +1,59 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# pylint: disable=missing-docstring
+import json
+
+
+class Performance(object):
+    """
+    Performance is a part of the manifest.json. It holds the performance hints of the model author, which model
+    server uses as defaults when the model is registered and loaded: batch sizes, max batch delay in milliseconds,
+    number of workers, threads per worker, number of warm-up samples and memory estimate per worker in MB
+    """
+
+    def __init__(self, batch_sizes=None, max_batch_delay=None, workers=None, threads_per_worker=None,
+                 warmup_samples=None, memory_estimate=None):
+        self.batch_sizes = batch_sizes
+        self.max_batch_delay = max_batch_delay
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.warmup_samples = warmup_samples
+        self.memory_estimate = memory_estimate
+        self.performance_dict = self.__to_dict__()
+
+    def __to_dict__(self):
+        performance_dict = dict()
+
+        if self.batch_sizes is not None:
+            performance_dict['batchSizes'] = self.batch_sizes
+
+        if self.max_batch_delay is not None:
+            performance_dict['maxBatchDelay'] = self.max_batch_delay
+
+        if self.workers is not None:
+            performance_dict['workers'] = self.workers
+
+        if self.threads_per_worker is not None:
+            performance_dict['threadsPerWorker'] = self.threads_per_worker
+
+        if self.warmup_samples is not None:
+            performance_dict['warmupSamples'] = self.warmup_samples
+
+        if self.memory_estimate is not None:
+            performance_dict['memoryEstimate'] = self.memory_estimate
+
+        return performance_dict
+
+    def __str__(self):
+        return json.dumps(self.performance_dict)
+
+    def __repr__(self):
+        return json.dumps(self.performance_dict)
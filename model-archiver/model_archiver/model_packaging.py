@@ -13,38 +13,53 @@ Command line interface to export model files to be used for inference by MXNet M
 """
 
 import logging
+import os
 import sys
 from .arg_parser import ArgParser
-from .model_packaging_utils import ModelExportUtils
+from .model_packaging_utils import ModelExportUtils, MODEL_ARCHIVE_EXTENSION
 from .model_archiver_error import ModelArchiverError
+from .optimizer import optimize_model
 
 
 def package_model(args, manifest):
     """
     Internal helper for the exporting model command line interface.
     """
+    try:
+        export_model(args, manifest)
+    except ModelArchiverError as e:
+        logging.error(e)
+        sys.exit(1)
+
+
+def export_model(args, manifest):
+    """
+    Export a model archive.
+    :param args:
+    :param manifest:
+    :return: path of the model archive
+    """
     model_path = args.model_path
     model_name = args.model_name
     export_file_path = args.export_path
-    temp_files = []
 
-    try:
-        ModelExportUtils.validate_inputs(model_path, model_name, export_file_path)
-        # Step 1 : Check if .mar already exists with the given model name
-        export_file_path = ModelExportUtils.check_mar_already_exists(model_name, export_file_path, args.force)
+    ModelExportUtils.validate_inputs(model_path, model_name, export_file_path)
+    # Step 1 : Check if .mar already exists with the given model name
+    export_file_path = ModelExportUtils.check_mar_already_exists(model_name, export_file_path, args.force)
 
-        # Step 2 : Check if any special handling is required for custom models like onnx models
-        t, files_to_exclude = ModelExportUtils.check_custom_model_types(model_path, model_name)
-        temp_files.extend(t)
+    # Step 2 : Check if any special handling is required for custom models like onnx models
+    extra_files, files_to_exclude = ModelExportUtils.check_custom_model_types(model_path, model_name)
 
-        # Step 3 : Zip 'em all up
-        ModelExportUtils.zip(export_file_path, model_name, model_path, files_to_exclude, manifest)
-        logging.info("Successfully exported model %s to file %s", model_name, export_file_path)
-    except ModelArchiverError as e:
-        logging.error(e)
-        sys.exit(1)
-    finally:
-        ModelExportUtils.clean_temp_files(temp_files)
+    # Step 3 : Optimize the model graph for inference, if requested
+    if args.optimize:
+        extra_files.update(optimize_model(model_path, files_to_exclude, extra_files, args.warmup_samples))
+
+    # Step 4 : Zip 'em all up
+    ModelExportUtils.zip(export_file_path, model_name, model_path, files_to_exclude, manifest, args.aligned,
+                         args.compression_threads, args.base_archive, extra_files)
+    logging.info("Successfully exported model %s to file %s", model_name, export_file_path)
+
+    return os.path.join(export_file_path, '{}{}'.format(model_name, MODEL_ARCHIVE_EXTENSION))
 
 
 def generate_model_archive():
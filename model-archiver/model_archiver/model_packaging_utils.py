@@ -12,16 +12,27 @@
 Helper utils for Model Export tool
 """
 
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
 import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
 import zipfile
+import zlib
+from collections import OrderedDict, deque
+from multiprocessing.pool import ThreadPool
 from .model_archiver_error import ModelArchiverError
 
 from .manifest_components.engine import Engine
 from .manifest_components.manifest import Manifest
 from .manifest_components.model import Model
+from .manifest_components.performance import Performance
 from .manifest_components.publisher import Publisher
 
 MODEL_ARCHIVE_EXTENSION = '.mar'
@@ -30,6 +41,60 @@ MODEL_ARCHIVE_VERSION = '1.0'
 MANIFEST_FILE_NAME = 'MANIFEST.json'
 MAR_INF = 'MAR-INF'
 ONNX_TYPE = '.onnx'
+SIGNATURE_FILE_NAME = 'signature.json'
+ONNX_SYMBOL_FILE_NAME = 'symbol.json'
+ONNX_PARAMS_FILE_NAME = 'model.params'
+ONNX_INPUTS_FILE_NAME = 'inputs.json'
+# Arguments of the performance hints of the manifest
+PERFORMANCE_ARGUMENTS = ('batch_sizes', 'max_batch_delay', 'workers', 'threads_per_worker', 'warmup_samples',
+                         'memory_estimate')
+
+# Aligned archives store files of at least STORE_THRESHOLD bytes uncompressed, with their data at a PAGE_SIZE
+# offset in the archive, so they can be memory-mapped from the archive. The padding goes into an extra field with
+# the id used by Android's zipalign.
+PAGE_SIZE = 4096
+STORE_THRESHOLD = 1024 * 1024
+ALIGNMENT_EXTRA_ID = 0xD935
+LOCAL_HEADER_SIZE = 30
+ZIP64_EXTRA_SIZE = 20
+
+# Files are deflated in chunks of COMPRESS_CHUNK_SIZE bytes by a pool of threads. Every chunk is compressed with the
+# last DICTIONARY_SIZE bytes of the previous chunk as dictionary, and ends on a byte boundary, so the compressed
+# chunks concatenate into one deflate stream. The chunks do not depend on the number of threads, which only changes
+# how many chunks are compressed at the same time, so archives are byte-identical for any number of threads.
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+DICTIONARY_SIZE = 32 * 1024
+MAX_PENDING_CHUNKS = 64
+
+
+def _deflate(chunk, dictionary, last):
+    if dictionary and sys.version_info >= (3, 3):
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL,
+                                      zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(chunk) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class FileDigest(object):
+    """
+    CRC-32, SHA-256 and size of a file, computed from the chunks read while the file is archived.
+    """
+
+    __slots__ = ('crc', 'sha256', 'size')
+
+    def __init__(self):
+        self.crc = 0
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def update(self, chunk):
+        self.crc = zlib.crc32(chunk, self.crc)
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+
+    def __to_dict__(self):
+        return {'size': self.size, 'sha256': self.sha256.hexdigest()}
 
 
 class ModelExportUtils(object):
@@ -69,23 +134,23 @@ class ModelExportUtils(object):
         This functions checks whether any special handling is required for custom model extensions such as
         .onnx, or in the future, for Tensorflow and PyTorch extensions.
         :param model_path:
-        :return:
+        :return: files to add to the archive, as OrderedDict of file paths by archive name, and names of the files
+            of the model path to exclude
         """
-        temp_files = []  # List of temp files added to handle custom models
+        extra_files = OrderedDict()  # Files added to handle custom models
         files_to_exclude = []  # List of files to be excluded from .mar packaging.
 
         files_set = set(os.listdir(model_path))
         onnx_file = ModelExportUtils.find_unique(files_set, ONNX_TYPE)
         if onnx_file is not None:
             logging.debug("Found ONNX files. Converting ONNX file to model archive...")
-            symbol_file, params_file = ModelExportUtils.convert_onnx_model(model_path, onnx_file, model_name)
+            extra_files.update(ModelExportUtils.convert_onnx_model(model_path, onnx_file, model_name))
             files_to_exclude.append(onnx_file)
-            temp_files.append(os.path.join(model_path, symbol_file))
-            temp_files.append(os.path.join(model_path, params_file))
+            files_to_exclude.append(SIGNATURE_FILE_NAME)
 
         # More cases will go here as an if-else block
 
-        return temp_files, files_to_exclude
+        return extra_files, files_to_exclude
 
     @staticmethod
     def find_unique(files, suffix):
@@ -109,15 +174,58 @@ class ModelExportUtils(object):
     @staticmethod
     def convert_onnx_model(model_path, onnx_file, model_name):
         """
-        Util to convert onnx model to MXNet model
+        Util to convert onnx model to MXNet model. The converted model is kept in a cache directory, keyed by the
+        SHA-256 digest of the ONNX file, so the same ONNX file is only converted once. The model path is not modified:
+        the converted files, and the signature file with the input of the ONNX model, are archived from the cache.
         :param model_name:
         :param model_path:
         :param onnx_file:
+        :return: OrderedDict of the paths of the symbol, params and signature files, by archive name
+        """
+        digest = ModelExportUtils.file_digest(os.path.join(model_path, onnx_file)).sha256.hexdigest()
+        cache_dir = os.path.join(ModelExportUtils.cache_dir('onnx'), digest)
+        if os.path.isdir(cache_dir):
+            logging.debug("Using %s converted in %s", onnx_file, cache_dir)
+        else:
+            ModelExportUtils.import_onnx_model(os.path.join(model_path, onnx_file), cache_dir)
+
+        try:
+            # rewrite input data_name correctly
+            with open(os.path.join(model_path, SIGNATURE_FILE_NAME), 'r') as f:
+                data = json.loads(f.read())
+            with open(os.path.join(cache_dir, ONNX_INPUTS_FILE_NAME), 'r') as f:
+                data['inputs'][0].update(json.loads(f.read())[0])
+            signature = json.dumps(data, indent=2).encode('utf-8')
+            signature_file = os.path.join(cache_dir, 'signature-{}.json'.format(hashlib.sha256(signature).hexdigest()))
+            if not os.path.exists(signature_file):
+                ModelExportUtils.write_atomic(signature_file, signature)
+        except:
+            logging.error("Failed to write the signature file for %s model", onnx_file)
+            raise
+
+        return OrderedDict([('%s-symbol.json' % model_name, os.path.join(cache_dir, ONNX_SYMBOL_FILE_NAME)),
+                            ('%s-0000.params' % model_name, os.path.join(cache_dir, ONNX_PARAMS_FILE_NAME)),
+                            (SIGNATURE_FILE_NAME, signature_file)])
+
+    @staticmethod
+    def import_onnx_model(onnx_path, cache_dir):
+        """
+        Convert an ONNX model into the symbol, params and inputs files of a cache directory. The ONNX file is parsed
+        once, and the files are written into a temporary directory renamed to the cache directory, so that
+        concurrent conversions never see a partial cache directory.
+        :param onnx_path:
+        :param cache_dir:
         :return:
         """
         try:
             import mxnet as mx
-            from mxnet.contrib import onnx as onnx_mxnet
+            try:
+                from mxnet.contrib.onnx.onnx2mx.import_onnx import GraphProto
+                legacy_import = False
+            except ImportError:
+                # MXNet 1.2
+                from mxnet.contrib.onnx._import.import_onnx import GraphProto
+                legacy_import = True
         except ImportError:
             raise ModelArchiverError("MXNet package is not installed. Run command: pip install mxnet to install it.")
 
@@ -126,12 +234,10 @@ class ModelExportUtils(object):
         except ImportError:
             raise ModelArchiverError("Onnx package is not installed. Run command: pip install mxnet to install it.")
 
-        symbol_file = '%s-symbol.json' % model_name
-        params_file = '%s-0000.params' % model_name
-        signature_file = 'signature.json'
+        onnx_file = os.path.basename(onnx_path)
         # Find input symbol name and shape
         try:
-            model_proto = onnx.load(os.path.join(model_path, onnx_file))
+            model_proto = onnx.load(onnx_path)
         except:
             logging.error("Failed to load the %s model. Verify if the model file is valid", onnx_file)
             raise
@@ -143,38 +249,71 @@ class ModelExportUtils(object):
 
         input_data = []
         for graph_input in graph.input:
-            shape = []
             if graph_input.name not in _params:
-                for val in graph_input.type.tensor_type.shape.dim:
-                    shape.append(val.dim_value)
-                input_data.append((graph_input.name, tuple(shape)))
+                shape = [int(val.dim_value) for val in graph_input.type.tensor_type.shape.dim]
+                input_data.append({'data_name': graph_input.name, 'data_shape': shape})
 
         try:
-            sym, arg_params, aux_params = onnx_mxnet.import_model(os.path.join(model_path, onnx_file))
+            if legacy_import:
+                sym, arg_params, aux_params = GraphProto().from_onnx(graph)
+            else:
+                # like mxnet.contrib.onnx.import_model, convert with the highest opset the model imports
+                opset_version = max(x.version for x in model_proto.opset_import)
+                sym, arg_params, aux_params = GraphProto().from_onnx(graph, opset_version)
             # UNION of argument and auxillary parameters
             params = dict(arg_params, **aux_params)
         except:
             logging.error("Failed to import %s file to onnx. Verify if the model file is valid", onnx_file)
             raise
 
+        parent_dir = os.path.dirname(cache_dir)
+        if not os.path.isdir(parent_dir):
+            os.makedirs(parent_dir)
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent_dir)
         try:
-            # rewrite input data_name correctly
-            with open(os.path.join(model_path, signature_file), 'r') as f:
-                data = json.loads(f.read())
-                data['inputs'][0]['data_name'] = input_data[0][0]
-                data['inputs'][0]['data_shape'] = [int(i) for i in input_data[0][1]]
-            with open(os.path.join(model_path, signature_file), 'w') as f:
-                f.write(json.dumps(data, indent=2))
-
-            with open(os.path.join(model_path, symbol_file), 'w') as f:
+            with open(os.path.join(tmp_dir, ONNX_SYMBOL_FILE_NAME), 'w') as f:
                 f.write(sym.tojson())
-        except:
-            logging.error("Failed to write the signature or symbol files for %s model", onnx_file)
-            raise
+            with open(os.path.join(tmp_dir, ONNX_INPUTS_FILE_NAME), 'w') as f:
+                f.write(json.dumps(input_data))
+            save_dict = {('arg:%s' % k): v.as_in_context(mx.cpu()) for k, v in params.items()}
+            mx.nd.save(os.path.join(tmp_dir, ONNX_PARAMS_FILE_NAME), save_dict)
+            try:
+                os.rename(tmp_dir, cache_dir)
+            except OSError:
+                # converted concurrently
+                if not os.path.isdir(cache_dir):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
 
-        save_dict = {('arg:%s' % k): v.as_in_context(mx.cpu()) for k, v in params.items()}
-        mx.nd.save(os.path.join(model_path, params_file), save_dict)
-        return symbol_file, params_file
+    @staticmethod
+    def cache_dir(name):
+        """
+        Directory of cached files, like the converted ONNX models: $MODEL_ARCHIVER_CACHE_DIR/<name>,
+        ~/.cache/model-archiver/<name> by default
+        :param name: kind of cached files, e.g. onnx
+        :return:
+        """
+        cache_dir = os.environ.get('MODEL_ARCHIVER_CACHE_DIR') or \
+            os.path.join(os.path.expanduser('~'), '.cache', 'model-archiver')
+        return os.path.join(cache_dir, name)
+
+    @staticmethod
+    def write_atomic(path, data):
+        """
+        Write a file through a temporary file renamed to the path, so readers never see a partial file
+        :param path:
+        :param data: bytes
+        :return:
+        """
+        fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
 
     @staticmethod
     def generate_publisher(publisherargs):
@@ -191,6 +330,14 @@ class ModelExportUtils(object):
         model = Model(model_name=modelargs.model_name, handler=modelargs.handler)
         return model
 
+    @staticmethod
+    def generate_performance(performanceargs):
+        arg_dict = vars(performanceargs)
+        hints = dict((name, arg_dict.get(name)) for name in PERFORMANCE_ARGUMENTS)
+        if all(value is None for value in hints.values()):
+            return None
+        return Performance(**hints)
+
     @staticmethod
     def generate_manifest_json(args):
         """
@@ -206,17 +353,16 @@ class ModelExportUtils(object):
 
         model = ModelExportUtils.generate_model(args)
 
-        manifest = Manifest(runtime=args.runtime, model=model, engine=engine, publisher=publisher)
+        performance = ModelExportUtils.generate_performance(args)
 
-        return str(manifest)
+        manifest = Manifest(runtime=args.runtime, model=model, engine=engine, publisher=publisher,
+                            performance=performance)
 
-    @staticmethod
-    def clean_temp_files(temp_files):
-        for f in temp_files:
-            os.remove(f)
+        return str(manifest)
 
     @staticmethod
-    def zip(export_file, model_name, model_path, files_to_exclude, manifest):
+    def zip(export_file, model_name, model_path, files_to_exclude, manifest, aligned=False, threads=None,
+            base_archive=None, extra_files=None):
         """
         Create a model-archive
         :param export_file:
@@ -224,14 +370,29 @@ class ModelExportUtils(object):
         :param model_path:
         :param files_to_exclude:
         :param manifest:
+        :param aligned: store large files uncompressed and page aligned
+        :param threads: number of compression threads, the number of CPUs by default
+        :param base_archive: create a delta archive, without the files that did not change since this archive
+        :param extra_files: files to archive that are not in the model path, as file paths by archive name
         :return:
         """
         mar_path = os.path.join(export_file, '{}{}'.format(model_name, MODEL_ARCHIVE_EXTENSION))
+        base_digest, base_files = None, None
+        if base_archive is not None:
+            base_digest, base_files = ModelExportUtils.read_base_archive(base_archive)
+        pool = ThreadPool(threads or multiprocessing.cpu_count())
         try:
             with zipfile.ZipFile(mar_path, 'w', zipfile.ZIP_DEFLATED) as z:
-                ModelExportUtils.zip_dir(model_path, z, set(files_to_exclude))
-                # Write the manifest here now as a json
-                z.writestr(os.path.join(MAR_INF, MANIFEST_FILE_NAME), manifest)
+                files = ModelExportUtils.zip_dir(model_path, z, set(files_to_exclude), aligned, pool, base_files,
+                                                 extra_files)
+                manifest = ModelExportUtils.add_files_to_manifest(manifest, files, base_digest)
+                # Write the manifest here now as a json, dated like the newest model file to keep the archive
+                # reproducible
+                zinfo = zipfile.ZipInfo(os.path.join(MAR_INF, MANIFEST_FILE_NAME),
+                                        max([i.date_time for i in z.filelist] or [(1980, 1, 1, 0, 0, 0)]))
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                zinfo.external_attr = 0o600 << 16
+                z.writestr(zinfo, manifest)
         except IOError:
             logging.error("Failed to save the model-archive to model-path \"%s\". "
                           "Check the file permissions and retry.", export_file)
@@ -239,27 +400,215 @@ class ModelExportUtils(object):
         except:
             logging.error("Failed to convert %s to the model-archive.", model_name)
             raise
+        finally:
+            pool.terminate()
 
     @staticmethod
-    def zip_dir(path, ziph, files_to_exclude):
+    def zip_dir(path, ziph, files_to_exclude, aligned=False, pool=None, base_files=None, extra_files=None):
 
         """
-        This method zips the dir and filters out some files based on a expression
+        This method zips the dir and filters out some files based on a expression. Directories and files are added
+        in sorted order, so the archive does not depend on the order the file system lists them in.
         :param path:
         :param ziph:
         :param files_to_exclude:
-        :return:
+        :param aligned: store files larger than STORE_THRESHOLD uncompressed and page aligned
+        :param pool: thread pool compressing the files
+        :param base_files: files of the base archive of a delta archive, the files that have the same digest in
+            the base archive are skipped
+        :param extra_files: files to archive after the files of the directory, as file paths by archive name
+        :return: OrderedDict of the FileDigest of every file, by archive name, skipped files included
         """
         unwanted_dirs = {'__MACOSX', '__pycache__'}
+        entries = OrderedDict()
 
         for root, directories, files in os.walk(path):
             # Filter directories
-            directories[:] = [d for d in directories if ModelExportUtils.directory_filter(d, unwanted_dirs)]
+            directories[:] = sorted(d for d in directories if ModelExportUtils.directory_filter(d, unwanted_dirs))
             # Filter files
-            files[:] = [f for f in files if ModelExportUtils.file_filter(f, files_to_exclude)]
+            files[:] = sorted(f for f in files if ModelExportUtils.file_filter(f, files_to_exclude))
             for f in files:
                 file_path = os.path.join(root, f)
-                ziph.write(file_path, os.path.relpath(file_path, path))
+                entries[os.path.relpath(file_path, path).replace(os.sep, '/')] = file_path
+        entries.update(extra_files or {})
+
+        digests = OrderedDict()
+        for arcname, file_path in entries.items():
+            base_file = base_files.get(arcname) if base_files else None
+            if base_file is not None and base_file.get('size') == os.path.getsize(file_path):
+                digest = ModelExportUtils.file_digest(file_path)
+                if digest.sha256.hexdigest() == base_file.get('sha256'):
+                    digests[arcname] = digest
+                    continue
+            if aligned and os.path.getsize(file_path) >= STORE_THRESHOLD:
+                digests[arcname] = ModelExportUtils.write_file(ziph, file_path, arcname,
+                                                               compress=False, alignment=PAGE_SIZE)
+            else:
+                digests[arcname] = ModelExportUtils.write_file(ziph, file_path, arcname, pool=pool)
+
+        return digests
+
+    @staticmethod
+    def file_digest(file_path):
+        """
+        Compute the FileDigest of a file without archiving it
+        :param file_path:
+        :return:
+        """
+        digest = FileDigest()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(COMPRESS_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest
+
+    @staticmethod
+    def read_base_archive(base_archive):
+        """
+        Read the manifest of the base archive of a delta archive
+        :param base_archive: path of the base .mar file
+        :return: SHA-256 digest of the base manifest, which identifies the base archive, and the files of the base
+            archive
+        """
+        try:
+            with zipfile.ZipFile(base_archive) as z:
+                manifest = z.read('{}/{}'.format(MAR_INF, MANIFEST_FILE_NAME))
+        except (IOError, KeyError, zipfile.BadZipfile):
+            raise ModelArchiverError("Base archive {} is not a valid model archive.".format(base_archive))
+
+        files = json.loads(manifest.decode('utf-8')).get('files')
+        if files is None:
+            raise ModelArchiverError("Base archive {} has no file digests. Export it again with this version of "
+                                     "model-archiver to use it as base archive.".format(base_archive))
+        return hashlib.sha256(manifest).hexdigest(), files
+
+    @staticmethod
+    def add_files_to_manifest(manifest, digests, base_digest=None):
+        """
+        Add the size and SHA-256 digest of the archived files to the manifest, under 'files', and the digest of the
+        base archive of a delta archive under 'baseArchive'
+        :param manifest: manifest json string
+        :param digests: FileDigest by archive name
+        :param base_digest:
+        :return: manifest json string
+        """
+        manifest_dict = json.loads(manifest, object_pairs_hook=OrderedDict)
+        manifest_dict['files'] = OrderedDict((name, d.__to_dict__()) for name, d in digests.items())
+        if base_digest is not None:
+            manifest_dict['baseArchive'] = base_digest
+        return json.dumps(manifest_dict, indent=2)
+
+    @staticmethod
+    def deflate_chunks(src, digest, pool=None):
+        """
+        Read a file in chunks and deflate them, in parallel with a thread pool. The compressed chunks are yielded
+        in order, at most MAX_PENDING_CHUNKS chunks are held in memory.
+        :param src: file object to read
+        :param digest: FileDigest, updated as the chunks are read
+        :param pool:
+        :return: generator of compressed chunks
+        """
+        pending = deque()
+        dictionary = b''
+        chunk = src.read(COMPRESS_CHUNK_SIZE)
+        while True:
+            next_chunk = src.read(COMPRESS_CHUNK_SIZE)
+            digest.update(chunk)
+            last = not next_chunk
+            if pool is None:
+                yield _deflate(chunk, dictionary, last)
+            else:
+                pending.append(pool.apply_async(_deflate, (chunk, dictionary, last)))
+                while len(pending) > MAX_PENDING_CHUNKS:
+                    yield pending.popleft().get()
+            if last:
+                break
+            dictionary = (dictionary + chunk)[-DICTIONARY_SIZE:]
+            chunk = next_chunk
+
+        while pending:
+            yield pending.popleft().get()
+
+    @staticmethod
+    def stored_chunks(src, digest):
+        """
+        Read a file in chunks, without compressing them.
+        :param src: file object to read
+        :param digest: FileDigest, updated as the chunks are read
+        :return: generator of chunks
+        """
+        for chunk in iter(lambda: src.read(COMPRESS_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            yield chunk
+
+    @staticmethod
+    def write_file(ziph, file_path, arcname, compress=True, alignment=None, pool=None):
+        """
+        Write a file into the archive. The file is read once: its chunks are compressed by deflate_chunks and
+        hashed, and its entry is written directly into the archive file, the same way ZipFile.write does after
+        compressing a file.
+
+        Stored files can be aligned: their local header is padded so that the file data starts at a multiple of
+        alignment in the archive.
+        :param ziph:
+        :param file_path:
+        :param arcname:
+        :param compress: deflate the file, or store it uncompressed
+        :param alignment:
+        :param pool: thread pool compressing the file
+        :return: FileDigest of the file
+        """
+        st = os.stat(file_path)
+        zinfo = zipfile.ZipInfo(arcname, time.localtime(st.st_mtime)[0:6])
+        zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+        zinfo.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        zinfo.file_size = st.st_size
+        # incompressible data grows a little when deflated, allow a 5% margin as ZipFile.write does
+        zip64 = st.st_size * 1.05 > zipfile.ZIP64_LIMIT
+
+        # zipfile writes the next local header at start_dir on python 3, and at the end of the file on python 2
+        header_offset = getattr(ziph, 'start_dir', None)
+        if header_offset is None:
+            header_offset = ziph.fp.tell()
+        if alignment:
+            data_offset = header_offset + LOCAL_HEADER_SIZE + len(zinfo.filename.encode('utf-8')) + 6
+            if zip64:
+                data_offset += ZIP64_EXTRA_SIZE
+            padding = -data_offset % alignment
+            zinfo.extra = struct.pack('<HHH', ALIGNMENT_EXTRA_ID, 2 + padding, alignment) + b'\0' * padding
+
+        zinfo.header_offset = header_offset
+        zinfo.CRC = zinfo.compress_size = 0
+        ziph.fp.seek(header_offset)
+        ziph.fp.write(zinfo.FileHeader(zip64))
+
+        digest = FileDigest()
+        with open(file_path, 'rb') as src:
+            if compress:
+                chunks = ModelExportUtils.deflate_chunks(src, digest, pool)
+            else:
+                chunks = ModelExportUtils.stored_chunks(src, digest)
+            for chunk in chunks:
+                ziph.fp.write(chunk)
+                zinfo.compress_size += len(chunk)
+        zinfo.CRC = digest.crc & 0xFFFFFFFF
+        if digest.size != zinfo.file_size:
+            raise ModelArchiverError("File {} changed while it was archived".format(file_path))
+
+        # rewrite the local header with the CRC and the compressed size
+        end = ziph.fp.tell()
+        ziph.fp.seek(header_offset)
+        ziph.fp.write(zinfo.FileHeader(zip64))
+        ziph.fp.seek(end)
+
+        # register the entry, so that it is written into the central directory when the archive is closed
+        # pylint: disable=protected-access
+        ziph.filelist.append(zinfo)
+        ziph.NameToInfo[zinfo.filename] = zinfo
+        ziph._didModify = True
+        if hasattr(ziph, 'start_dir'):
+            ziph.start_dir = end
+
+        return digest
 
     @staticmethod
     def directory_filter(directory, unwanted_dirs):
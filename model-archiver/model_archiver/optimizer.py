@@ -0,0 +1,404 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Optimization pass of model-archiver: rewrites the graph of an MXNet model for inference.
+
+Training-only operators are removed and batch normalizations are folded into the preceding convolution or fully
+connected layer. The optimized symbol, the parameters that changed, the shapes of the graph and a few warm-up samples
+are archived under MAR-INF/optimized, next to the original model files, and preferred by the model loader.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+from .model_archiver_error import ModelArchiverError
+from .model_packaging_utils import ModelExportUtils, MAR_INF, SIGNATURE_FILE_NAME
+
+OPTIMIZED_DIR = 'optimized'
+SYMBOL_SUFFIX = '-symbol.json'
+PARAMS_SUFFIX = '.params'
+SHAPES_FILE_NAME = 'shapes.json'
+WARMUP_FILE_NAME = 'warmup.params'
+WARMUP_SAMPLES = 4
+
+# Operators that forward their first input unchanged at inference
+IDENTITY_OPS = ('Dropout', 'BlockGrad', 'stop_gradient', 'LinearRegressionOutput', 'MAERegressionOutput')
+# Operators folding a following BatchNorm into their weight and bias, with the output channels on axis 0 of the weight
+FOLDABLE_OPS = ('Convolution', 'FullyConnected')
+# Default BatchNorm parameters of MXNet
+BATCH_NORM_EPS = 1e-3
+BATCH_NORM_FIX_GAMMA = True
+
+
+def _attrs(node):
+    # symbol files of MXNet < 0.12 hold the operator parameters under 'param'
+    for key in ('attrs', 'param', 'attr'):
+        if key in node:
+            return node[key]
+    return {}
+
+
+def _flag(value, default):
+    if value is None:
+        return default
+    return value.lower() in ('true', '1')
+
+
+def load_graph(graph):
+    """
+    Link the nodes of a symbol json: the input entries reference the node objects instead of node ids
+    :param graph: symbol json, as dict
+    :return: the output entries of the graph, as (node, index, version) tuples
+    """
+    nodes = [dict(n) for n in graph['nodes']]
+    for node in nodes:
+        for key in ('attrs', 'param', 'attr'):
+            if key in node:
+                node[key] = dict(node[key])
+        node['inputs'] = [(nodes[e[0]], e[1], e[2] if len(e) > 2 else 0) for e in node.get('inputs', [])]
+        if 'control_deps' in node:
+            node['control_deps'] = [nodes[i] for i in node['control_deps']]
+    return [(nodes[e[0]], e[1], e[2] if len(e) > 2 else 0) for e in graph['heads']]
+
+
+def topological_sort(heads):
+    """
+    Nodes reachable from the output entries, in the depth-first post-order MXNet saves symbols in
+    :param heads:
+    :return: list of nodes
+    """
+    order = []
+    visited = set()
+    for head in heads:
+        stack = [(head[0], False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+                continue
+            if id(node) in visited:
+                continue
+            visited.add(id(node))
+            stack.append((node, True))
+            predecessors = [e[0] for e in node['inputs']] + node.get('control_deps', [])
+            stack.extend((p, False) for p in reversed(predecessors) if id(p) not in visited)
+    return order
+
+
+def dump_graph(heads, attrs=None):
+    """
+    Inverse of load_graph, the nodes that are not reachable from the output entries are dropped
+    :param heads:
+    :param attrs: graph attributes, like the MXNet version
+    :return: symbol json, as dict
+    """
+    order = topological_sort(heads)
+    ids = dict((id(node), i) for i, node in enumerate(order))
+    nodes = []
+    for node in order:
+        node = dict(node)
+        node['inputs'] = [[ids[id(e[0])], e[1], e[2]] for e in node['inputs']]
+        if 'control_deps' in node:
+            node['control_deps'] = [ids[id(n)] for n in node['control_deps']]
+        nodes.append(node)
+
+    graph = OrderedDict([('nodes', nodes),
+                         ('arg_nodes', [i for i, node in enumerate(nodes) if node['op'] == 'null']),
+                         ('heads', [[ids[id(e[0])], e[1], e[2]] for e in heads])])
+    if attrs is not None:
+        graph['attrs'] = attrs
+    return graph
+
+
+def _consumers(heads):
+    # input entries referencing each node, with None for an output of the graph
+    consumers = {}
+    for node in topological_sort(heads):
+        for e in node['inputs']:
+            consumers.setdefault(id(e[0]), []).append((node, e[1]))
+        for dep in node.get('control_deps', []):
+            consumers.setdefault(id(dep), []).append((node, None))
+    for e in heads:
+        consumers.setdefault(id(e[0]), []).append((None, e[1]))
+    return consumers
+
+
+def _resolve(entry, replacements):
+    # replacement of an entry of the first output of a node, through chains of replaced nodes
+    while entry[1] == 0 and id(entry[0]) in replacements:
+        entry = replacements[id(entry[0])]
+    return entry
+
+
+def _replace(heads, replacements):
+    for node in topological_sort(heads):
+        node['inputs'] = [_resolve(e, replacements) for e in node['inputs']]
+    return [_resolve(e, replacements) for e in heads]
+
+
+def remove_training_ops(heads):
+    """
+    Remove the operators that only matter for training: dropout and gradient blocking operators are removed, and loss
+    output operators are replaced by their inference equivalent, so the graph no longer has label inputs
+    :param heads: output entries of the graph
+    :return: output entries of the graph, and the number of removed or replaced operators
+    """
+    consumers = _consumers(heads)
+    replacements = {}
+    converted = 0
+    for node in topological_sort(heads):
+        op = node['op']
+        attrs = _attrs(node)
+        if not node['inputs'] or any(index != 0 for _, index in consumers.get(id(node), [])):
+            continue
+        if op in IDENTITY_OPS and not (op == 'Dropout' and attrs.get('mode') == 'always'):
+            replacements[id(node)] = node['inputs'][0]
+        elif op == 'LogisticRegressionOutput':
+            node.update(op='sigmoid', inputs=node['inputs'][:1])
+            node.pop('attrs', None)
+            node.pop('param', None)
+            converted += 1
+        elif op == 'SoftmaxOutput':
+            if _flag(attrs.get('multi_output'), False):
+                axis = '1'
+            elif _flag(attrs.get('preserve_shape'), False) or \
+                    _resolve(node['inputs'][0], replacements)[0]['op'] == 'FullyConnected':
+                axis = '-1'
+            else:
+                # softmax of the flattened input, which shape is unknown here
+                continue
+            node.update(op='softmax', inputs=node['inputs'][:1], attrs={'axis': axis})
+            node.pop('param', None)
+            converted += 1
+
+    return _replace(heads, replacements), len(replacements) + converted
+
+
+def fold_batch_norm(heads, params):
+    """
+    Fold every BatchNorm following a convolution or fully connected layer into the weight and bias of the layer:
+    w' = w * gamma / sqrt(var + eps) and b' = (b - mean) * gamma / sqrt(var + eps) + beta, per output channel.
+    A layer is only folded when the BatchNorm is its only consumer, and its parameters are not shared.
+    :param heads: output entries of the graph
+    :param params: parameters of the model as numpy arrays, by 'arg:<name>' and 'aux:<name>' keys as in .params files
+    :return: output entries of the graph, the number of folded BatchNorm, and the parameters that changed or were
+        added, by the same keys as params
+    """
+    import numpy as np
+
+    consumers = _consumers(heads)
+    names = set(node['name'] for node in topological_sort(heads))
+    replacements = {}
+    folded = OrderedDict()
+
+    def variable(entry, prefix):
+        node = entry[0]
+        if node['op'] != 'null' or len(consumers.get(id(node), [])) != 1:
+            return None
+        return params.get('{}:{}'.format(prefix, node['name']))
+
+    for bn in topological_sort(heads):
+        if bn['op'] != 'BatchNorm' or len(bn['inputs']) != 5:
+            continue
+        layer = bn['inputs'][0][0]
+        attrs = _attrs(bn)
+        layer_attrs = _attrs(layer)
+        if layer['op'] not in FOLDABLE_OPS or bn['inputs'][0][1] != 0 or len(consumers[id(layer)]) != 1 or \
+                any(index != 0 for _, index in consumers.get(id(bn), [])) or int(attrs.get('axis', 1)) != 1 or \
+                not layer_attrs.get('layout', 'NC').startswith('NC') or \
+                not _flag(layer_attrs.get('flatten'), True):
+            continue
+
+        no_bias = _flag(layer_attrs.get('no_bias'), False)
+        weight = variable(layer['inputs'][1], 'arg')
+        bias = None if no_bias or len(layer['inputs']) < 3 else variable(layer['inputs'][2], 'arg')
+        gamma, beta = variable(bn['inputs'][1], 'arg'), variable(bn['inputs'][2], 'arg')
+        mean, var = variable(bn['inputs'][3], 'aux'), variable(bn['inputs'][4], 'aux')
+        if any(p is None for p in (weight, gamma, beta, mean, var)) or (bias is None and not no_bias):
+            continue
+
+        eps = float(attrs.get('eps', BATCH_NORM_EPS))
+        if _flag(attrs.get('fix_gamma'), BATCH_NORM_FIX_GAMMA):
+            gamma = np.ones_like(gamma)
+        scale = gamma / np.sqrt(var + eps)
+        weight = weight * scale.reshape((-1,) + (1,) * (weight.ndim - 1))
+        bias = ((np.zeros_like(mean) if bias is None else bias) - mean) * scale + beta
+
+        if no_bias:
+            bias_name = '{}_bias'.format(layer['name'])
+            while bias_name in names:
+                bias_name += '_folded'
+            names.add(bias_name)
+            layer['inputs'] = layer['inputs'][:2] + [({'op': 'null', 'name': bias_name, 'inputs': []}, 0, 0)]
+            layer_attrs['no_bias'] = 'False'
+        dtype = params['arg:{}'.format(layer['inputs'][1][0]['name'])].dtype
+        folded['arg:{}'.format(layer['inputs'][1][0]['name'])] = weight.astype(dtype)
+        folded['arg:{}'.format(layer['inputs'][2][0]['name'])] = bias.astype(dtype)
+        replacements[id(bn)] = (layer, 0, 0)
+
+    return _replace(heads, replacements), len(replacements), folded
+
+
+def optimize_graph(graph, params):
+    """
+    Optimize the graph of a model for inference
+    :param graph: symbol json, as dict
+    :param params: parameters of the model as numpy arrays, by 'arg:<name>' and 'aux:<name>' keys
+    :return: optimized symbol json, as dict, and the parameters that changed or were added
+    """
+    heads = load_graph(graph)
+    heads, removed = remove_training_ops(heads)
+    heads, folded, changed = fold_batch_norm(heads, params)
+    logging.info("Removed or replaced %d training operators and folded %d batch normalizations", removed, folded)
+    return dump_graph(heads, graph.get('attrs')), changed
+
+
+def find_checkpoint(model_path, files_to_exclude, extra_files):
+    """
+    Find the symbol, params and signature files of an MXNet model, in the files to archive
+    :param model_path:
+    :param files_to_exclude:
+    :param extra_files: files added to the archive, e.g. the files of a converted ONNX model
+    :return: OrderedDict of the paths of the symbol, params and signature files, by archive name
+    """
+    files = OrderedDict((f, os.path.join(model_path, f)) for f in sorted(os.listdir(model_path))
+                        if f not in files_to_exclude and os.path.isfile(os.path.join(model_path, f)))
+    files.update(extra_files or {})
+
+    symbol_file = ModelExportUtils.find_unique(files, SYMBOL_SUFFIX)
+    if symbol_file is None:
+        raise ModelArchiverError("--optimize requires an MXNet model, no {} file found in model-path."
+                                 .format(SYMBOL_SUFFIX))
+    prefix = symbol_file[:-len(SYMBOL_SUFFIX)]
+    params_file = ModelExportUtils.find_unique([f for f in files if f.startswith(prefix + '-')], PARAMS_SUFFIX)
+    if params_file is None:
+        raise ModelArchiverError("--optimize requires the {}-<epoch>{} file of the model.".format(prefix,
+                                                                                                  PARAMS_SUFFIX))
+    if SIGNATURE_FILE_NAME not in files:
+        raise ModelArchiverError("--optimize requires the {} file of the model.".format(SIGNATURE_FILE_NAME))
+
+    return OrderedDict([(symbol_file, files[symbol_file]), (params_file, files[params_file]),
+                        (SIGNATURE_FILE_NAME, files[SIGNATURE_FILE_NAME])])
+
+
+def optimize_model(model_path, files_to_exclude, extra_files, warmup_samples=None):
+    """
+    Optimize an MXNet model. The optimized files are kept in a cache directory, keyed by the SHA-256 digests of the
+    symbol, params and signature files and the number of warm-up samples, so the same model is only optimized once.
+    :param model_path:
+    :param files_to_exclude:
+    :param extra_files:
+    :param warmup_samples: number of warm-up samples, WARMUP_SAMPLES by default
+    :return: OrderedDict of the paths of the optimized files, by archive name
+    """
+    if warmup_samples is None:
+        warmup_samples = WARMUP_SAMPLES
+    checkpoint = find_checkpoint(model_path, files_to_exclude, extra_files)
+    sha256 = hashlib.sha256()
+    for path in checkpoint.values():
+        sha256.update(ModelExportUtils.file_digest(path).sha256.digest())
+    sha256.update(str(warmup_samples).encode('utf-8'))
+    cache_dir = os.path.join(ModelExportUtils.cache_dir('optimized'), sha256.hexdigest())
+    if os.path.isdir(cache_dir):
+        logging.debug("Using the model optimized in %s", cache_dir)
+    else:
+        write_optimized_model(checkpoint, cache_dir, warmup_samples)
+
+    return OrderedDict(('{}/{}/{}'.format(MAR_INF, OPTIMIZED_DIR, f), os.path.join(cache_dir, f))
+                       for f in sorted(os.listdir(cache_dir)))
+
+
+def write_optimized_model(checkpoint, cache_dir, warmup_samples=WARMUP_SAMPLES):
+    """
+    Optimize an MXNet model into a cache directory: the optimized symbol, the parameters that changed, named like the
+    files of the model, the shapes of the inputs and outputs, and the warm-up samples. The outputs of the optimized
+    model are checked against the outputs of the model on the warm-up samples.
+    :param checkpoint: paths of the symbol, params and signature files, by archive name
+    :param cache_dir:
+    :param warmup_samples: number of warm-up samples, the outputs are still checked on one sample without warm-up
+        samples
+    :return:
+    """
+    try:
+        import mxnet as mx
+        import numpy as np
+    except ImportError:
+        raise ModelArchiverError("MXNet package is not installed. Run command: pip install mxnet to install it.")
+
+    symbol_file, params_file, signature_file = checkpoint.values()
+    try:
+        with open(symbol_file) as f:
+            graph = json.load(f)
+        with open(signature_file) as f:
+            signature = json.load(f)
+        params = dict((k, v.asnumpy()) for k, v in mx.nd.load(params_file).items())
+    except (IOError, ValueError, mx.base.MXNetError) as e:
+        raise ModelArchiverError("Failed to load the model to optimize: {}".format(e))
+
+    optimized, changed = optimize_graph(graph, params)
+
+    # Input shapes as bound by the model loader: variable dimensions are set to 1
+    inputs = [{'data_name': i['data_name'], 'data_shape': [d or 1 for d in i['data_shape']]}
+              for i in signature['inputs']]
+    rng = np.random.RandomState(0)
+    samples = OrderedDict((i['data_name'], mx.nd.array(rng.uniform(size=[max(warmup_samples, 1)] +
+                                                                   i['data_shape'][1:])))
+                          for i in inputs)
+
+    def forward(symbol, arg_params):
+        module = mx.mod.Module(symbol, data_names=list(samples), label_names=None, context=mx.cpu())
+        module.bind(data_shapes=[(k, v.shape) for k, v in samples.items()], for_training=False)
+        module.set_params(dict((k[4:], mx.nd.array(v)) for k, v in arg_params.items() if k.startswith('arg:')),
+                          dict((k[4:], mx.nd.array(v)) for k, v in arg_params.items() if k.startswith('aux:')),
+                          allow_missing=True, allow_extra=True)
+        module.forward(mx.io.DataBatch(list(samples.values())), is_train=False)
+        return [o.asnumpy() for o in module.get_outputs()]
+
+    try:
+        sym = mx.sym.load_json(json.dumps(optimized))
+        expected = forward(mx.sym.load_json(json.dumps(graph)), params)
+        outputs = forward(sym, dict(params, **changed))
+    except (mx.base.MXNetError, RuntimeError) as e:
+        raise ModelArchiverError("Failed to optimize the model: {}".format(e))
+    if len(outputs) != len(expected) or \
+            not all(np.allclose(o, e, rtol=1e-3, atol=1e-4) for o, e in zip(outputs, expected)):
+        raise ModelArchiverError("The optimized model does not compute the outputs of the model.")
+
+    shapes = OrderedDict([('inputs', inputs),
+                          ('outputs', [{'name': name, 'shape': [1] + list(o.shape[1:])}
+                                       for name, o in zip(sym.list_outputs(), outputs)])])
+
+    parent_dir = os.path.dirname(cache_dir)
+    if not os.path.isdir(parent_dir):
+        os.makedirs(parent_dir)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent_dir)
+    try:
+        with open(os.path.join(tmp_dir, os.path.basename(list(checkpoint)[0])), 'w') as f:
+            f.write(json.dumps(optimized, indent=2))
+        mx.nd.save(os.path.join(tmp_dir, os.path.basename(list(checkpoint)[1])),
+                   dict((k, mx.nd.array(v, dtype=v.dtype)) for k, v in changed.items()))
+        with open(os.path.join(tmp_dir, SHAPES_FILE_NAME), 'w') as f:
+            f.write(json.dumps(shapes, indent=2))
+        if warmup_samples > 0:
+            mx.nd.save(os.path.join(tmp_dir, WARMUP_FILE_NAME), samples)
+        try:
+            os.rename(tmp_dir, cache_dir)
+        except OSError:
+            # optimized concurrently
+            if not os.path.isdir(cache_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
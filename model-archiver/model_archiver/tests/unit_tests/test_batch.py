@@ -0,0 +1,97 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import json
+import os
+
+import pytest
+
+from model_archiver.arg_parser import ArgParser
+from model_archiver.batch import package_models, print_summary, read_specs, spec_arguments
+from model_archiver.model_archiver_error import ModelArchiverError
+
+
+def make_model(tmpdir, name):
+    model_path = tmpdir.mkdir(name)
+    model_path.join('model-0000.params').write_binary(os.urandom(4096))
+    model_path.join('signature.json').write('{"inputs": []}')
+    return model_path
+
+
+def test_read_specs_from_file(tmpdir):
+    spec_file = tmpdir.join('models.json')
+    spec_file.write(json.dumps([{"model-name": "a", "model-path": "a", "handler": "h:handle"},
+                                {"model_name": "b", "model_path": "/models/b", "handler": "h:handle"}]))
+
+    specs = read_specs(str(spec_file))
+    assert specs == [{"model_name": "a", "model_path": os.path.join(str(tmpdir), "a"), "handler": "h:handle"},
+                     {"model_name": "b", "model_path": "/models/b", "handler": "h:handle"}]
+
+
+def test_read_specs_from_directory(tmpdir):
+    spec_dir = tmpdir.mkdir('specs')
+    spec_dir.join('b.json').write('{"model-name": "b", "model-path": "b", "handler": "h:handle"}')
+    spec_dir.join('a.json').write('{"model-name": "a", "model-path": "a", "handler": "h:handle"}')
+    spec_dir.join('README').write('not a specification')
+
+    assert [s['model_name'] for s in read_specs(str(spec_dir))] == ['a', 'b']
+
+
+def test_read_invalid_specs(tmpdir):
+    spec_file = tmpdir.join('models.json')
+    spec_file.write('[1, 2]')
+
+    with pytest.raises(ModelArchiverError):
+        read_specs(str(spec_file))
+
+
+def test_spec_arguments():
+    argv = spec_arguments({"model_name": "a", "aligned": True},
+                          {"runtime": "python", "force": False, "aligned": False, "compression_threads": 2})
+    assert argv == ['--aligned', '--compression-threads', '2', '--model-name', 'a', '--runtime', 'python']
+
+
+def test_spec_arguments_of_performance_hints():
+    argv = spec_arguments({"model_name": "a", "batch_sizes": [8, 1], "warmup_samples": 0}, {})
+    args = ArgParser.export_model_args_parser().parse_args(argv + ['--model-path', 'a', '--handler', 'h:handle'])
+
+    assert argv == ['--batch-sizes', '8,1', '--model-name', 'a', '--warmup-samples', '0']
+    assert args.batch_sizes == [1, 8]
+    assert args.warmup_samples == 0
+    assert args.workers is None
+
+    with pytest.raises(SystemExit):
+        ArgParser.export_model_args_parser().parse_args(['--model-name', 'a', '--model-path', 'a', '--handler',
+                                                         'h:handle', '--batch-sizes', '0,4'])
+
+
+def test_package_models(tmpdir, capsys):
+    make_model(tmpdir, 'a')
+    make_model(tmpdir, 'b')
+    spec_file = tmpdir.join('models.json')
+    spec_file.write(json.dumps([{"model-name": "a", "model-path": "a", "handler": "h:handle"},
+                                {"model-name": "b", "model-path": "b", "handler": "h:handle"},
+                                {"model-name": "c", "model-path": "missing", "handler": "h:handle"}]))
+    export_path = tmpdir.mkdir('export')
+    args = ArgParser.batch_args_parser().parse_args([str(spec_file), '--export-path', str(export_path)])
+
+    summaries = package_models(read_specs(str(spec_file)), args, jobs=2)
+
+    assert [s['model_name'] for s in summaries] == ['a', 'b', 'c']
+    for s in summaries[:2]:
+        assert s['error'] is None
+        assert s['files'] == 2
+        assert s['size'] == 4096 + len('{"inputs": []}')
+        assert s['archive_size'] == os.path.getsize(str(export_path.join(s['model_name'] + '.mar')))
+    assert summaries[2]['error'] is not None
+    assert not export_path.join('c.mar').exists()
+
+    assert print_summary(summaries) == 1
+    assert 'failed' in capsys.readouterr().out
@@ -0,0 +1,127 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import json
+import zipfile
+
+import pytest
+
+from model_archiver.inspector import find_archives, inspect_archive, inspect_archives, validate_signature
+
+SIGNATURE = {"inputs": [{"data_name": "data", "data_shape": [0, 10]}], "input_type": "application/json"}
+
+
+def make_archive(tmpdir, name, files, handler='service:handle', manifest_files=None, **manifest):
+    mar_path = str(tmpdir.join(name + '.mar'))
+    with zipfile.ZipFile(mar_path, 'w', zipfile.ZIP_DEFLATED) as z:
+        for arcname, content in files.items():
+            z.writestr(arcname, content)
+        if manifest_files is None:
+            manifest_files = dict((arcname, {'size': len(content), 'sha256': '0' * 64})
+                                  for arcname, content in files.items())
+        manifest.update({'runtime': 'python', 'model': {'modelName': name, 'handler': handler},
+                         'files': manifest_files})
+        z.writestr('MAR-INF/MANIFEST.json', json.dumps(manifest))
+    return mar_path
+
+
+def test_inspect_archive(tmpdir):
+    handler = 'def handle(data, context):\n    return data\n'
+    mar_path = make_archive(tmpdir, 'a', {'service.py': handler, 'signature.json': json.dumps(SIGNATURE)})
+
+    report = inspect_archive(mar_path)
+
+    assert report['valid'] and report['errors'] == []
+    assert report['modelName'] == 'a'
+    assert report['handler'] == 'service:handle'
+    assert report['signature'] == SIGNATURE
+    assert 'files' not in report['manifest']
+    assert [(f['name'], f['size']) for f in report['files']] == [
+        ('service.py', len(handler)), ('signature.json', len(json.dumps(SIGNATURE))),
+        ('MAR-INF/MANIFEST.json', report['files'][2]['size'])]
+    assert report['files'][0]['sha256'] == '0' * 64
+
+
+def test_inspect_invalid_archives(tmpdir):
+    not_zip = tmpdir.join('b.mar')
+    not_zip.write('not a zip file')
+    no_manifest = str(tmpdir.join('c.mar'))
+    with zipfile.ZipFile(no_manifest, 'w') as z:
+        z.writestr('service.py', '')
+    wrong_size = make_archive(tmpdir, 'd', {'service.py': ''}, manifest_files={'service.py': {'size': 1},
+                                                                               'model.params': {'size': 2}})
+    not_object = str(tmpdir.join('e.mar'))
+    with zipfile.ZipFile(not_object, 'w') as z:
+        z.writestr('MAR-INF/MANIFEST.json', '[]')
+
+    assert 'Failed to read the archive' in inspect_archive(str(not_zip))['errors'][0]
+    assert inspect_archive(no_manifest)['errors'] == ["Archive has no MAR-INF/MANIFEST.json, it is not a model "
+                                                      "archive."]
+    assert inspect_archive(wrong_size)['errors'] == ["File service.py has 0 bytes, the manifest expects 1.",
+                                                     "File model.params of the manifest is missing."]
+    assert inspect_archive(not_object)['errors'] == ["Invalid MAR-INF/MANIFEST.json: expected a JSON object."]
+
+
+def test_inspect_delta_archive(tmpdir):
+    mar_path = make_archive(tmpdir, 'a', {'service.py': ''}, manifest_files={'model.params': {'size': 2}},
+                            baseArchive='0' * 64)
+
+    assert inspect_archive(mar_path)['valid']
+
+
+@pytest.mark.parametrize('signature,errors', [
+    (SIGNATURE, []),
+    ({"inputs": []}, ["signature.json has no inputs."]),
+    ({"inputs": [{"data_shape": [1]}]}, ["Input 0 of signature.json has no data_name."]),
+    ({"inputs": [{"data_name": "data", "data_shape": [1, -3]}]},
+     ["Input data of signature.json has an invalid data_shape: [1, -3], expected a list of non-negative integers."]),
+    ({"inputs": [{"data_name": "data", "data_shape": [1]}], "outputs": {}}, ["Outputs of signature.json are not a "
+                                                                              "list."]),
+])
+def test_validate_signature(signature, errors):
+    assert validate_signature(signature) == errors
+
+
+def test_validate_handlers(tmpdir):
+    function = make_archive(tmpdir, 'a', {'service.py': 'print("loaded")\ndef handle(data, context):\n    pass\n'})
+    service_class = make_archive(tmpdir, 'b', {'service.py': 'class Service(object):\n    def handle(self):\n'
+                                                             '        pass\n'}, handler='service.py')
+    missing = make_archive(tmpdir, 'c', {'other.py': ''})
+    broken = make_archive(tmpdir, 'd', {'service.py': 'raise ValueError("broken")\n'})
+    no_entry_point = make_archive(tmpdir, 'e', {'service.py': 'x = 1\n'}, handler='service:predict')
+
+    reports = inspect_archives([str(tmpdir)], validate=True, jobs=2)
+
+    assert find_archives([str(tmpdir)]) == [function, service_class, missing, broken, no_entry_point]
+    assert [r['valid'] for r in reports] == [True, True, False, False, False]
+    assert reports[2]['errors'][0].startswith("Handler module service cannot be imported:")
+    assert reports[3]['errors'] == ["Handler module service cannot be imported: ValueError: broken"]
+    assert reports[4]['errors'] == ["Handler module service has no function predict and 0 classes, expected one "
+                                    "service class."]
+
+
+def test_validate_signature_shapes(tmpdir):
+    mx = pytest.importorskip('mxnet')
+    symbol = mx.sym.Convolution(mx.sym.var('data'), kernel=(3, 3), num_filter=2, name='conv').tojson()
+    handler = 'def handle(data, context):\n    pass\n'
+    image_signature = {"inputs": [{"data_name": "data", "data_shape": [0, 3, 8, 8]}]}
+    valid = make_archive(tmpdir, 'a', {'service.py': handler, 'a-symbol.json': symbol,
+                                       'signature.json': json.dumps(image_signature)})
+    wrong_rank = make_archive(tmpdir, 'b', {'service.py': handler, 'b-symbol.json': symbol,
+                                            'signature.json': json.dumps(SIGNATURE)})
+    wrong_name = make_archive(tmpdir, 'c', {'service.py': handler, 'c-symbol.json': symbol,
+                                            'signature.json': json.dumps({"inputs": [{"data_name": "image",
+                                                                                      "data_shape": [0, 3, 8, 8]}]})})
+
+    reports = inspect_archives([valid, wrong_rank, wrong_name], validate=True)
+
+    assert reports[0]['valid']
+    assert reports[1]['errors'][0].startswith("Input shapes of the signature do not fit b-symbol.json")
+    assert reports[2]['errors'] == ["Input image of the signature is not an input of c-symbol.json."]
@@ -34,7 +34,8 @@ class TestModelPackaging:
     export_path = '/Users/ghaipiyu/'
 
     args = Namespace(author=author, email=email, engine=engine, model_name=model_name, handler=handler,
-                     runtime=RuntimeType.PYTHON.value, model_path=model_path, export_path=export_path, force=False)
+                     runtime=RuntimeType.PYTHON.value, model_path=model_path, export_path=export_path, force=False,
+                     aligned=False, compression_threads=None, base_archive=None, optimize=False)
 
     @pytest.fixture()
     def patches(self, mocker):
@@ -53,10 +54,9 @@ class TestModelPackaging:
     def test_export_model_method(self, patches):
 
         patches.export_utils.check_mar_already_exists.return_value = '/Users/ghaipiyu/'
-        patches.export_utils.check_custom_model_types.return_value = '/Users/ghaipiyu', ['a.txt', 'b.txt']
+        patches.export_utils.check_custom_model_types.return_value = {}, ['a.txt', 'b.txt']
         patches.export_utils.zip.return_value = None
 
         package_model(self.args, ModelExportUtils.generate_manifest_json(self.args))
         patches.export_utils.validate_inputs.assert_called()
         patches.export_utils.zip.assert_called()
-        patches.export_utils.clean_temp_files.assert_called()
@@ -8,9 +8,13 @@
 # express or implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
+import hashlib
 import json
+import numpy as np
 import pytest
 import os
+import struct
+import zipfile
 from collections import namedtuple
 from model_archiver.model_packaging_utils import ModelExportUtils
 from model_archiver.manifest_components.engine import EngineType
@@ -85,16 +89,87 @@ class TestExportModelUtils:
         def test_onnx_file_is_not_none(self, patches):
             onnx_file = 'some-file.onnx'
             patches.utils.find_unique.return_value = onnx_file
-            patches.utils.convert_onnx_model.return_value = ('sym', 'param')
+            patches.utils.convert_onnx_model.return_value = {'sym': '/cache/sym', 'param': '/cache/param'}
 
-            temp, exclude = ModelExportUtils.check_custom_model_types(self.model_path)
+            extra, exclude = ModelExportUtils.check_custom_model_types(self.model_path)
             patches.utils.convert_onnx_model.assert_called_once_with(self.model_path, onnx_file, None)
 
-            assert len(temp) == 2
-            assert len(exclude) == 1
-            assert temp[0] == os.path.join(self.model_path, 'sym')
-            assert temp[1] == os.path.join(self.model_path, 'param')
-            assert exclude[0] == onnx_file
+            assert extra == {'sym': '/cache/sym', 'param': '/cache/param'}
+            assert exclude == [onnx_file, 'signature.json']
+
+    # noinspection PyClassHasNoInit
+    class TestConvertOnnxModel:
+
+        @staticmethod
+        def import_onnx_model(onnx_path, cache_dir):
+            os.makedirs(cache_dir)
+            for name, content in (('symbol.json', '{"nodes": []}'), ('model.params', 'params'),
+                                  ('inputs.json', '[{"data_name": "input_0", "data_shape": [1, 3, 224, 224]}]')):
+                with open(os.path.join(cache_dir, name), 'w') as f:
+                    f.write(content)
+
+        def test_converted_model_is_cached(self, tmpdir, mocker):
+            mocker.patch.dict(os.environ, {'MODEL_ARCHIVER_CACHE_DIR': str(tmpdir.join('cache'))})
+            import_onnx_model = mocker.patch.object(ModelExportUtils, 'import_onnx_model',
+                                                    side_effect=self.import_onnx_model)
+            model_path = tmpdir.mkdir('model')
+            model_path.join('model.onnx').write_binary(b'onnx')
+            model_path.join('signature.json').write('{"inputs": [{"data_name": "data"}]}')
+
+            for _ in range(2):
+                extra = ModelExportUtils.convert_onnx_model(str(model_path), 'model.onnx', 'squeezenet')
+
+            import_onnx_model.assert_called_once()
+            assert sorted(os.listdir(str(model_path))) == ['model.onnx', 'signature.json']
+            assert list(extra) == ['squeezenet-symbol.json', 'squeezenet-0000.params', 'signature.json']
+            with open(extra['signature.json']) as f:
+                assert json.load(f) == {"inputs": [{"data_name": "input_0", "data_shape": [1, 3, 224, 224]}]}
+            assert os.path.dirname(extra['squeezenet-symbol.json']) == \
+                str(tmpdir.join('cache', 'onnx', hashlib.sha256(b'onnx').hexdigest()))
+
+        def test_import_onnx_model(self, tmpdir):
+            mx = pytest.importorskip('mxnet')
+            onnx = pytest.importorskip('onnx')
+            from onnx import helper, numpy_helper, TensorProto
+            weight = np.random.RandomState(0).randn(2, 3).astype(np.float32)
+            bias = np.array([0.5, -0.5], dtype=np.float32)
+            inputs = [helper.make_tensor_value_info('input_0', TensorProto.FLOAT, [1, 3]),
+                      helper.make_tensor_value_info('weight', TensorProto.FLOAT, [2, 3]),
+                      helper.make_tensor_value_info('bias', TensorProto.FLOAT, [2])]
+            outputs = [helper.make_tensor_value_info('output', TensorProto.FLOAT, [1, 2])]
+            initializers = [numpy_helper.from_array(weight, 'weight'), numpy_helper.from_array(bias, 'bias')]
+            graph = helper.make_graph([helper.make_node('Gemm', ['input_0', 'weight', 'bias'], ['output'], transB=1)],
+                                      'dense', inputs, outputs, initializers)
+            onnx_path = str(tmpdir.join('model.onnx'))
+            onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid('', 7)]), onnx_path)
+            cache_dir = str(tmpdir.join('cache', 'onnx', 'model'))
+
+            ModelExportUtils.import_onnx_model(onnx_path, cache_dir)
+
+            assert sorted(os.listdir(cache_dir)) == ['inputs.json', 'model.params', 'symbol.json']
+            with open(os.path.join(cache_dir, 'inputs.json')) as f:
+                assert json.load(f) == [{"data_name": "input_0", "data_shape": [1, 3]}]
+            sym = mx.sym.load(os.path.join(cache_dir, 'symbol.json'))
+            saved = mx.nd.load(os.path.join(cache_dir, 'model.params'))
+            params = dict((k.split(':', 1)[1], v) for k, v in saved.items())
+            x = np.array([[1.0, 2.0, 3.0]], dtype=np.float32)
+            params['input_0'] = mx.nd.array(x)
+            output = sym.bind(mx.cpu(), params).forward()[0].asnumpy()
+            np.testing.assert_allclose(output, x.dot(weight.T) + bias, rtol=1e-5)
+
+        def test_extra_files_are_archived(self, tmpdir):
+            model_path = tmpdir.mkdir('model')
+            model_path.join('signature.json').write('{}')
+            model_path.join('model.onnx').write('onnx')
+            converted = tmpdir.mkdir('cache').join('symbol.json')
+            converted.write('{"nodes": []}')
+
+            ModelExportUtils.zip(str(tmpdir), 'model', str(model_path), ['model.onnx'], '{}',
+                                 extra_files={'model-symbol.json': str(converted)})
+
+            with zipfile.ZipFile(str(tmpdir.join('model.mar'))) as z:
+                assert z.namelist() == ['signature.json', 'model-symbol.json', 'MAR-INF/MANIFEST.json']
+                assert z.read('model-symbol.json') == b'{"nodes": []}'
 
     # noinspection PyClassHasNoInit
     class TestFindUnique:
@@ -117,24 +192,6 @@ class TestExportModelUtils:
             with pytest.raises(ModelArchiverError):
                 ModelExportUtils.find_unique(files, suffix)
 
-    # noinspection PyClassHasNoInit
-    class TestCleanTempFiles:
-
-        @pytest.fixture()
-        def patches(self, mocker):
-            Patches = namedtuple('Patches', ['remove'])
-            patches = Patches(mocker.patch('os.remove'))
-
-            patches.remove.return_value = True
-            return patches
-
-        def test_clean_call(self, patches):
-            temp_files = ['a', 'b', 'c']
-            ModelExportUtils.clean_temp_files(temp_files)
-
-            patches.remove.assert_called()
-            assert patches.remove.call_count == len(temp_files)
-
     # noinspection PyClassHasNoInit
     class TestGenerateManifestProps:
 
@@ -173,6 +230,14 @@ class TestExportModelUtils:
             assert 'model' in manifest_json
             assert 'publisher' in manifest_json
             assert 'license' not in manifest_json
+            assert 'performance' not in manifest_json
+
+        def test_manifest_json_with_performance(self):
+            args = self.Namespace(batch_sizes=[1, 8], max_batch_delay=50, workers=None,
+                                  threads_per_worker=2, warmup_samples=None, memory_estimate=None,
+                                  **vars(self.args))
+            manifest_json = json.loads(ModelExportUtils.generate_manifest_json(args))
+            assert manifest_json['performance'] == {'batchSizes': [1, 8], 'maxBatchDelay': 50, 'threadsPerWorker': 2}
 
     # noinspection PyClassHasNoInit
     class TestModelNameRegEx:
@@ -218,3 +283,128 @@ class TestExportModelUtils:
 
         def test_with_return_true(self):
             assert ModelExportUtils.directory_filter('my-model', self.unwanted_dirs) is True
+
+    # noinspection PyClassHasNoInit
+    class TestZipAligned:
+
+        @staticmethod
+        def data_offset(mar_path, zinfo):
+            with open(mar_path, 'rb') as f:
+                f.seek(zinfo.header_offset)
+                header = f.read(30)
+            name_len, extra_len = struct.unpack('<HH', header[26:30])
+            return zinfo.header_offset + 30 + name_len + extra_len
+
+        def test_large_files_are_stored_aligned(self, tmpdir):
+            model_path = tmpdir.mkdir('model')
+            model_path.join('signature.json').write('{"inputs": []}' * 100)
+            model_path.join('model-0000.params').write_binary(os.urandom(3 * 1024 * 1024 + 17))
+            model_path.mkdir('sub').join('b.params').write_binary(os.urandom(1024 * 1024))
+
+            ModelExportUtils.zip(str(tmpdir), 'model', str(model_path), [], '{}', aligned=True)
+
+            mar_path = str(tmpdir.join('model.mar'))
+            with zipfile.ZipFile(mar_path) as z:
+                assert z.testzip() is None
+                infos = {i.filename: i for i in z.infolist()}
+                assert z.read('model-0000.params') == model_path.join('model-0000.params').read_binary()
+
+            assert infos['signature.json'].compress_type == zipfile.ZIP_DEFLATED
+            for name in ('model-0000.params', 'sub/b.params'):
+                assert infos[name].compress_type == zipfile.ZIP_STORED
+                assert self.data_offset(mar_path, infos[name]) % 4096 == 0
+
+        def test_not_aligned_by_default(self, tmpdir):
+            model_path = tmpdir.mkdir('model')
+            model_path.join('model-0000.params').write_binary(b'\0' * 2 * 1024 * 1024)
+
+            ModelExportUtils.zip(str(tmpdir), 'model', str(model_path), [], '{}')
+            with zipfile.ZipFile(str(tmpdir.join('model.mar'))) as z:
+                assert z.getinfo('model-0000.params').compress_type == zipfile.ZIP_DEFLATED
+
+    # noinspection PyClassHasNoInit
+    class TestZipParallel:
+
+        @staticmethod
+        def make_model(tmpdir):
+            model_path = tmpdir.mkdir('model')
+            # compressible data over several chunks, with an incompressible chunk in between
+            model_path.join('model-0000.params').write_binary(b'0123456789abcdef' * 200000 + os.urandom(1024 * 1024))
+            model_path.join('model-symbol.json').write('{"nodes": []}' * 1000)
+            model_path.mkdir('sub').join('empty.txt').write('')
+            for f in model_path.visit():
+                f.setmtime(1500000000)
+            return model_path
+
+        def test_archives_are_identical_for_any_number_of_threads(self, tmpdir):
+            model_path = self.make_model(tmpdir)
+            archives = []
+            for threads in (1, 2, 8):
+                export_path = tmpdir.mkdir('export-{}'.format(threads))
+                ModelExportUtils.zip(str(export_path), 'model', str(model_path), [], '{}', threads=threads)
+                archives.append(export_path.join('model.mar').read_binary())
+
+            assert archives[0] == archives[1] == archives[2]
+
+        def test_parallel_archive_content(self, tmpdir):
+            model_path = self.make_model(tmpdir)
+            ModelExportUtils.zip(str(tmpdir), 'model', str(model_path), [], '{}', threads=4)
+
+            with zipfile.ZipFile(str(tmpdir.join('model.mar'))) as z:
+                assert z.testzip() is None
+                assert z.namelist() == ['model-0000.params', 'model-symbol.json', 'sub/empty.txt',
+                                        'MAR-INF/MANIFEST.json']
+                for name in ('model-0000.params', 'model-symbol.json', 'sub/empty.txt'):
+                    assert z.getinfo(name).compress_type == zipfile.ZIP_DEFLATED
+                    assert z.read(name) == model_path.join(name).read_binary()
+
+    # noinspection PyClassHasNoInit
+    class TestFileDigests:
+
+        @pytest.mark.parametrize('aligned', [False, True])
+        def test_manifest_lists_file_digests(self, tmpdir, aligned):
+            model_path = tmpdir.mkdir('model')
+            model_path.join('model-0000.params').write_binary(os.urandom(2 * 1024 * 1024 + 5))
+            model_path.mkdir('sub').join('synset.txt').write('cat\ndog\n')
+
+            ModelExportUtils.zip(str(tmpdir), 'model', str(model_path), [], '{"runtime": "python"}', aligned=aligned)
+
+            with zipfile.ZipFile(str(tmpdir.join('model.mar'))) as z:
+                manifest = json.loads(z.read('MAR-INF/MANIFEST.json').decode('utf-8'))
+            assert manifest['runtime'] == 'python'
+            assert list(manifest['files']) == ['model-0000.params', 'sub/synset.txt']
+            for name, entry in manifest['files'].items():
+                data = model_path.join(name).read_binary()
+                assert entry == {'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+    # noinspection PyClassHasNoInit
+    class TestDeltaArchive:
+
+        def test_delta_archive_has_changed_files(self, tmpdir):
+            model_path = tmpdir.mkdir('model')
+            model_path.join('model-0000.params').write_binary(os.urandom(1024))
+            model_path.join('synset.txt').write('cat\ndog\n')
+            model_path.join('signature.json').write('{"inputs": []}')
+            base_path = tmpdir.mkdir('base')
+            ModelExportUtils.zip(str(base_path), 'model', str(model_path), [], '{}')
+            base_mar = str(base_path.join('model.mar'))
+
+            model_path.join('model-0000.params').write_binary(os.urandom(1024))
+            model_path.join('synset.txt').write('cat\nbat\n')
+            ModelExportUtils.zip(str(tmpdir), 'model', str(model_path), [], '{}', base_archive=base_mar)
+
+            with zipfile.ZipFile(base_mar) as z:
+                base_digest = hashlib.sha256(z.read('MAR-INF/MANIFEST.json')).hexdigest()
+            with zipfile.ZipFile(str(tmpdir.join('model.mar'))) as z:
+                assert z.namelist() == ['model-0000.params', 'synset.txt', 'MAR-INF/MANIFEST.json']
+                manifest = json.loads(z.read('MAR-INF/MANIFEST.json').decode('utf-8'))
+            assert manifest['baseArchive'] == base_digest
+            assert list(manifest['files']) == ['model-0000.params', 'signature.json', 'synset.txt']
+
+        def test_base_archive_without_digests(self, tmpdir):
+            base_mar = str(tmpdir.join('base.mar'))
+            with zipfile.ZipFile(base_mar, 'w') as z:
+                z.writestr('MAR-INF/MANIFEST.json', '{}')
+
+            with pytest.raises(ModelArchiverError):
+                ModelExportUtils.read_base_archive(base_mar)
@@ -0,0 +1,225 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import json
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+from model_archiver import optimizer
+from model_archiver.model_archiver_error import ModelArchiverError
+from model_archiver.model_packaging_utils import ModelExportUtils
+from model_archiver.optimizer import dump_graph, find_checkpoint, load_graph, optimize_graph, optimize_model
+
+
+def variable(name):
+    return {'op': 'null', 'name': name, 'inputs': []}
+
+
+def conv_bn_graph(no_bias=True, fix_gamma='False', extra_consumer=False):
+    nodes = []
+
+    def add(node):
+        nodes.append(node)
+        return [len(nodes) - 1, 0, 0]
+
+    conv_inputs = [add(variable('data')), add(variable('conv0_weight'))]
+    if not no_bias:
+        conv_inputs.append(add(variable('conv0_bias')))
+    conv = add({'op': 'Convolution', 'name': 'conv0', 'inputs': conv_inputs,
+                'attrs': {'kernel': '(1, 1)', 'num_filter': '4', 'no_bias': str(no_bias)}})
+    bn_variables = ('bn0_gamma', 'bn0_beta', 'bn0_moving_mean', 'bn0_moving_var')
+    bn_inputs = [conv] + [add(variable(name)) for name in bn_variables]
+    bn = add({'op': 'BatchNorm', 'name': 'bn0', 'inputs': bn_inputs,
+              'attrs': {'eps': '2e-05', 'fix_gamma': fix_gamma}})
+    heads = [add({'op': 'Activation', 'name': 'relu0', 'inputs': [bn], 'attrs': {'act_type': 'relu'}})]
+    if extra_consumer:
+        heads.append(add({'op': 'Activation', 'name': 'relu1', 'inputs': [conv], 'attrs': {'act_type': 'relu'}}))
+    return {'nodes': nodes, 'arg_nodes': [i for i, n in enumerate(nodes) if n['op'] == 'null'], 'heads': heads,
+            'attrs': {'mxnet_version': ['int', 10200]}}
+
+
+def conv_bn_params(rng):
+    return {'arg:conv0_weight': rng.randn(4, 3, 1, 1).astype(np.float32),
+            'arg:bn0_gamma': rng.rand(4).astype(np.float32) + 0.5,
+            'arg:bn0_beta': rng.randn(4).astype(np.float32),
+            'aux:bn0_moving_mean': rng.randn(4).astype(np.float32),
+            'aux:bn0_moving_var': rng.rand(4).astype(np.float32) + 0.5}
+
+
+def test_load_dump_graph():
+    graph = conv_bn_graph()
+
+    assert dump_graph(load_graph(graph), graph['attrs']) == graph
+
+
+def test_remove_training_ops():
+    graph = {'nodes': [variable('data'), variable('fc_weight'), variable('fc_bias'),
+                       {'op': 'FullyConnected', 'name': 'fc', 'inputs': [[0, 0, 0], [1, 0, 0], [2, 0, 0]],
+                        'attrs': {'num_hidden': '10'}},
+                       {'op': 'Dropout', 'name': 'drop', 'inputs': [[3, 0, 0]], 'attrs': {'p': '0.5'}},
+                       variable('softmax_label'),
+                       {'op': 'SoftmaxOutput', 'name': 'softmax', 'inputs': [[4, 0, 0], [5, 0, 0]]}],
+             'arg_nodes': [0, 1, 2, 5], 'heads': [[6, 0, 0]]}
+
+    optimized, changed = optimize_graph(graph, {})
+
+    assert changed == {}
+    assert [n['name'] for n in optimized['nodes']] == ['data', 'fc_weight', 'fc_bias', 'fc', 'softmax']
+    assert optimized['nodes'][4] == {'op': 'softmax', 'name': 'softmax', 'inputs': [[3, 0, 0]],
+                                     'attrs': {'axis': '-1'}}
+    assert optimized['arg_nodes'] == [0, 1, 2]
+    assert optimized['heads'] == [[4, 0, 0]]
+
+
+def test_softmax_of_unknown_shape_is_kept():
+    graph = {'nodes': [variable('data'), variable('softmax_label'),
+                       {'op': 'SoftmaxOutput', 'name': 'softmax', 'inputs': [[0, 0, 0], [1, 0, 0]]}],
+             'arg_nodes': [0, 1], 'heads': [[2, 0, 0]]}
+
+    optimized, _ = optimize_graph(graph, {})
+
+    assert optimized == graph
+
+
+@pytest.mark.parametrize('no_bias', [True, False])
+@pytest.mark.parametrize('fix_gamma', ['False', 'True'])
+def test_fold_batch_norm(no_bias, fix_gamma):
+    rng = np.random.RandomState(0)
+    params = conv_bn_params(rng)
+    if not no_bias:
+        params['arg:conv0_bias'] = rng.randn(4).astype(np.float32)
+    graph = conv_bn_graph(no_bias, fix_gamma)
+
+    optimized, changed = optimize_graph(graph, params)
+
+    assert [n['name'] for n in optimized['nodes']] == ['data', 'conv0_weight', 'conv0_bias', 'conv0', 'relu0']
+    assert optimized['nodes'][3]['inputs'] == [[0, 0, 0], [1, 0, 0], [2, 0, 0]]
+    assert optimized['nodes'][3]['attrs']['no_bias'] == 'False'
+    assert optimized['nodes'][4]['inputs'] == [[3, 0, 0]]
+    assert sorted(changed) == ['arg:conv0_bias', 'arg:conv0_weight']
+
+    # 1x1 convolution and batch normalization of a sample, against the folded convolution
+    x = rng.randn(3, 5, 5).astype(np.float32)
+    y = np.einsum('oi,ihw->ohw', params['arg:conv0_weight'][:, :, 0, 0], x)
+    if not no_bias:
+        y += params['arg:conv0_bias'][:, None, None]
+    gamma = params['arg:bn0_gamma'] if fix_gamma == 'False' else np.ones(4, dtype=np.float32)
+    expected = (y - params['aux:bn0_moving_mean'][:, None, None]) / \
+        np.sqrt(params['aux:bn0_moving_var'][:, None, None] + 2e-05) * gamma[:, None, None] + \
+        params['arg:bn0_beta'][:, None, None]
+    folded = np.einsum('oi,ihw->ohw', changed['arg:conv0_weight'][:, :, 0, 0], x) + \
+        changed['arg:conv0_bias'][:, None, None]
+    assert changed['arg:conv0_weight'].dtype == np.float32
+    np.testing.assert_allclose(folded, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_fold_batch_norm_of_shared_output():
+    graph = conv_bn_graph(extra_consumer=True)
+
+    optimized, changed = optimize_graph(graph, conv_bn_params(np.random.RandomState(0)))
+
+    assert changed == {}
+    assert 'bn0' in [n['name'] for n in optimized['nodes']]
+
+
+def test_find_checkpoint(tmpdir):
+    model_path = tmpdir.mkdir('model')
+    model_path.join('resnet-symbol.json').write('{}')
+    model_path.join('signature.json').write('{"inputs": []}')
+
+    with pytest.raises(ModelArchiverError):
+        find_checkpoint(str(model_path), [], {})
+
+    model_path.join('resnet-0000.params').write('')
+    checkpoint = find_checkpoint(str(model_path), [], {})
+    assert list(checkpoint) == ['resnet-symbol.json', 'resnet-0000.params', 'signature.json']
+
+    checkpoint = find_checkpoint(str(model_path), ['signature.json'], {'signature.json': '/cache/signature.json'})
+    assert checkpoint['signature.json'] == '/cache/signature.json'
+
+
+def save_conv_bn_model(mx, model_path):
+    data = mx.sym.var('data')
+    conv = mx.sym.Convolution(data, kernel=(3, 3), num_filter=4, no_bias=True, name='conv0')
+    bn = mx.sym.BatchNorm(conv, fix_gamma=False, name='bn0')
+    fc = mx.sym.FullyConnected(mx.sym.Activation(bn, act_type='relu', name='relu0'), num_hidden=3, name='fc')
+    symbol = mx.sym.SoftmaxOutput(fc, name='softmax')
+    rng = np.random.RandomState(1)
+    arg_params = {'conv0_weight': rng.randn(4, 3, 3, 3), 'bn0_gamma': rng.rand(4) + 0.5, 'bn0_beta': rng.randn(4),
+                  'fc_weight': rng.randn(3, 144) * 0.05, 'fc_bias': rng.randn(3)}
+    aux_params = {'bn0_moving_mean': rng.randn(4), 'bn0_moving_var': rng.rand(4) + 0.5}
+    mx.model.save_checkpoint(str(model_path.join('model')), 0, symbol,
+                             dict((k, mx.nd.array(v)) for k, v in arg_params.items()),
+                             dict((k, mx.nd.array(v)) for k, v in aux_params.items()))
+    model_path.join('signature.json').write(json.dumps({'inputs': [{'data_name': 'data',
+                                                                    'data_shape': [0, 3, 8, 8]}]}))
+
+
+def predict(mx, symbol, arg_params, aux_params, data):
+    module = mx.mod.Module(symbol, data_names=['data'], label_names=None, context=mx.cpu())
+    module.bind(data_shapes=[('data', data.shape)], for_training=False)
+    module.set_params(arg_params, aux_params, allow_missing=True, allow_extra=True)
+    module.forward(mx.io.DataBatch([data]), is_train=False)
+    return module.get_outputs()[0].asnumpy()
+
+
+def test_optimize_model(tmpdir, mocker):
+    mx = pytest.importorskip('mxnet')
+    mocker.patch.dict(os.environ, {'MODEL_ARCHIVER_CACHE_DIR': str(tmpdir.join('cache'))})
+    write_optimized_model = mocker.spy(optimizer, 'write_optimized_model')
+    model_path = tmpdir.mkdir('model')
+    save_conv_bn_model(mx, model_path)
+
+    extra_files = optimize_model(str(model_path), [], {}, warmup_samples=2)
+    assert optimize_model(str(model_path), [], {}, warmup_samples=2) == extra_files
+    write_optimized_model.assert_called_once()
+
+    assert list(extra_files) == ['MAR-INF/optimized/model-0000.params', 'MAR-INF/optimized/model-symbol.json',
+                                 'MAR-INF/optimized/shapes.json', 'MAR-INF/optimized/warmup.params']
+    cache_dir = os.path.dirname(extra_files['MAR-INF/optimized/shapes.json'])
+    assert os.path.dirname(cache_dir) == str(tmpdir.join('cache', 'optimized'))
+    ModelExportUtils.zip(str(tmpdir), 'model', str(model_path), [], '{}', extra_files=extra_files)
+    with zipfile.ZipFile(str(tmpdir.join('model.mar'))) as z:
+        assert [n for n in z.namelist() if n.startswith('MAR-INF/optimized/')] == list(extra_files)
+        shapes = json.loads(z.read('MAR-INF/optimized/shapes.json').decode('utf-8'))
+    assert shapes == {'inputs': [{'data_name': 'data', 'data_shape': [1, 3, 8, 8]}],
+                      'outputs': [{'name': 'softmax_output', 'shape': [1, 3]}]}
+
+    # the optimized graph has no batch normalization, and its parameters override the parameters of the model
+    symbol, arg_params, aux_params = mx.model.load_checkpoint(str(model_path.join('model')), 0)
+    optimized_symbol = mx.sym.load(extra_files['MAR-INF/optimized/model-symbol.json'])
+    assert 'bn0' not in [n['name'] for n in json.loads(optimized_symbol.tojson())['nodes']]
+    overlay = mx.nd.load(extra_files['MAR-INF/optimized/model-0000.params'])
+    assert sorted(overlay) == ['arg:conv0_bias', 'arg:conv0_weight']
+    optimized_params = dict(arg_params, **dict((k[4:], v) for k, v in overlay.items()))
+    samples = mx.nd.load(extra_files['MAR-INF/optimized/warmup.params'])['data']
+    assert samples.shape == (2, 3, 8, 8)
+    np.testing.assert_allclose(predict(mx, optimized_symbol, optimized_params, aux_params, samples),
+                               predict(mx, symbol, arg_params, aux_params, samples), rtol=1e-4, atol=1e-5)
+
+
+def test_optimized_outputs_are_checked(tmpdir, mocker):
+    mx = pytest.importorskip('mxnet')
+    model_path = tmpdir.mkdir('model')
+    save_conv_bn_model(mx, model_path)
+    checkpoint = find_checkpoint(str(model_path), [], {})
+
+    def wrong_fold(graph, params):
+        optimized, changed = optimize_graph(graph, params)
+        changed['arg:conv0_bias'] = changed['arg:conv0_bias'] + 1
+        return optimized, changed
+
+    mocker.patch.object(optimizer, 'optimize_graph', side_effect=wrong_fold)
+    with pytest.raises(ModelArchiverError, match='does not compute the outputs'):
+        optimizer.write_optimized_model(checkpoint, str(tmpdir.join('optimized')))
+    assert not tmpdir.join('optimized').exists()
@@ -73,7 +73,9 @@ if __name__ == '__main__':
             'onnx': ['onnx==1.1.1']
         },
         entry_points={
-            'console_scripts': ['model-archiver=model_archiver.model_packaging:generate_model_archive']
+            'console_scripts': ['model-archiver=model_archiver.model_packaging:generate_model_archive',
+                                'model-archiver-batch=model_archiver.batch:generate_model_archives',
+                                'model-archiver-inspect=model_archiver.inspector:inspect_model_archives']
         },
         include_package_data=True,
         license='Apache License Version 2.0'